@@ -0,0 +1,64 @@
+# coding=utf-8
+"""
+Parse cost on highly ambiguous sentences: "n v n prep n prep n ..." with the PP attachment grammar,
+where the number of trees grows as Catalan numbers of the prepositional phrase count.
+Trees are only built (parse) while there are few enough of them, the forest and spans are always built.
+
+    python benchmarks/ambiguity_benchmark.py [pp_count ...]
+"""
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from glr.grammar_parser import GrammarParser
+from glr.parser import Parser, ParseStats
+from glr.tokenizer import Token
+from glr.utils import format_table
+
+GRAMMAR = '''
+S = NP VP
+S = S PP
+NP = n
+NP = det n
+NP = NP PP
+PP = prep NP
+VP = v NP
+'''
+
+MAX_TREES = 50000
+
+
+def make_tokens(pp_count):
+    symbols = ['n', 'v', 'n'] + ['prep', 'n'] * pp_count
+    return [Token(symbol, '%s%d' % (symbol, i)) for i, symbol in enumerate(symbols)] + [Token('$')]
+
+
+def measure(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main(pp_counts):
+    parser = Parser(GrammarParser().set_log_level(0).parse(GRAMMAR))
+    table = [['PPs', 'Full', 'Trees', 'Forest nodes', 'GSS max width', 'Reductions', 'Forest, s', 'Spans, s',
+              'Trees, s']]
+    for pp_count in pp_counts:
+        tokens = make_tokens(pp_count)
+        for full_math in (True, False):
+            stats = ParseStats()
+            forest, forest_time = measure(parser.parse_forest, tokens, full_math, None, stats)
+            trees_count = forest.count_trees()
+            spans_time = measure(parser.parse_spans, tokens, full_math)[1]
+            trees_time = '-'
+            if trees_count <= MAX_TREES:
+                trees_time = '%.3f' % measure(parser.parse, tokens, full_math)[1]
+            table.append([pp_count, full_math, trees_count, len(forest.nodes()), max(stats.widths),
+                          sum(stats.reductions.values()), '%.3f' % forest_time, '%.3f' % spans_time,
+                          trees_time])
+    print(format_table(table, stripe=False))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [2, 4, 6, 8, 12, 16, 24])
@@ -0,0 +1,64 @@
+# coding=utf-8
+"""
+Throughput of Automation.parse_many and GLRParser.parse_many by the number of worker processes.
+Documents are made of the same sentences, so the work per document is the same. The pool start
+(workers building their parsers and morphology analyzers) is part of the measured time.
+
+    python benchmarks/batch_benchmark.py [workers ...]
+"""
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from glr.automation import Automation
+from glr.utils import format_table
+from glr_parser import GLRParser
+
+GRAMMAR = u'''
+S = adj<agr-gnc=1> CLOTHES
+S = CLOTHES adj<agr-gnc=-1>
+'''
+
+DICTIONARIES = {
+    u'CLOTHES': [u'куртка', u'пальто', u'шубы']
+}
+
+SENTENCES = [
+    u'на вешалке висят пять красивых курток и вонючая шуба, а также пальто серое',
+    u'вчера мы купили синюю куртку и теплое пальто, но шубы не было',
+    u'длинная шуба висела в шкафу рядом с пальто старым и курткой новой',
+]
+
+DOCUMENTS = 200
+SENTENCES_PER_DOCUMENT = 10
+CHUNKSIZE = 8
+
+
+def make_documents():
+    return [u'. '.join(SENTENCES[(i + j) % len(SENTENCES)] for j in range(SENTENCES_PER_DOCUMENT))
+            for i in range(DOCUMENTS)]
+
+
+def measure(parser, documents, workers, ordered):
+    started = time.perf_counter()
+    results = list(parser.parse_many(documents, workers, CHUNKSIZE, ordered))
+    return results, time.perf_counter() - started
+
+
+def main(workers_counts):
+    documents = make_documents()
+    parsers = [('Automation', Automation(GRAMMAR, DICTIONARIES)),
+               ('GLRParser', GLRParser(GRAMMAR, dictionaries=DICTIONARIES))]
+    table = [['Parser', 'Workers', 'Ordered', 'Documents', 'Time, s', 'Documents/s']]
+    for name, parser in parsers:
+        for workers in workers_counts:
+            for ordered in (True, False):
+                results, elapsed = measure(parser, documents, workers, ordered)
+                table.append([name, workers, ordered, len(results), '%.3f' % elapsed,
+                              '%.1f' % (len(results) / elapsed)])
+    print(format_table(table, stripe=False))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1, 2, 4, 8])
@@ -0,0 +1,84 @@
+# coding=utf-8
+"""
+Grammar compilation time as a function of rule count.
+Dictionaries are expanded into rules the same way GLRParser does it, so most rules are "NAME = 'word'".
+The second table compares a full compilation of the parser with recompiling it after adding and removing
+a structural rule and a dictionary word. A new word changes every state that can start a noun phrase,
+and these states hold most of the table.
+
+    python benchmarks/compile_benchmark.py [rules_count ...]
+"""
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from glr.grammar import Grammar, Rule
+from glr.lr import generate_state_graph, generate_action_goto_table
+from glr.parser import Parser
+from glr.utils import format_table
+
+STRUCTURE = [
+    ('S', ('NP', 'VP')),
+    ('S', ('S', 'PP')),
+    ('NP', ('adj', 'NP')),
+    ('NP', ('noun',)),
+    ('NP', ('PERSON',)),
+    ('NP', ('CITY',)),
+    ('NP', ('NP', 'PP')),
+    ('PP', ('prep', 'NP')),
+    ('PP', ('prep', 'CITY')),
+    ('VP', ('verb', 'NP')),
+    ('VP', ('verb',)),
+]
+
+
+def make_grammar(rules_count):
+    rules = [Rule(0, '@', ('S',), False, None, 1.0)]
+    for left_symbol, right_symbols in STRUCTURE:
+        rules.append(Rule(len(rules), left_symbol, right_symbols, False, None, 1.0))
+    dictionaries = ['PERSON', 'CITY']
+    while len(rules) < rules_count:
+        dictionary = dictionaries[len(rules) % len(dictionaries)]
+        rules.append(Rule(len(rules), dictionary, ('w%d' % len(rules),), False, None, 1.0))
+    return Grammar(rules)
+
+
+def measure(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+CHANGES = [
+    ('rule', Rule(0, 'VP', ('verb', 'PP'), False, None, 1.0)),
+    ('word', Rule(0, 'CITY', ('wnew',), False, None, 1.0)),
+]
+
+
+def main(sizes):
+    table = [['Rules', 'Grammar, s', 'States', 'LR(0), s', 'Table, s']]
+    for size in sizes:
+        grammar, grammar_time = measure(make_grammar, size)
+        states, states_time = measure(generate_state_graph, grammar)
+        _, table_time = measure(generate_action_goto_table, grammar)
+        table.append([size, '%.3f' % grammar_time, len(states), '%.3f' % states_time, '%.3f' % table_time])
+    print(format_table(table, stripe=False))
+
+    table = [['Rules', 'Lookahead', 'Full, s'] + ['%s %s, s' % (action, name)
+                                                 for name, rule in CHANGES for action in ('Add', 'Remove')]]
+    for size in sizes:
+        grammar = make_grammar(size)
+        for lookahead in ('slr', 'lalr'):
+            parser, full_time = measure(Parser, grammar, 0, None, lookahead)
+            row = [size, lookahead, '%.3f' % full_time]
+            for name, rule in CHANGES:
+                _, add_time = measure(parser.add_rules, [rule])
+                _, remove_time = measure(parser.remove_rules, [len(parser.grammar.rules) - 1])
+                row.extend(['%.3f' % add_time, '%.3f' % remove_time])
+            table.append(row)
+    print(format_table(table, stripe=False))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 2500, 5000, 10000, 20000])
@@ -0,0 +1,54 @@
+# coding=utf-8
+"""
+Time of glrengine recognition (GLRParser.parse) by sentence length. Matches may start at any token,
+so the time per token should stay flat as sentences grow.
+
+    python benchmarks/engine_benchmark.py [words ...]
+"""
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from glr.utils import format_table
+from glr_parser import GLRParser
+
+GRAMMAR = u'''
+S = adj<agr-gnc=1> CLOTHES
+S = CLOTHES adj<agr-gnc=-1>
+'''
+
+DICTIONARIES = {
+    u'CLOTHES': [u'куртка', u'пальто', u'шубы']
+}
+
+WORDS = u'на вешалке висят пять красивых курток и вонючая шуба а также пальто серое рядом с курткой новой'.split()
+
+REPEATS = 3
+
+
+def make_sentence(words):
+    return u' '.join(WORDS[i % len(WORDS)] for i in range(words))
+
+
+def measure(parser, sentence):
+    best = None
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        results = parser.parse(sentence)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return results, best
+
+
+def main(lengths):
+    parser = GLRParser(GRAMMAR, dictionaries=DICTIONARIES)
+    table = [['Words', 'Matches', 'Time, ms', 'Per word, ms']]
+    for words in lengths:
+        results, elapsed = measure(parser, make_sentence(words))
+        table.append([words, len(results), '%.1f' % (elapsed * 1000), '%.3f' % (elapsed * 1000 / words)])
+    print(format_table(table, stripe=False))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [100, 200, 400, 800, 1600, 3200])
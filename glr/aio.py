@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+
+from glr.budget import ParseResult
+from glr.parser import ParseSession
+
+# Tokens parsed between two yields to the event loop
+YIELD_EVERY = 64
+
+
+def _roots(session, reduce_by_tokens_params, yield_every):
+    """
+        Roots accepted by the session, with None after every yield_every tokens
+    """
+    for index, token in enumerate(reduce_by_tokens_params, 1):
+        for root in session.feed(token):
+            yield root
+        if session.stopped:
+            break
+        if index % yield_every == 0:
+            yield None
+    for root in session.close():
+        yield root
+
+
+def _trees(session, reduce_by_tokens_params, max_results, yield_every):
+    """
+        Syntax trees of roots accepted by the session, at most max_results of them, with None after every
+        yield_every tokens and every yield_every trees
+    """
+    yielded = 0
+    for root in _roots(session, reduce_by_tokens_params, yield_every):
+        if root is None:
+            yield None
+            continue
+        for syntax_tree in session.syntax_trees([root]):
+            if max_results is not None and yielded >= max_results:
+                return
+            yielded += 1
+            yield syntax_tree
+            if yielded % yield_every == 0:
+                yield None
+
+
+async def _session_trees(session, reduce_by_tokens_params, max_results, yield_every):
+    """
+        Syntax trees of roots accepted by the session, at most max_results of them. Control goes back to the event
+        loop every yield_every tokens and every yield_every trees, which is where a cancelled task stops parsing.
+    """
+    for syntax_tree in _trees(session, reduce_by_tokens_params, max_results, yield_every):
+        if syntax_tree is None:
+            await asyncio.sleep(0)
+        else:
+            yield syntax_tree
+
+
+def aparse_stream(parser, reduce_by_tokens_params, full_math=False, reduce_validator=None, stats=None,
+                  slot_validator=None, budget=None, policy='all', yield_every=YIELD_EVERY):
+    """
+        Async iterator of syntax trees as Parser.parse_stream() yields them, parsed in the event loop thread
+        in slices of yield_every tokens or trees
+    """
+    session = ParseSession(parser, full_math, reduce_validator, stats, slot_validator=slot_validator, budget=budget,
+                           policy=policy)
+    return _session_trees(session, reduce_by_tokens_params, None, yield_every)
+
+
+async def aparse(parser, reduce_by_tokens_params, full_math=False, reduce_validator=None, stats=None,
+                 slot_validator=None, budget=None, policy='all', max_results=None, yield_every=YIELD_EVERY,
+                 executor=None):
+    """
+        Parser.parse() as a coroutine. Without executor it is parsed in slices of yield_every tokens or trees
+        in the event loop thread. With executor it is parsed there and parsing stops when the task is cancelled,
+        so the executor thread is freed after the current token or tree.
+    """
+    session = ParseSession(parser, full_math, reduce_validator, stats, slot_validator=slot_validator, budget=budget,
+                           policy=policy)
+    if executor is not None:
+        cancelled = threading.Event()
+
+        def tokens():
+            for token in reduce_by_tokens_params:
+                if cancelled.is_set():
+                    return
+                yield token
+
+        def parse():
+            syntax_trees = []
+            for syntax_tree in _trees(session, tokens(), max_results, yield_every):
+                if cancelled.is_set():
+                    break
+                if syntax_tree is not None:
+                    syntax_trees.append(syntax_tree)
+            return ParseResult(syntax_trees, session.exceeded)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, parse)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    syntax_trees = _session_trees(session, reduce_by_tokens_params, max_results, yield_every)
+    return ParseResult([syntax_tree async for syntax_tree in syntax_trees], session.exceeded)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+from collections import namedtuple, defaultdict, OrderedDict
+
+from glr.lr import StateGraphBuilder, generate_starters, kernel
+from glr.parser import Parser, ParseStats
+from glr.utils import format_table, format_rule
+
+Conflict = namedtuple('Conflict', ['state', 'symbol', 'type', 'reduce_rules', 'shift_rules'])
+
+GssWidth = namedtuple('GssWidth', ['sentences', 'tokens', 'mean', 'max'])
+
+RuleCost = namedtuple('RuleCost', ['rule_index', 'reductions', 'conflicts', 'ambiguous_pairs'])
+
+
+class GrammarAnalyzer(object):
+    """
+    Predicts parse cost of a grammar from its compiled tables and, optionally, from a sample corpus
+    (sequences of tokens, as passed to Parser.parse)
+    """
+
+    def __init__(self, parser):
+        assert isinstance(parser, Parser)
+        self.parser = parser
+        self.grammar = parser.grammar
+        builder = parser.state_graph_builder or StateGraphBuilder(parser.grammar, parser.useful_rules)
+        self.states = builder.build()
+        self.starters = generate_starters(parser.grammar)
+
+        self.predecessors = defaultdict(set)
+        for state in self.states:
+            for state_indexes in state.follow_dict.values():
+                for state_index in state_indexes:
+                    self.predecessors[state_index].add(state.index)
+
+    def starts_with(self, symbol, lookahead):
+        return symbol == lookahead or lookahead in self.starters.get(symbol, ())
+
+    def consuming_rules(self, state_index, lookahead):
+        """
+            Rules of kernel items in a state which shift lookahead (directly or through a nonterminal after the dot)
+        """
+        result = set()
+        for item in kernel(self.states[state_index].itemset, self.grammar):
+            right_symbols = self.grammar[item.rule_index].right_symbols
+            if item.dot_position < len(right_symbols) and self.starts_with(right_symbols[item.dot_position], lookahead):
+                result.add(item.rule_index)
+        return result
+
+    def rules_after_reduce(self, state_index, rule_index, lookahead, visited=None):
+        """
+            Rules which would consume lookahead once the rule is reduced in the state, following chains of reduces
+        """
+        visited = set() if visited is None else visited
+        if (state_index, rule_index) in visited:
+            return set()
+        visited.add((state_index, rule_index))
+
+        rule = self.grammar[rule_index]
+        origins = {state_index}
+        for _ in rule.right_symbols:
+            origins = set(p for origin in origins for p in self.predecessors[origin])
+
+        result = set()
+        for origin in origins:
+            for goto_state in self.states[origin].follow_dict.get(rule.left_symbol, ()):
+                result |= self.consuming_rules(goto_state, lookahead)
+                for item in kernel(self.states[goto_state].itemset, self.grammar):
+                    if item.dot_position == len(self.grammar[item.rule_index].right_symbols):
+                        result |= self.rules_after_reduce(goto_state, item.rule_index, lookahead, visited)
+        return result
+
+    def conflicts(self):
+        """
+            Shift/reduce and reduce/reduce conflicts by state and terminal
+        """
+        result = []
+        for state_index, row in enumerate(self.parser.action_goto_table):
+            for symbol, actions in sorted(row.items()):
+                reduce_rules = tuple(action.rule_index for action in actions if action.type == 'R')
+                shifts = [action for action in actions if action.type == 'S']
+                if shifts and reduce_rules:
+                    shift_rules = tuple(sorted(self.consuming_rules(state_index, symbol)))
+                    result.append(Conflict(state_index, symbol, 'S/R', reduce_rules, shift_rules))
+                elif len(reduce_rules) > 1:
+                    result.append(Conflict(state_index, symbol, 'R/R', reduce_rules, ()))
+        return result
+
+    def ambiguous_pairs(self):
+        """
+            Pairs of rules competing for the same input, mapped to the terminals they compete for.
+            For shift/reduce conflicts the pair is the rule which consumes the terminal after the reduce
+            and the rule which shifts it, e.g. S = S PP with NP = NP PP.
+        """
+        result = OrderedDict()
+        for conflict in self.conflicts():
+            if conflict.type == 'S/R':
+                pairs = [(reduced, shifted)
+                         for reduce_rule in conflict.reduce_rules
+                         for reduced in self.rules_after_reduce(conflict.state, reduce_rule, conflict.symbol)
+                         for shifted in conflict.shift_rules]
+            else:
+                rules = conflict.reduce_rules
+                pairs = [(a, b) for i, a in enumerate(rules) for b in rules[i + 1:]]
+            for a, b in pairs:
+                if a != b:
+                    result.setdefault(tuple(sorted((a, b))), set()).add(conflict.symbol)
+        return result
+
+    def parse_corpus(self, corpus, full_math=False):
+        stats = ParseStats()
+        for tokens in corpus:
+            self.parser.parse(tokens, full_math, stats=stats)
+        return stats
+
+    @staticmethod
+    def gss_width(stats):
+        """
+            Active stack heads per token on the corpus
+        """
+        widths = stats.widths
+        return GssWidth(stats.sentences, len(widths), float(sum(widths)) / len(widths) if widths else 0.0,
+                        max(widths) if widths else 0)
+
+    def rule_costs(self, stats=None):
+        """
+            Rules ranked by reductions on the corpus, then by conflicts and ambiguous pairs they take part in
+        """
+        conflicts = defaultdict(int)
+        for conflict in self.conflicts():
+            for rule_index in set(conflict.reduce_rules + conflict.shift_rules):
+                conflicts[rule_index] += 1
+        ambiguous = defaultdict(int)
+        for pair in self.ambiguous_pairs():
+            for rule_index in pair:
+                ambiguous[rule_index] += 1
+        reductions = stats.reductions if stats is not None else {}
+
+        costs = [RuleCost(rule.index, reductions.get(rule.index, 0), conflicts[rule.index], ambiguous[rule.index])
+                 for rule in self.grammar.rules[1:]]
+        return sorted(costs, key=lambda cost: (-cost.reductions, -cost.conflicts, -cost.ambiguous_pairs, cost.rule_index))
+
+    def report(self, corpus=None, full_math=False):
+        stats = self.parse_corpus(corpus, full_math) if corpus is not None else None
+        lines = []
+
+        conflicts = self.conflicts()
+        lines.append('Conflicts: %d' % len(conflicts))
+        if conflicts:
+            table = [['State', 'Symbol', 'Type', 'Reduce', 'Shift']]
+            for conflict in conflicts:
+                table.append([conflict.state, conflict.symbol, conflict.type,
+                              ', '.join('#%d' % i for i in conflict.reduce_rules),
+                              ', '.join('#%d' % i for i in conflict.shift_rules)])
+            lines.append(format_table(table))
+
+        pairs = self.ambiguous_pairs()
+        lines.append('Ambiguous rule pairs: %d' % len(pairs))
+        for (a, b), symbols in pairs.items():
+            lines.append('  %s  <>  %s  on %s' % (
+                format_rule(self.grammar[a]), format_rule(self.grammar[b]), ', '.join(sorted(symbols))))
+
+        if stats is not None:
+            width = self.gss_width(stats)
+            lines.append('GSS width: mean %.2f, max %d over %d tokens in %d sentences' % (
+                width.mean, width.max, width.tokens, width.sentences))
+
+        table = [['Rank', 'Rule', 'Reductions', 'Conflicts', 'Ambiguous']]
+        for rank, cost in enumerate(self.rule_costs(stats), 1):
+            table.append([rank, format_rule(self.grammar[cost.rule_index]), cost.reductions, cost.conflicts,
+                          cost.ambiguous_pairs])
+        lines.append('Rule costs:')
+        lines.append(format_table(table))
+        return '\n'.join(lines)
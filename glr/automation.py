@@ -1,35 +1,203 @@
+from glr.aio import YIELD_EVERY, aparse, aparse_stream
+from glr.batch import parse_many
+from glr.cache import CompiledGrammarCache, grammar_key
 from glr.grammar_parser import GrammarParser
-from glr.labels import LABELS_CHECK
+from glr.labels import LABELS_CHECK, LABEL_COSTS, AGREEMENTS, compile_label, compile_labels
 from glr.lexer import MorphologyLexer
-from glr.parser import Parser
+from glr.parser import Parser, SlotValidator
 from glr.tokenizer import WordTokenizer
+from glr.utils import format_rule
 
 
 class Automation(object):
-    def __init__(self, grammar_text, dictionaries=None, start='S'):
+    def __init__(self, grammar_text, dictionaries=None, start='S', cache_dir=None, lookahead='slr', optimize=False,
+                 beam_size=None, beam_margin=None, all_readings=False):
+        # Arguments to build the same automation in worker processes, see parse_many()
+        self.init_args = dict(grammar_text=grammar_text, dictionaries=dictionaries, start=start, cache_dir=cache_dir,
+                              lookahead=lookahead, optimize=optimize, beam_size=beam_size, beam_margin=beam_margin,
+                              all_readings=all_readings)
         self.tokenizer = WordTokenizer()
-        self.lexer = MorphologyLexer(self.tokenizer, dictionaries)
+        # With all_readings each word is a lattice position with all its morphological readings
+        self.lexer = MorphologyLexer(self.tokenizer, dictionaries, all_readings)
         self.grammar_parser = GrammarParser()
 
-        self.grammar = self.grammar_parser.parse(grammar_text, start)
-        self.parser = Parser(self.grammar)
-
-    def parse(self, text, full_math=False):
-        def validator(syntax_tree):
-            rule = self.grammar[syntax_tree.rule_index]
-            tokens = [child.token for child in syntax_tree.children]
-            for i, token in enumerate(tokens):
-                params = rule.params[i]
-                for label_key, label_values in params.items():
-                    for label_value in label_values:
-                        if not token:
-                            return False
-                        ok = LABELS_CHECK[label_key](label_value, tokens, i)
-                        if not ok:
-                            #print 'Label failed: %s=%s for #%s in %s' % (label_key, label_value, i, tokens)
-                            return False
-            return True
+        def compile_grammar():
+            grammar = self.grammar_parser.parse(grammar_text, start)
+            parser = Parser(grammar, lookahead=lookahead, optimize=optimize)
+            return grammar, parser.action_goto_table, parser.table
 
+        self.cache_key = grammar_key('glr', grammar_text, dictionaries, start, lookahead, optimize)
+        self.grammar, action_goto_table, table = CompiledGrammarCache(cache_dir).get_or_compile(self.cache_key,
+                                                                                                compile_grammar)
+        self.parser = Parser(self.grammar, action_goto_table=action_goto_table, table=table, optimize=optimize,
+                             beam_size=beam_size, beam_margin=beam_margin)
+        for rule in self.grammar.rules:
+            self._check_agreements(rule)
+        self.rule_validators = [compile_labels(rule.params or ()) for rule in self.grammar.rules]
+        self.slot_validator = SlotValidator(self.parser, self.slot_checks)
+
+    @property
+    def parser(self):
+        return self._parser
+
+    @parser.setter
+    def parser(self, parser):
+        # Slot checks, streaming, spans and budgets need the parser object, generated modules have parse() only
+        if not isinstance(parser, Parser):
+            raise TypeError('Automation.parser must be a glr.parser.Parser, call parse() of a generated parser '
+                            'module on lexer.scan(text) instead')
+        self._parser = parser
+
+    def _check_agreements(self, rule):
+        """
+            Agreement labels compare tags of two tokens, a partner that is a nonterminal has none
+        """
+        for i, params in enumerate(rule.params or ()):
+            for label_key, label_values in (params or {}).items():
+                if label_key not in AGREEMENTS:
+                    continue
+                for label_value in label_values:
+                    try:
+                        other = i + int(label_value)
+                    except ValueError:
+                        continue
+                    if 0 <= other < len(rule.right_symbols) and rule.right_symbols[other] in self.grammar.nonterminals:
+                        raise Exception('Agreement label %s=%s of %s refers to nonterminal %s in rule %s' % (
+                            label_key, label_value, rule.right_symbols[i], rule.right_symbols[other],
+                            format_rule(rule)))
+
+    def validate(self, syntax_tree):
+        """
+            Check labels of rule symbols on tokens of the reduced children
+        """
+        return self.rule_validators[syntax_tree.rule_index]([child.token for child in syntax_tree.children])
+
+    def slot_checks(self, rule_index, position):
+        """
+            Checks of a rule symbol as soon as it is on the stack, see SlotValidator. Labels of one position
+            are checked on its own token, agreement labels when the right one of the pair is there.
+            Agreement with a position out of the rule is left to validate(), agreement with a nonterminal
+            is rejected when the automation is built.
+        """
+        rule = self.grammar[rule_index]
+        # Root rule has an empty string for params
+        rule_params = [params or {} for params in rule.params or ()]
+        if not rule_params:
+            return None, []
+
+        singles = []
+        pairs = []
+        for i, params in enumerate(rule_params):
+            for label_key, label_values in params.items():
+                for label_value in label_values:
+                    if label_key not in LABELS_CHECK:
+                        continue
+                    if label_key not in AGREEMENTS:
+                        if i == position:
+                            singles.append((LABEL_COSTS[label_key], compile_label(label_key, label_value, 0)))
+                        continue
+                    try:
+                        other = i + int(label_value)
+                    except ValueError:
+                        continue
+                    if other < 0 or other >= len(rule.right_symbols) or max(i, other) != position or other == i:
+                        continue
+                    # The pair is placed in a list of distance + 1 tokens, gaps are never read
+                    distance = abs(other - i)
+                    check = compile_label(label_key, label_value, 0 if i < other else distance)
+                    pairs.append((distance, self._agreement_check(check, distance)))
+
+        single = None
+        if rule_params[position]:
+            singles = tuple(check for cost, check in sorted(singles, key=lambda item: item[0]))
+
+            # Any label fails on a nonterminal
+            def single(child):
+                if child.token is None:
+                    return False
+                tokens = [child.token]
+                for check in singles:
+                    if not check(tokens):
+                        return False
+                return True
+        return single, pairs
+
+    @staticmethod
+    def _agreement_check(check, distance):
+        def agreement_check(child, partner):
+            if child.token is None or partner.token is None:
+                return False
+            tokens = [partner.token] + [None] * distance
+            tokens[-1] = child.token
+            return check(tokens)
+        return agreement_check
+
+    def parse(self, text, full_math=False, budget=None, policy='all', max_results=None):
+        """
+            Syntax trees of the text, policy selects accepted spans: all, longest-leftmost,
+            non-overlapping or highest-weight. With max_results the text is scanned and parsed only
+            until that many trees are accepted.
+        """
+        return self.parser.parse(self.lexer.scan(text), full_math, self.validate, slot_validator=self.slot_validator,
+                                 budget=budget, policy=policy, max_results=max_results)
+
+    async def aparse(self, text, full_math=False, budget=None, policy='all', max_results=None,
+                     yield_every=YIELD_EVERY, executor=None):
+        """
+            parse() for asyncio: parsed in slices of yield_every tokens or in the executor, stops when the task
+            is cancelled, see glr.aio.aparse()
+        """
+        return await aparse(self.parser, self.lexer.scan(text), full_math, self.validate, None, self.slot_validator,
+                            budget, policy, max_results, yield_every, executor)
+
+    def aparse_stream(self, text, full_math=False, budget=None, policy='all', yield_every=YIELD_EVERY):
+        """
+            Async iterator of syntax trees as parse_stream() yields them
+        """
+        return aparse_stream(self.parser, self.lexer.scan(text), full_math, self.validate, None, self.slot_validator,
+                             budget, policy, yield_every)
+
+    def parse_many(self, texts, workers=None, chunksize=1, ordered=True, full_math=False, budget=None, policy='all',
+                   max_results=None):
+        """
+            Generator of parse() results of the texts parsed by a pool of worker processes, in order of texts
+            or as (index, result) pairs in order of completion if not ordered, see glr.batch.parse_many()
+        """
+        parse_args = dict(full_math=full_math, budget=budget, policy=policy, max_results=max_results)
+        return parse_many(self, texts, workers, chunksize, ordered, parse_args)
+
+    def parse_forest(self, text, full_math=False, budget=None, policy='all'):
         tokens = list(self.lexer.scan(text))
 
-        return self.parser.parse(tokens, full_math, validator)
+        return self.parser.parse_forest(tokens, full_math, self.validate, slot_validator=self.slot_validator,
+                                        budget=budget, policy=policy)
+
+    def parse_stream(self, text, full_math=False, budget=None, policy='all'):
+        """
+            Syntax trees as soon as they are accepted, tokens are scanned lazily
+        """
+        return self.parser.parse_stream(self.lexer.scan(text), full_math, self.validate,
+                                        slot_validator=self.slot_validator, budget=budget, policy=policy)
+
+    def parse_spans(self, text, full_math=False, budget=None, policy='all'):
+        """
+            Accepted spans without trees, see Parser.parse_spans(). Trees of a span are built by expand()
+        """
+        return self.parser.parse_spans(self.lexer.scan(text), full_math, self.validate,
+                                       slot_validator=self.slot_validator, budget=budget, policy=policy)
+
+    def matches(self, text, full_math=False, budget=None):
+        """
+            Whether the grammar matches the text, it is scanned and parsed up to the first match only
+        """
+        return self.parser.recognize(self.lexer.scan(text), full_math, self.validate,
+                                     slot_validator=self.slot_validator, budget=budget)
+
+    def first_match(self, text, full_math=False, budget=None, policy='all'):
+        """
+            Syntax tree of the first match or None, the text is scanned and parsed up to it only
+        """
+        return next(self.parse_stream(text, full_math, budget, policy), None)
+
+    def expand(self, text, span):
+        return self.parser.expand(self.lexer.scan(text), span, self.validate, slot_validator=self.slot_validator)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import multiprocessing
+from functools import partial
+
+from glr.cache import CompiledGrammarCache
+
+# Parser of a worker process, built once when the worker starts
+_worker_parser = None
+
+
+def _init_worker(parser_class, init_args, cache_key, compiled):
+    global _worker_parser
+    # Compiled tables of the parent go to the registry of the worker, so the parser is built without compiling
+    CompiledGrammarCache().store(cache_key, compiled)
+    _worker_parser = parser_class(**init_args)
+
+
+def _parse(parse_args, item):
+    index, text = item
+    return index, _worker_parser.parse(text, **parse_args)
+
+
+def parse_many(parser, texts, workers=None, chunksize=1, ordered=True, parse_args=None):
+    """
+        Generator of parser.parse(text, **parse_args) results for each of the texts, parsed in a pool of workers
+        processes (cpu count by default), texts are sent in chunks of chunksize. Each worker builds its own
+        parser from parser.init_args and its compiled tables once. Results are yielded in order of texts,
+        or as (index, result) pairs in order of completion if not ordered. One worker parses in this process.
+    """
+    parse_args = parse_args or {}
+    if workers == 1:
+        for index, text in enumerate(texts):
+            result = parser.parse(text, **parse_args)
+            yield result if ordered else (index, result)
+        return
+
+    compiled = CompiledGrammarCache().load(parser.cache_key)
+    with multiprocessing.Pool(workers, _init_worker, (type(parser), parser.init_args, parser.cache_key, compiled)) \
+            as pool:
+        parse = partial(_parse, parse_args)
+        if ordered:
+            for index, result in pool.imap(parse, enumerate(texts), chunksize):
+                yield result
+        else:
+            for item in pool.imap_unordered(parse, enumerate(texts), chunksize):
+                yield item
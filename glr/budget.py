@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import time
+
+BUDGETS = ('nodes', 'reductions', 'trees', 'deadline')
+
+BUDGET_ACTIONS = ('truncate', 'beam', 'raise')
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, budget):
+        super(BudgetExceeded, self).__init__('Parse budget exceeded: %s' % budget)
+        self.budget = budget
+
+
+class ParseResult(list):
+    """
+    Results of a parse call, exceeded is the name of the budget that was hit or None
+    """
+
+    def __init__(self, results=(), exceeded=None):
+        super(ParseResult, self).__init__(results)
+        self.exceeded = exceeded
+
+
+class ParseBudget(object):
+    """
+    Limits of one parse call: max_nodes stack nodes, max_reductions reductions, max_trees accepted trees
+    and deadline seconds of wall-clock time. When a limit is exceeded, its action (actions by budget name,
+    action for the rest) is taken:
+        truncate - stop and return what was accepted so far, trees beyond max_trees are dropped
+        beam     - go on with beam pruning to beam_size heads and a fresh allowance of the limit,
+                   truncate when it is exceeded again. Parsers without a beam truncate at once.
+        raise    - raise BudgetExceeded
+    """
+
+    def __init__(self, max_nodes=None, max_reductions=None, max_trees=None, deadline=None, action='truncate',
+                 actions=None, beam_size=8):
+        self.limits = dict(nodes=max_nodes, reductions=max_reductions, trees=max_trees, deadline=deadline)
+        self.actions = dict((budget, action) for budget in BUDGETS)
+        self.actions.update(actions or {})
+        for budget, budget_action in self.actions.items():
+            assert budget in BUDGETS, 'Unknown budget %s' % budget
+            assert budget_action in BUDGET_ACTIONS, 'Unknown budget action %s' % budget_action
+        self.beam_size = beam_size
+
+    def start(self):
+        return BudgetTracker(self)
+
+
+class BudgetTracker(object):
+    """
+    State of a budget during one parse call
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.started = time.perf_counter()
+        # Usage already spent when a budget fell back to beam, the fresh allowance starts from it
+        self.bases = dict((name, 0) for name in BUDGETS)
+        self.beam = False
+        self.exceeded = None
+
+    def remaining(self, name, used):
+        limit = self.budget.limits[name]
+        return None if limit is None else limit - (used - self.bases[name])
+
+    def check(self, nodes=0, reductions=0, trees=0, beam_supported=True):
+        """
+            None to go on, 'truncate' to stop or 'beam' to switch to beam pruning. Raises BudgetExceeded
+            if the action of the exceeded budget is raise.
+        """
+        usage = dict(nodes=nodes, reductions=reductions, trees=trees, deadline=time.perf_counter() - self.started)
+        for name in BUDGETS:
+            remaining = self.remaining(name, usage[name])
+            if remaining is None or remaining >= 0:
+                continue
+            self.exceeded = self.exceeded or name
+            action = self.budget.actions[name]
+            if action == 'raise':
+                raise BudgetExceeded(name)
+            if action == 'beam' and beam_supported and name != 'trees' and not self.beam:
+                self.beam = True
+                self.bases[name] = usage[name]
+                return 'beam'
+            return 'truncate'
+        return None
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import mmap
+import os
+import pickle
+import tempfile
+
+# Bump whenever the layout of compiled tables changes, so stale artifacts are never loaded
+ENGINE_VERSION = 4
+
+MAGIC = b'GLRC'
+
+_registry = {}
+
+
+def grammar_key(engine, grammar_text, dictionaries=None, start='S', *extra):
+    """
+    Stable hash of everything a compiled grammar depends on
+    """
+    digest = hashlib.sha1()
+
+    def update(value):
+        digest.update(repr(value).encode('utf-8'))
+        digest.update(b'\0')
+
+    update((engine, ENGINE_VERSION))
+    update(grammar_text)
+    for name in sorted(dictionaries or {}):
+        update((name, tuple(dictionaries[name])))
+    update(start)
+    for value in extra:
+        update(value)
+    return digest.hexdigest()
+
+
+class CompiledGrammarCache(object):
+    """
+    Two-level store of compiled grammars: an in-process registry shared by all instances
+    and an optional directory with one versioned pickle artifact per key.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, '%s.glrc' % key)
+
+    def load(self, key):
+        if key in _registry:
+            return _registry[key]
+        if not self.cache_dir or not os.path.exists(self.path(key)):
+            return None
+
+        try:
+            payload = self._read(self.path(key))
+        except Exception:
+            # Truncated or corrupt artifact, get_or_compile() recompiles and overwrites it
+            return None
+        if payload is None:
+            return None
+
+        _registry[key] = payload
+        return payload
+
+    def _read(self, path):
+        """
+            Payload of the artifact unpickled straight from the mapped file, None if it is of another version
+        """
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[:len(MAGIC)] != MAGIC:
+                    return None
+                version = int.from_bytes(data[len(MAGIC):len(MAGIC) + 4], 'little')
+                if version != ENGINE_VERSION:
+                    return None
+                with memoryview(data) as view:
+                    return pickle.loads(view[len(MAGIC) + 4:])
+
+    def store(self, key, payload):
+        _registry[key] = payload
+        if not self.cache_dir:
+            return
+
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        # Write to a temporary file first so concurrent workers never see a partial artifact
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(ENGINE_VERSION.to_bytes(4, 'little'))
+            pickle.dump(payload, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path(key))
+
+    def get_or_compile(self, key, compile_func):
+        payload = self.load(key)
+        if payload is None:
+            payload = compile_func()
+            self.store(key, payload)
+        return payload
+
+
+def clear_registry():
+    _registry.clear()
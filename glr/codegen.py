@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+import importlib.util
+import os
+import tempfile
+from collections import defaultdict
+
+from glr.grammar import Grammar
+from glr.table import CompiledTable
+
+HEADER = u'''# -*- coding: utf-8 -*-
+# Generated by glr.codegen from a compiled table, do not edit.
+from collections import deque
+from itertools import islice
+
+from glr.budget import ParseResult
+from glr.forest import SymbolNode, ParseForest
+from glr.stack import GraphStructuredStack, SyntaxTree
+from glr.tokenizer import Token
+'''
+
+DRIVER = u'''
+
+def get_reduces(state, symbol_id):
+    return DEFAULT_REDUCES[state] or REDUCES[state].get(symbol_id, ())
+
+
+def reduce_level(gss, reduce_by_symbol, symbol_nodes, done, reduce_validator, slot_validator):
+    top = gss.top
+    level = gss.level
+    levels = gss.levels
+    worklist = deque((node, rule_index, -1)
+                     for state, node in top.items()
+                     for rule_index in get_reduces(state, reduce_by_symbol))
+    while worklist:
+        node, rule_index, first_edge = worklist.popleft()
+        edges = [first_edge] if first_edge >= 0 else gss.edges(node)
+        edges = [edge for edge in edges if (edge, rule_index) not in done]
+        if not edges:
+            continue
+        done.update((edge, rule_index) for edge in edges)
+
+        left_symbol, walk_paths = RULES[rule_index]
+        for target, goto_state, labels in walk_paths(gss, edges):
+            if reduce_validator is not None and \\
+                    not reduce_validator(SyntaxTree(left_symbol, None, rule_index, labels)):
+                continue
+
+            key = (left_symbol, levels[target])
+            symbol_node = symbol_nodes.get(key)
+            if symbol_node is None:
+                symbol_node = symbol_nodes[key] = SymbolNode(left_symbol, levels[target], level)
+            symbol_node.add_packed(rule_index, labels)
+            if slot_validator is not None and not slot_validator(gss, goto_state, target, symbol_node):
+                continue
+
+            head = top.get(goto_state)
+            if head is None:
+                head = gss.add_node(goto_state)
+                gss.add_edge(head, target, symbol_node)
+                worklist.extend((head, r, -1) for r in get_reduces(goto_state, reduce_by_symbol))
+            else:
+                edge = gss.add_edge(head, target, symbol_node)
+                if edge >= 0:
+                    worklist.extend((head, r, edge) for r in get_reduces(goto_state, reduce_by_symbol))
+
+
+def parse_forest(reduce_by_tokens_params, full_math=False, reduce_validator=None, slot_validator=None, budget=None,
+                 policy='all'):
+    assert budget is None, 'Parse budgets need glr.parser.Parser'
+    assert policy == 'all', 'Result policies need glr.parser.Parser'
+    roots = []
+
+    gss = GraphStructuredStack()
+    if full_math:
+        gss.add_node(0)
+
+    for level, token in enumerate(reduce_by_tokens_params):
+        alternatives = [token] if isinstance(token, Token) else token
+        symbol_ids = [SYMBOL_IDS.get(alternative.symbol, -1) for alternative in alternatives]
+        reduce_by_symbols = []
+        for alternative, symbol_id in zip(alternatives, symbol_ids):
+            if symbol_id >= 0 and symbol_id not in reduce_by_symbols and \\
+                    (full_math or alternative.symbol in TERMINALS):
+                reduce_by_symbols.append(symbol_id)
+
+        if not full_math:
+            if not START_IDS.isdisjoint(symbol_ids) and 0 not in gss.top:
+                gss.add_node(0)
+            if all(alternative.symbol != '$' for alternative in alternatives):
+                reduce_by_symbols.append(END_ID)
+
+        symbol_nodes = {}
+        done = set()
+        for reduce_by_symbol in reduce_by_symbols:
+            reduce_level(gss, reduce_by_symbol, symbol_nodes, done, reduce_validator, slot_validator)
+
+            if reduce_by_symbol == END_ID:
+                for state, node in gss.top.items():
+                    if state in ACCEPTS:
+                        roots.extend(gss.labels[edge] for edge in gss.edges(node) if gss.labels[edge] not in roots)
+
+        current = gss.push_level()
+        for alternative, symbol_id in zip(alternatives, symbol_ids):
+            if symbol_id < 0:
+                continue
+            terminal = SymbolNode(alternative.symbol, level, level + 1, alternative)
+            for state, node in current.items():
+                shift_state = SHIFTS[state].get(symbol_id, -1)
+                if shift_state >= 0:
+                    if slot_validator is not None and not slot_validator(gss, shift_state, node, terminal):
+                        continue
+                    head = gss.top.get(shift_state)
+                    if head is None:
+                        head = gss.add_node(shift_state)
+                    gss.add_edge(head, node, terminal)
+
+    return ParseForest(roots)
+
+
+def parse(reduce_by_tokens_params, full_math=False, reduce_validator=None, slot_validator=None, budget=None,
+          policy='all', max_results=None):
+    trees = parse_forest(reduce_by_tokens_params, full_math, reduce_validator, slot_validator, budget, policy).trees()
+    return ParseResult(islice(trees, max_results))
+'''
+
+
+def _format_dict(items):
+    return u'{%s}' % u', '.join(u'%r: %s' % (key, value) for key, value in items)
+
+
+def _reduce_function(rule, left_id):
+    """
+        Path walk of one rule unrolled to the rule length: yields (target node, goto state, labels)
+        for paths starting with the given edges of the top node
+    """
+    depth = len(rule.right_symbols)
+    lines = [u'def reduce_%d(gss, edges):' % rule.index,
+             u'    edge_prevs, labels, states = gss.edge_prevs, gss.labels, gss.states']
+    indent = u'    '
+    for i in range(depth, 0, -1):
+        node = u'base' if i == 1 else u'c%d' % (i - 1)
+        edges = u'edges' if i == depth else u'gss.edges(c%d)' % i
+        lines.append(u'%sfor e%d in %s:' % (indent, i, edges))
+        lines.append(u'%s    %s = edge_prevs[e%d]' % (indent, node, i))
+        indent += u'    '
+    labels = u', '.join(u'labels[e%d]' % i for i in range(1, depth + 1)) + (u',' if depth == 1 else u'')
+    lines += [
+        u'%sgoto_state = GOTO_%d.get(states[base], -1)' % (indent, left_id),
+        u'%sif goto_state >= 0:' % indent,
+        u'%s    yield base, goto_state, (%s)' % (indent, labels),
+    ]
+    return u'\n'.join(lines)
+
+
+def generate_parser_source(grammar, table):
+    """
+        Source of a module with parse() and parse_forest() of glr.parser.Parser specialized for the table:
+        per-state dispatch dicts keyed by symbol id, constant goto maps and one unrolled path walk per rule.
+        There are no logging, stats, budgets, result policies, streaming or spans, so the module is not
+        a replacement for a Parser object.
+    """
+    assert isinstance(grammar, Grammar)
+    assert isinstance(table, CompiledTable)
+
+    row_slots = defaultdict(list)
+    for slot, row in enumerate(table.check):
+        if row >= 0:
+            row_slots[row].append(slot)
+
+    shifts = []
+    reduces = []
+    gotos = defaultdict(list)
+    for state in range(table.states_count):
+        row = table.state_rows[state]
+        state_shifts = []
+        state_reduces = []
+        for slot in row_slots[row]:
+            symbol_id = slot - table.base[row]
+            if table.shifts[slot] >= 0:
+                state_shifts.append((symbol_id, table.shifts[slot]))
+            if table.gotos[slot] >= 0:
+                gotos[symbol_id].append((state, table.gotos[slot]))
+            if table.reduces[slot]:
+                state_reduces.append((symbol_id, table.reduces[slot]))
+        shifts.append(state_shifts)
+        reduces.append(state_reduces)
+
+    used_rules = sorted(set(rule_index for state_reduces in reduces for symbol_id, rules in state_reduces
+                            for rule_index in rules) | set(table.default_reduce_rules) - {-1})
+
+    parts = [HEADER]
+    parts.append(u'SYMBOL_IDS = %s' % _format_dict(sorted(table.symbol_ids.items(), key=lambda item: item[1])))
+    parts.append(u'TERMINALS = frozenset(%r)' % sorted(grammar.terminals))
+    parts.append(u'END_ID = %d' % table.end_id)
+    parts.append(u'START_IDS = frozenset(%r)' % [symbol_id for symbol_id in range(table.symbols_count)
+                                                 if table.get_shift(0, symbol_id) >= 0])
+    parts.append(u'ACCEPTS = frozenset(%r)' % [state for state in range(table.states_count) if table.accepts[state]])
+    parts.append(u'')
+    for symbol_id in sorted(set(table.rule_left_ids[rule_index] for rule_index in used_rules)):
+        parts.append(u'GOTO_%d = %s' % (symbol_id, _format_dict(sorted(gotos[symbol_id]))))
+    for rule_index in used_rules:
+        parts.append(u'\n')
+        parts.append(_reduce_function(grammar[rule_index], table.rule_left_ids[rule_index]))
+    parts.append(u'\n')
+    parts.append(u'RULES = {\n%s}' % u''.join(
+        u'    %d: (%r, reduce_%d),\n' % (rule_index, grammar[rule_index].left_symbol, rule_index)
+        for rule_index in used_rules))
+    parts.append(u'SHIFTS = (\n%s)' % u''.join(u'    %s,\n' % _format_dict(state_shifts) for state_shifts in shifts))
+    parts.append(u'REDUCES = (\n%s)' % u''.join(
+        u'    %s,\n' % _format_dict((symbol_id, repr(rules)) for symbol_id, rules in state_reduces)
+        for state_reduces in reduces))
+    parts.append(u'DEFAULT_REDUCES = (\n%s)' % u''.join(
+        u'    %r,\n' % (table.default_reduces[table.state_rows[state]],)
+        for state in range(table.states_count)))
+    parts.append(DRIVER)
+    return u'\n'.join(parts)
+
+
+def write_parser_module(path, grammar, table):
+    """
+        Write generated parser module to path, replacing the file atomically
+    """
+    source = generate_parser_source(grammar, table)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(source)
+    os.replace(tmp_path, path)
+
+
+def load_parser_module(path, name=None):
+    """
+        Import generated parser module from path. Its parse() takes the same tokens as Parser.parse(),
+        e.g. automation.lexer.scan(text)
+    """
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+from collections import namedtuple
+from itertools import product
+
+from glr.stack import SyntaxTree
+
+# Trees of a node are built once and shared by all its parents while there are at most that many
+CACHED_TREES = 10000
+
+
+class SymbolNode(object):
+    """
+    Node of a shared packed parse forest: all derivations of a symbol over tokens [start, end).
+    A terminal node keeps its token, a nonterminal node keeps one packed node (rule index, children)
+    per distinct derivation, children are symbol nodes too. Packed nodes are keys of an ordered dict,
+    so they are kept in order of appearance without a separate index. Score of the best derivation is
+    set by beam pruning.
+    """
+    __slots__ = ('symbol', 'start', 'end', 'token', 'packed', 'score')
+
+    def __init__(self, symbol, start, end, token=None):
+        self.symbol = symbol
+        self.start = start
+        self.end = end
+        self.token = token
+        self.packed = {}
+        self.score = None
+
+    def is_leaf(self):
+        return self.token is not None
+
+    def add_packed(self, rule_index, children):
+        key = (rule_index, children)
+        if key in self.packed:
+            return False
+        self.packed[key] = None
+        return True
+
+    def trees(self):
+        return ParseForest([self]).trees()
+
+    def __repr__(self):
+        return '%s[%d:%d]' % (self.symbol, self.start, self.end)
+
+
+class Span(namedtuple('Span', ['symbol', 'start', 'end', 'rule_indexes', 'char_start', 'char_end'])):
+    """
+    Accepted span without its trees: tokens [start, end), rules of its derivations at the top
+    and characters [char_start, char_end) of the text (-1 for tokens without positions)
+    """
+    __slots__ = ()
+
+
+class _CountFrame(object):
+    __slots__ = ('node', 'derivations', 'derivation', 'child', 'total', 'product', 'cut')
+
+    def __init__(self, node):
+        self.node = node
+        self.derivations = list(node.packed)
+        self.derivation = 0
+        self.child = 0
+        self.total = 0
+        self.product = 1
+        self.cut = False
+
+
+def _count(node, active, counts):
+    """
+        (trees count, whether a cycle was cut below the node). Counts of nodes without cycles are memoized,
+        other counts depend on the path to the node. Nodes are walked with an explicit stack.
+    """
+    if node.is_leaf():
+        return 1, False
+    if node in active:
+        return 0, True
+    if node in counts:
+        return counts[node], False
+    active.add(node)
+    stack = [_CountFrame(node)]
+    while True:
+        frame = stack[-1]
+        if frame.derivation < len(frame.derivations):
+            rule_index, children = frame.derivations[frame.derivation]
+            if frame.child == len(children):
+                frame.total += frame.product
+                frame.derivation += 1
+                frame.child = 0
+                frame.product = 1
+                continue
+            child = children[frame.child]
+            if child.is_leaf():
+                child_count, child_cut = 1, False
+            elif child in active:
+                child_count, child_cut = 0, True
+            elif child in counts:
+                child_count, child_cut = counts[child], False
+            else:
+                active.add(child)
+                stack.append(_CountFrame(child))
+                continue
+        else:
+            stack.pop()
+            active.discard(frame.node)
+            if not frame.cut:
+                counts[frame.node] = frame.total
+            if not stack:
+                return frame.total, frame.cut
+            child_count, child_cut = frame.total, frame.cut
+            frame = stack[-1]
+        frame.product *= child_count
+        frame.cut = frame.cut or child_cut
+        frame.child += 1
+
+
+# Requests of tree enumeration steps, see _enumerate()
+_NEXT, _OUT = 0, 1
+# Sent to a step when the step it asked for has no more values
+_DONE = object()
+
+
+def _enumerate(step):
+    """
+        Values of a tree enumeration step. A step is a generator yielding (_NEXT, other step) to get
+        the next value of the other step (_DONE when it is exhausted) and (_OUT, value) for its own values.
+        Steps are run on an explicit stack instead of nested generators, so the depth of a forest is not
+        bounded by the recursion limit.
+    """
+    stack = [step]
+    push, pop = stack.append, stack.pop
+    value = None
+    while stack:
+        try:
+            request, argument = stack[-1].send(value)
+        except StopIteration:
+            pop()
+            value = _DONE
+            continue
+        value = None
+        if request == _NEXT:
+            push(argument)
+        elif len(stack) == 1:
+            yield argument
+        else:
+            # The step stays suspended until its caller asks for the next value
+            pop()
+            value = argument
+
+
+def _values(values):
+    for value in values:
+        yield _OUT, value
+
+
+class ParseForest(object):
+    """
+    Result of Parser.parse_forest: root symbol nodes of accepted spans and the name of the parse budget
+    that was exceeded, if any. Trees are enumerated lazily, count_trees() counts them without building.
+    """
+
+    def __init__(self, roots, exceeded=None):
+        self.roots = roots
+        self.exceeded = exceeded
+
+    def __iter__(self):
+        return self.trees()
+
+    def __bool__(self):
+        return bool(self.roots)
+
+    __nonzero__ = __bool__
+
+    def trees(self):
+        """
+            Syntax trees of all derivations, built lazily. Cyclic derivations (A = B, B = A) are skipped.
+            Subtrees of nodes with few derivations are built once and shared by all trees.
+        """
+        counts = {}
+        for root in self.roots:
+            _count(root, set(), counts)
+        cache = {}
+        for root in self.roots:
+            for tree in _enumerate(self._trees(root, frozenset(), counts, cache)):
+                yield tree
+
+    def _trees(self, node, active, counts, cache):
+        """
+            Step of trees of the node, see _enumerate()
+        """
+        if node.is_leaf() or counts.get(node, CACHED_TREES + 1) <= CACHED_TREES:
+            return _values(self._cached_trees(node, cache))
+        if node in active:
+            return _values(())
+        return self._derivations(node, active | {node}, counts, cache)
+
+    def _cached_trees(self, node, cache):
+        """
+            Trees of a node with few derivations, built bottom-up once. Such nodes have no cycles below.
+        """
+        stack = [node]
+        while stack:
+            top = stack[-1]
+            if top in cache:
+                stack.pop()
+                continue
+            missing = [child for rule_index, children in top.packed for child in children if child not in cache]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            if top.is_leaf():
+                cache[top] = [SyntaxTree(top.symbol, top.token, None, ())]
+            else:
+                cache[top] = [SyntaxTree(top.symbol, None, rule_index, children_trees)
+                              for rule_index, children in top.packed
+                              for children_trees in product(*[cache[child] for child in children])]
+        return cache[node]
+
+    def _derivations(self, node, active, counts, cache):
+        for rule_index, children in node.packed:
+            if all(child.is_leaf() or counts.get(child, CACHED_TREES + 1) <= CACHED_TREES for child in children):
+                for children_trees in product(*[self._cached_trees(child, cache) for child in children]):
+                    yield _OUT, SyntaxTree(node.symbol, None, rule_index, children_trees)
+                continue
+            subtrees = self._product(children, active, counts, cache)
+            while True:
+                children_trees = yield _NEXT, subtrees
+                if children_trees is _DONE:
+                    break
+                yield _OUT, SyntaxTree(node.symbol, None, rule_index, children_trees)
+
+    def _product(self, nodes, active, counts, cache, prefix=()):
+        """
+            Step of tuples of trees of the nodes. Cached trees are read directly, the rest of the tuple is
+            delegated to with yield from as it is only as deep as the rule is long.
+        """
+        node = nodes[len(prefix)]
+        step = None
+        if node.is_leaf() or counts.get(node, CACHED_TREES + 1) <= CACHED_TREES:
+            trees = iter(self._cached_trees(node, cache))
+        else:
+            step = self._trees(node, active, counts, cache)
+        last = len(prefix) + 1 == len(nodes)
+        while True:
+            if step is None:
+                tree = next(trees, _DONE)
+            else:
+                tree = yield _NEXT, step
+            if tree is _DONE:
+                return
+            if last:
+                yield _OUT, prefix + (tree,)
+            else:
+                yield from self._product(nodes, active, counts, cache, prefix + (tree,))
+
+    def nodes(self):
+        """
+            All symbol nodes reachable from the roots
+        """
+        seen = set()
+        stack = list(self.roots)
+        result = []
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            result.append(node)
+            for rule_index, children in node.packed:
+                stack.extend(children)
+        return result
+
+    def count_trees(self):
+        counts = {}
+        return sum(_count(root, set(), counts)[0] for root in self.roots)
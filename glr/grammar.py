@@ -8,8 +8,8 @@ class Grammar(object):
     def __init__(self, rules):
         self._rules = rules
         self._rules_for_symbol = dict()
-        for rule in self._rules:
-            self._rules_for_symbol.setdefault(rule.left_symbol, []).append(self._rules.index(rule))
+        for rule_index, rule in enumerate(self._rules):
+            self._rules_for_symbol.setdefault(rule.left_symbol, []).append(rule_index)
 
         def all_symbols():
             for rule in self._rules:
@@ -22,6 +22,23 @@ class Grammar(object):
         self._nonterminals = set(rule.left_symbol for rule in self._rules)
         self._terminals = self._symbols - self._nonterminals
 
+    def add_rules(self, rules):
+        """
+            New grammar with rules appended, rule indexes are assigned by position
+        """
+        added = [rule._replace(index=len(self._rules) + i) for i, rule in enumerate(rules)]
+        return Grammar(self._rules + added)
+
+    def remove_rules(self, rule_indexes):
+        """
+            New grammar without rules with given indexes, remaining rules are renumbered keeping their order
+        """
+        rule_indexes = set(rule_indexes)
+        if 0 in rule_indexes:
+            raise Exception('Start rule can not be removed')
+        kept = [rule for rule in self._rules if rule.index not in rule_indexes]
+        return Grammar([rule._replace(index=i) for i, rule in enumerate(kept)])
+
     def __getitem__(self, item):
         return self._rules[item]
 
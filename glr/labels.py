@@ -1,61 +1,71 @@
 # -*- coding: utf-8 -*-
 import re
+from operator import attrgetter
 
+# Morphological tag of a token, glrengine passes its own getter for (names, value, offset, tag, text) tuples
+TAG = attrgetter('params')
+# Position of the text as written in a token
+TEXT = 4
 
-def gram_label(value, tokens, i):
-    return value in tokens[i].params
 
+def gram_label(value, tokens, i, tag=TAG):
+    return value in tag(tokens[i])
 
-def reg_l_all_label(value, tokens, i):
-    return tokens[i][4].islower()
 
+def gram_not_label(value, tokens, i, tag=TAG):
+    return value not in tag(tokens[i])
 
-def reg_h_first_label(value, tokens, i):
-    return tokens[i][4].istitle()
 
+def reg_l_all_label(value, tokens, i, tag=TAG):
+    return tokens[i][TEXT].islower()
 
-def reg_h_all_label(value, tokens, i):
-    return tokens[i][4].isupper()
 
+def reg_h_first_label(value, tokens, i, tag=TAG):
+    return tokens[i][TEXT].istitle()
 
-def regex_label(value, tokens, i):
-    return bool(False if i>len(tokens) or not tokens[i] else re.match(value, tokens[i][4]))
 
+def reg_h_all_label(value, tokens, i, tag=TAG):
+    return tokens[i][TEXT].isupper()
 
-def agr_gnc_label(value, tokens, i):
-    one = tokens[i].params
-    another = tokens[i + int(value)].params
+
+def regex_label(value, tokens, i, tag=TAG):
+    return bool(False if i > len(tokens) or not tokens[i] else re.match(value, tokens[i][TEXT]))
+
+
+def agr_gnc_label(value, tokens, i, tag=TAG):
+    one = tag(tokens[i])
+    another = tag(tokens[i + int(value)])
     return (one.case == another.case or not one.case or not another.case) \
            and (one.gender == another.gender or not one.gender or not another.gender) \
            and (one.number == another.number or not one.number or not another.number)
 
 
-def agr_nc_label(value, tokens, i):
-    one = tokens[i].params
-    another = tokens[i + int(value)].params
+def agr_nc_label(value, tokens, i, tag=TAG):
+    one = tag(tokens[i])
+    another = tag(tokens[i + int(value)])
 
     return (one.case == another.case or not one.case or not another.case) \
            and (one.number == another.number or not one.number or not another.number)
 
 
-def agr_c_label(value, tokens, i):
-    one = tokens[i].params
-    another = tokens[i + int(value)].params
+def agr_c_label(value, tokens, i, tag=TAG):
+    one = tag(tokens[i])
+    another = tag(tokens[i + int(value)])
 
     return one.case == another.case or not one.case or not another.case
 
 
-def agr_gn_label(value, tokens, i):
-    one = tokens[i].params
-    another = tokens[i + int(value)].params
+def agr_gn_label(value, tokens, i, tag=TAG):
+    one = tag(tokens[i])
+    another = tag(tokens[i + int(value)])
 
     return (one.gender == another.gender or not one.gender or not another.gender) \
            and (one.number == another.number or not one.number or not another.number)
 
 
-def agr_gc_label(value, tokens, i):
-    one = tokens[i].params
-    another = tokens[i + int(value)].params
+def agr_gc_label(value, tokens, i, tag=TAG):
+    one = tag(tokens[i])
+    another = tag(tokens[i + int(value)])
 
     return (one.gender == another.gender or not one.gender or not another.gender) \
            and (one.case == another.case or not one.case or not another.case)
@@ -63,6 +73,7 @@ def agr_gc_label(value, tokens, i):
 
 LABELS_CHECK = {
     "gram": gram_label,
+    "gram-not": gram_not_label,
     "reg-l-all": reg_l_all_label,
     "reg-h-first": reg_h_first_label,
     "reg-h-all": reg_h_all_label,
@@ -73,3 +84,126 @@ LABELS_CHECK = {
     "agr-gc": agr_gc_label,
     "regex": regex_label
 }
+
+# Tag attributes compared by agreement labels
+AGREEMENTS = {
+    "agr-gnc": ('case', 'gender', 'number'),
+    "agr-nc": ('case', 'number'),
+    "agr-c": ('case',),
+    "agr-gn": ('gender', 'number'),
+    "agr-gc": ('gender', 'case'),
+}
+
+# Compiled checks run cheapest first: a tag lookup, then string methods, tag comparisons and regexes
+LABEL_COSTS = {
+    "gram": 0,
+    "gram-not": 0,
+    "reg-l-all": 1,
+    "reg-h-first": 1,
+    "reg-h-all": 1,
+    "agr-gnc": 2,
+    "agr-nc": 2,
+    "agr-c": 2,
+    "agr-gn": 2,
+    "agr-gc": 2,
+    "regex": 3
+}
+
+
+def _agreement(attributes, i, j, tag):
+    def check(tokens):
+        one = tag(tokens[i])
+        another = tag(tokens[j])
+        for attribute in attributes:
+            one_value = getattr(one, attribute)
+            another_value = getattr(another, attribute)
+            if one_value != another_value and one_value and another_value:
+                return False
+        return True
+    return check
+
+
+def compile_label(label_key, label_value, i, tag=TAG):
+    """
+        Predicate on tokens with the same result as LABELS_CHECK[label_key](label_value, tokens, i, tag),
+        with the regex compiled and the agreement offset parsed once. Labels which fail to compile
+        fall back to LABELS_CHECK and fail the same way on the first check.
+    """
+    try:
+        if label_key == 'gram':
+            return lambda tokens: label_value in tag(tokens[i])
+        if label_key == 'gram-not':
+            return lambda tokens: label_value not in tag(tokens[i])
+        if label_key == 'reg-l-all':
+            return lambda tokens: tokens[i][TEXT].islower()
+        if label_key == 'reg-h-first':
+            return lambda tokens: tokens[i][TEXT].istitle()
+        if label_key == 'reg-h-all':
+            return lambda tokens: tokens[i][TEXT].isupper()
+        if label_key == 'regex':
+            match = re.compile(label_value).match
+            return lambda tokens: bool(False if i > len(tokens) or not tokens[i] else match(tokens[i][TEXT]))
+        if label_key in AGREEMENTS:
+            return _agreement(AGREEMENTS[label_key], i, i + int(label_value), tag)
+    except (TypeError, ValueError, re.error):
+        pass
+    return lambda tokens: LABELS_CHECK[label_key](label_value, tokens, i, tag)
+
+
+def _well_formed(label_key, label_value, i, length):
+    if label_key not in LABELS_CHECK:
+        return False
+    try:
+        if label_key == 'regex':
+            re.compile(label_value)
+        elif label_key in AGREEMENTS:
+            return -length <= i + int(label_value) < length
+    except (TypeError, ValueError, re.error):
+        return False
+    return True
+
+
+def compile_labels(labels, tag=TAG):
+    """
+        Validator of the tokens of a rule's symbols, labels are None or a dict of label -> values per symbol.
+        Same result as checking each label with LABELS_CHECK in order, and a symbol with labels
+        fails without a token. Checks run cheapest first unless some label is malformed (unknown, bad
+        value or agreement out of the rule), then they keep their order and raise where they used to.
+        Errors of reordered checks are replayed in order too.
+    """
+    checks = []
+    reorder = True
+    for i, params in enumerate(labels or ()):
+        for label_key, label_values in (params or {}).items():
+            for label_value in label_values:
+                reorder = reorder and _well_formed(label_key, label_value, i, len(labels))
+                checks.append((LABEL_COSTS.get(label_key, len(LABEL_COSTS)), len(checks), i,
+                               compile_label(label_key, label_value, i, tag)))
+
+    in_order = tuple((i, check) for cost, order, i, check in checks)
+
+    def validate_in_order(tokens):
+        for i, check in in_order:
+            if not tokens[i] or not check(tokens):
+                return False
+        return True
+
+    if not reorder:
+        return validate_in_order
+
+    labeled = tuple(sorted(set(i for cost, order, i, check in checks)))
+    checks = tuple(check for cost, order, i, check in sorted(checks, key=lambda item: item[:2]))
+
+    def validate(tokens):
+        try:
+            for i in labeled:
+                if not tokens[i]:
+                    return False
+            for check in checks:
+                if not check(tokens):
+                    return False
+            return True
+        except Exception:
+            # E.g. a token without a tag, the order decides between failing and raising
+            return validate_in_order(tokens)
+    return validate
@@ -27,9 +27,10 @@ class MorphologyLexer(object):
         "NUMB": "num"
     }
 
-    def __init__(self, tokenizer, dictionaries=None):
+    def __init__(self, tokenizer, dictionaries=None, all_readings=False):
         self.tokenizer = tokenizer
         self.morph = pymorphy2.MorphAnalyzer()
+        self.all_readings = all_readings
 
         self.dictionary = {}
         if dictionaries:
@@ -41,33 +42,41 @@ class MorphologyLexer(object):
                     self.dictionary[value] = category
 
     def scan(self, text):
+        """
+            Tokens of the text, a word gets symbol and tag of its most probable reading. With all_readings a word
+            gives a list of tokens, one per distinct reading, which Parser takes as a lattice position.
+        """
         for token in self.tokenizer.scan(text):
             assert isinstance(token, Token)
 
             if token.symbol == 'word':
                 morphed = self.morph.parse(token.value)
-                if morphed:
-                    value = morphed[0].normal_form
-                    if value in self.dictionary:
-                        token = Token(
-                            symbol=self.dictionary[value],
-                            value=value,
-                            start=token.start,
-                            end=token.end,
-                            input_term=token.input_term,
-                            params=morphed[0].tag
-                        )
-                    else:
-                        token = Token(
-                            symbol=self.TAG_MAPPER.get(morphed[0].tag.POS) or token.symbol,
-                            value=value,
-                            start=token.start,
-                            end=token.end,
-                            input_term=token.input_term,
-                            params=morphed[0].tag
-                        )
+                if morphed and self.all_readings:
+                    readings = []
+                    for parsed in morphed:
+                        reading = self.morphed_token(token, parsed)
+                        if reading not in readings:
+                            readings.append(reading)
+                    token = readings
+                elif morphed:
+                    token = self.morphed_token(token, morphed[0])
             yield token
 
+    def morphed_token(self, token, parsed):
+        value = parsed.normal_form
+        if value in self.dictionary:
+            symbol = self.dictionary[value]
+        else:
+            symbol = self.TAG_MAPPER.get(parsed.tag.POS) or token.symbol
+        return Token(
+            symbol=symbol,
+            value=value,
+            start=token.start,
+            end=token.end,
+            input_term=token.input_term,
+            params=parsed.tag
+        )
+
     def normal(self, word):
         morphed = self.morph.parse(word)
         if morphed:
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from collections import namedtuple, defaultdict, OrderedDict
+from collections import namedtuple, defaultdict, OrderedDict, deque
 
 from glr.grammar import Grammar
 from glr.utils import unique
@@ -70,110 +70,531 @@ def closure(itemset, grammar):
         items_to_process = nested_to_process
 
 
+class StateGraphBuilder(object):
+    """
+        Builds LR(0) states keyed by their kernels.
+        Closures of nonterminals and item sets of kernels are memoized, so they are shared by all states
+        and survive rule changes that do not affect them (see update).
+        If useful_rules is given, states are built only for rules with these indexes (see find_useful_rules).
+    """
+
+    def __init__(self, grammar, useful_rules=None):
+        assert isinstance(grammar, Grammar)
+        self.grammar = grammar
+        self.useful_rules = useful_rules
+        # symbol -> (closure items, all symbols met at the first position while expanding)
+        self._nonterminal_closures = {}
+        # kernel -> (item set, symbols right after the dot in kernel, transitions)
+        self._kernels = {}
+        # States of the last build and kernel of each of them
+        self.states = None
+        self._state_kernels = None
+        # kernel -> (symbols FIRST sets were taken of, LALR(1) lookahead items), see lalr_lookaheads
+        self._lalr_kernels = {}
+        self._starters = {}
+
+    def nonterminal_closure(self, symbol):
+        """
+            Items with dot at the beginning for all rules reachable from symbol through the first position
+        """
+        if symbol in self._nonterminal_closures:
+            return self._nonterminal_closures[symbol][0]
+
+        grammar = self.grammar
+        items = []
+        first_symbols = {symbol}
+        symbols_to_process = deque([symbol])
+        while symbols_to_process:
+            for rule_index in self.rules_for_symbol(symbols_to_process.popleft()):
+                items.append(Item(rule_index, 0))
+                first_symbol = grammar[rule_index].right_symbols[0]
+                if first_symbol not in first_symbols:
+                    first_symbols.add(first_symbol)
+                    if first_symbol in grammar.nonterminals:
+                        symbols_to_process.append(first_symbol)
+
+        items = frozenset(items)
+        self._nonterminal_closures[symbol] = (items, frozenset(first_symbols))
+        return items
+
+    def rules_for_symbol(self, symbol):
+        rule_indexes = self.grammar.rules_for_symbol(symbol)
+        if self.useful_rules is None:
+            return rule_indexes
+        return [rule_index for rule_index in rule_indexes if rule_index in self.useful_rules]
+
+    def closure(self, kernel):
+        grammar = self.grammar
+        itemset = set(kernel)
+        for item in kernel:
+            right_symbols = grammar[item.rule_index].right_symbols
+            if item.dot_position < len(right_symbols) and right_symbols[item.dot_position] in grammar.nonterminals:
+                itemset.update(self.nonterminal_closure(right_symbols[item.dot_position]))
+        return tuple(sorted(itemset))
+
+    def transitions(self, itemset):
+        """
+            Kernels of all states reachable from the item set, in order of first appearance of the lookahead
+        """
+        rules = self.grammar.rules
+        result = OrderedDict()
+        for rule_index, dot_position in itemset:
+            right_symbols = rules[rule_index].right_symbols
+            if dot_position < len(right_symbols):
+                result.setdefault(right_symbols[dot_position], []).append(Item(rule_index, dot_position + 1))
+        return [(lookahead, tuple(sorted(set(kernel))) if len(kernel) > 1 else tuple(kernel))
+                for lookahead, kernel in result.items()]
+
+    def expand(self, kernel):
+        if kernel not in self._kernels:
+            itemset = self.closure(kernel)
+            next_symbols = frozenset(lookahead for item, lookahead in iterate_lookaheads(kernel, self.grammar))
+            self._kernels[kernel] = (itemset, next_symbols, self.transitions(itemset))
+        return self._kernels[kernel]
+
+    def build(self):
+        """
+            LR(0) states, built on the first call. After update() they are the states of the changed grammar.
+        """
+        if self.states is None:
+            self._walk({})
+        return self.states
+
+    def _walk(self, old_indexes, old_states=None):
+        """
+            Build states reachable from the start kernel. A kernel keeps its index in old_indexes if it is still
+            less than the count of states, other kernels take the remaining indexes in order of discovery,
+            so without old indexes states are numbered breadth first. States of old_states that do not change
+            are reused.
+            Returns indexes of states that are new, moved or whose item set or transitions may have changed.
+        """
+        start = (Item(0, 0),)
+        kernels = [start]
+        # kernel -> (parent kernel, lookahead) of the first transition to it
+        parents = {start: (None, None)}
+        expanded = set()
+        for kernel in kernels:
+            if kernel not in self._kernels:
+                expanded.add(kernel)
+            for lookahead, child_kernel in self.expand(kernel)[2]:
+                if child_kernel not in parents:
+                    parents[child_kernel] = (kernel, lookahead)
+                    kernels.append(child_kernel)
+
+        indexes = {}
+        for kernel in kernels:
+            index = old_indexes.get(kernel)
+            if index is not None and index < len(kernels):
+                indexes[kernel] = index
+        free_indexes = iter(sorted(set(range(len(kernels))) - set(indexes.values())))
+        for kernel in kernels:
+            if kernel not in indexes:
+                indexes[kernel] = next(free_indexes)
+
+        states = [None] * len(kernels)
+        state_kernels = [None] * len(kernels)
+        changed = set()
+        for kernel in kernels:
+            index = indexes[kernel]
+            itemset, next_symbols, transitions = self._kernels[kernel]
+            parent_kernel, parent_lookahead = parents[kernel]
+            parent_index = indexes[parent_kernel] if parent_kernel is not None else None
+            state_kernels[index] = kernel
+            if kernel in expanded or old_indexes.get(kernel) != index or \
+                    any(old_indexes.get(child_kernel) != indexes[child_kernel] for _, child_kernel in transitions):
+                changed.add(index)
+            elif old_states is not None and old_states[index].parent_state_index == parent_index and \
+                    old_states[index].parent_lookahead == parent_lookahead:
+                states[index] = old_states[index]
+                continue
+            follow_dict = defaultdict(set)
+            for lookahead, child_kernel in transitions:
+                follow_dict[lookahead].add(indexes[child_kernel])
+            states[index] = State(index, itemset, follow_dict, parent_index, parent_lookahead)
+        self.states = states
+        self._state_kernels = state_kernels
+        return changed
+
+    def lalr_lookaheads(self, starters):
+        """
+            LALR(1) lookaheads of completed items of the built states, as generate_lalr_lookaheads() gives them.
+            Lookaheads generated in each kernel and propagation between kernels are kept and computed again only
+            for kernels that are new or whose closure or FIRST sets they depend on changed.
+        """
+        grammar = self.grammar
+        changed_starters = set(symbol for symbol in set(starters) | set(self._starters)
+                               if starters.get(symbol) != self._starters.get(symbol))
+        self._starters = dict((symbol, set(symbol_starters)) for symbol, symbol_starters in starters.items())
+
+        lalr_kernels = {}
+        for state in self.states:
+            kernel = self._state_kernels[state.index]
+            cached = self._lalr_kernels.get(kernel)
+            if cached is None or not cached[0].isdisjoint(changed_starters):
+                cached = _lalr_kernel(grammar, kernel, starters, self.useful_rules)
+            lalr_kernels[kernel] = cached
+        self._lalr_kernels = lalr_kernels
+        return _propagate_lalr_lookaheads(
+            grammar, self.states, [lalr_kernels[kernel][1] for kernel in self._state_kernels])
+
+    def update(self, grammar, rule_mapping, useful_rules=None):
+        """
+            Switch to a changed grammar keeping everything the change does not affect.
+            rule_mapping maps every rule index of the current grammar to its index in the new one
+            or to None if the rule was removed. Indexes of kept rules must preserve their order.
+            Built states are built again keeping indexes of kept kernels, returns indexes of the states that
+            may have changed (see _walk) or None if states were not built.
+        """
+        assert isinstance(grammar, Grammar)
+
+        old_grammar = self.grammar
+        kept_indexes = set(index for index in rule_mapping.values() if index is not None)
+        changed_symbols = set(old_grammar[index].left_symbol for index, new_index in rule_mapping.items() if new_index is None)
+        changed_symbols.update(rule.left_symbol for index, rule in enumerate(grammar.rules) if index not in kept_indexes)
+        if self.useful_rules is not None or useful_rules is not None:
+            # Rules that became useful or useless change closures just like added or removed ones
+            for index, new_index in rule_mapping.items():
+                was_useful = self.useful_rules is None or index in self.useful_rules
+                is_useful = new_index is not None and (useful_rules is None or new_index in useful_rules)
+                if new_index is not None and was_useful != is_useful:
+                    changed_symbols.add(old_grammar[index].left_symbol)
+
+        renumbered = any(new_index not in (None, index) for index, new_index in rule_mapping.items())
+        if not renumbered:
+            def remap_item(item):
+                return item
+
+            def remap(items):
+                return items
+        else:
+            def remap_item(item):
+                return Item(rule_mapping[item.rule_index], item.dot_position)
+
+            def remap(items):
+                return tuple(Item(rule_mapping[item.rule_index], item.dot_position) for item in items)
+
+        nonterminal_closures = {}
+        for symbol, (items, first_symbols) in self._nonterminal_closures.items():
+            if first_symbols.isdisjoint(changed_symbols):
+                nonterminal_closures[symbol] = (frozenset(remap(items)), first_symbols)
+        affected_symbols = changed_symbols | (set(self._nonterminal_closures) - set(nonterminal_closures))
+
+        removed = any(new_index is None for new_index in rule_mapping.values())
+        kernels = {}
+        lalr_kernels = {}
+        for kernel, expanded in self._kernels.items():
+            itemset, next_symbols, transitions = expanded
+            if not next_symbols.isdisjoint(affected_symbols):
+                continue
+            if removed and any(rule_mapping[item.rule_index] is None for item in kernel):
+                continue
+            if renumbered:
+                expanded = (
+                    remap(itemset),
+                    next_symbols,
+                    [(lookahead, remap(child_kernel)) for lookahead, child_kernel in transitions])
+            kernels[remap(kernel)] = expanded
+            if kernel in self._lalr_kernels:
+                used_starters, lookahead_items = self._lalr_kernels[kernel]
+                lalr_kernels[remap(kernel)] = (used_starters, [
+                    (remap_item(kernel_item), symbol, remap_item(item), lookaheads)
+                    for kernel_item, symbol, item, lookaheads in lookahead_items])
+
+        self.grammar = grammar
+        self.useful_rules = useful_rules
+        self._nonterminal_closures = nonterminal_closures
+        self._kernels = kernels
+        self._lalr_kernels = lalr_kernels
+        if self.states is None:
+            return None
+        if removed:
+            old_indexes = dict((remap(kernel), index) for index, kernel in enumerate(self._state_kernels)
+                               if all(rule_mapping[item.rule_index] is not None for item in kernel))
+        else:
+            old_indexes = dict(zip(self._state_kernels, range(len(self._state_kernels))))
+        # Item sets of states hold old rule indexes if rules were renumbered
+        return self._walk(old_indexes, None if renumbered else self.states)
+
+
 def generate_state_graph(grammar):
+    return StateGraphBuilder(grammar).build()
+
+
+def find_useful_rules(grammar):
+    """
+        Indexes of rules that can take part in a parse: all their symbols derive strings of terminals
+        and the rule is reachable from the start rule through other such rules
+    """
     assert isinstance(grammar, Grammar)
 
-    states = []
-    state_by_itemset = {}
+    productive_symbols = set(grammar.terminals)
+    productive_rules = set()
+    changed = True
+    while changed:
+        changed = False
+        for rule_index, rule in enumerate(grammar.rules):
+            if rule_index not in productive_rules and all(s in productive_symbols for s in rule.right_symbols):
+                productive_rules.add(rule_index)
+                productive_symbols.add(rule.left_symbol)
+                changed = True
+
+    useful_rules = set()
+    reached_symbols = {grammar[0].left_symbol}
+    symbols_to_process = [grammar[0].left_symbol]
+    while symbols_to_process:
+        for rule_index in grammar.rules_for_symbol(symbols_to_process.pop()):
+            if rule_index not in productive_rules:
+                continue
+            useful_rules.add(rule_index)
+            for symbol in grammar[rule_index].right_symbols:
+                if symbol in grammar.nonterminals and symbol not in reached_symbols:
+                    reached_symbols.add(symbol)
+                    symbols_to_process.append(symbol)
+    return useful_rules
+
 
-    first_itemset = closure([Item(0, 0)], grammar)
-    first_itemset = tuple(sorted(first_itemset))
-    stack = [(None, None, first_itemset)]
-    while stack:
-        parent_state_index, parent_lookahead, itemset = stack.pop(0)
+LOOKAHEAD_MODES = ('slr', 'lalr')
 
-        if itemset in state_by_itemset:
-            # State already exist, just add follow link
-            state = state_by_itemset[itemset]
-            states[parent_state_index].follow_dict[parent_lookahead].add(state.index)
-            continue
+TableStats = namedtuple('TableStats', ['states', 'shifts', 'gotos', 'reduces', 'accepts', 'conflicts'])
 
-        state = State(len(states), itemset, defaultdict(set), parent_state_index, parent_lookahead)
-        states.append(state)
-        state_by_itemset[state.itemset] = state
 
-        if parent_state_index is not None:
-            states[parent_state_index].follow_dict[parent_lookahead].add(state.index)
+def generate_starters(grammar, rules=None):
+    """
+        FIRST sets of all nonterminals (grammar has no epsilon rules, so only the first symbol matters)
+    """
+    assert isinstance(grammar, Grammar)
 
-        for lookahead, itemset in follow(state.itemset, grammar):
-            itemset = tuple(sorted(itemset))
-            stack.append((state.index, lookahead, itemset))
-    return states
+    starters = dict((s, set()) for s in grammar.nonterminals)
+    changed = True
+    while changed:
+        changed = False
+        for rule in grammar.rules if rules is None else rules:
+            first_symbol = rule.right_symbols[0]
+            new = starters[first_symbol] if first_symbol in starters else {first_symbol}
+            if not new <= starters[rule.left_symbol]:
+                starters[rule.left_symbol] |= new
+                changed = True
+    return starters
 
 
-def generate_followers(grammar):
+def generate_followers(grammar, starters=None, rules=None):
+    """
+        FOLLOW sets of all nonterminals, computed as a fixpoint over all rules (or only over given ones)
+    """
     assert isinstance(grammar, Grammar)
 
-    def get_starters(symbol):
-        result = []
-        for rule_index in grammar.rules_for_symbol(symbol):
-            rule = grammar[rule_index]
-            if rule.right_symbols[0] in grammar.nonterminals:
-                if rule.right_symbols[0] != symbol:
-                    result.extend(get_starters(rule.right_symbols[0]))
+    starters = starters or generate_starters(grammar, rules)
+    followers = dict((s, set()) for s in grammar.nonterminals)
+
+    # Symbol at the end of a rule inherits everything following the rule's left symbol
+    inherits = defaultdict(set)
+    for rule in grammar.rules if rules is None else rules:
+        for i, symbol in enumerate(rule.right_symbols):
+            if symbol not in followers:
+                continue
+            if i + 1 == len(rule.right_symbols):
+                if rule.left_symbol != symbol:
+                    inherits[rule.left_symbol].add(symbol)
             else:
-                result.append(rule.right_symbols[0])
-        return result
+                next_symbol = rule.right_symbols[i + 1]
+                followers[symbol] |= starters[next_symbol] if next_symbol in starters else {next_symbol}
+
+    changed = True
+    while changed:
+        changed = False
+        for symbol, heirs in inherits.items():
+            for heir in heirs:
+                if not followers[symbol] <= followers[heir]:
+                    followers[heir] |= followers[symbol]
+                    changed = True
+    return followers
 
-    starters = dict((s, set(get_starters(s))) for s in grammar.nonterminals)
 
-    def get_followers(symbol, seen_symbols=None):
-        seen_symbols = seen_symbols or set()
-        seen_symbols.add(symbol)
+def kernel(itemset, grammar):
+    return [item for item in itemset if item.dot_position > 0 or grammar[item.rule_index].left_symbol == '@']
 
-        result = []
-        for rule in grammar.rules:
-            if isinstance(rule, set):  # TODO: remove workaround
-                continue
 
-            if symbol not in rule.right_symbols:
+def generate_lalr_lookaheads(grammar, states, starters=None, useful_rules=None):
+    """
+        LALR(1) lookaheads of completed items, keyed by (state index, rule index).
+        Uses spontaneous generation and propagation of lookaheads between LR(0) kernels.
+    """
+    assert isinstance(grammar, Grammar)
+
+    starters = starters or generate_starters(grammar)
+    return _propagate_lalr_lookaheads(grammar, states, [
+        _lalr_kernel(grammar, kernel(state.itemset, grammar), starters, useful_rules)[1] for state in states])
+
+
+def _lalr_kernel(grammar, kernel_items, starters, useful_rules=None):
+    """
+        Lookaheads generated in a kernel: (symbols whose FIRST sets were used, [(kernel item, symbol, item,
+        lookaheads)]) where item is shifted by symbol and lookaheads come from the kernel item, '#' stands for
+        the lookaheads propagated from it
+    """
+    used_starters = set()
+
+    def first(symbol):
+        used_starters.add(symbol)
+        return starters[symbol] if symbol in starters else {symbol}
+
+    def lr1_closure(kernel_item):
+        lookaheads = OrderedDict([(kernel_item, {'#'})])
+        items_to_process = [kernel_item]
+        while items_to_process:
+            item = items_to_process.pop()
+            rule = grammar[item.rule_index]
+            if item.dot_position == len(rule.right_symbols):
+                continue
+            symbol = rule.right_symbols[item.dot_position]
+            if symbol not in grammar.nonterminals:
                 continue
 
-            index = rule.right_symbols.index(symbol)
-            if index + 1 == len(rule.right_symbols):
-                if rule.left_symbol != symbol and rule.left_symbol not in seen_symbols:
-                    result.extend(get_followers(rule.left_symbol, seen_symbols))
+            if item.dot_position + 1 < len(rule.right_symbols):
+                new = first(rule.right_symbols[item.dot_position + 1])
             else:
-                next = rule.right_symbols[index + 1]
-                if next in grammar.nonterminals:
-                    result.extend(starters[next])
+                new = lookaheads[item]
+            for rule_index in grammar.rules_for_symbol(symbol):
+                if useful_rules is not None and rule_index not in useful_rules:
+                    continue
+                nested_item = Item(rule_index, 0)
+                current = lookaheads.setdefault(nested_item, set())
+                if not new <= current:
+                    current |= new
+                    items_to_process.append(nested_item)
+        return lookaheads
+
+    lookahead_items = []
+    for kernel_item in kernel_items:
+        for item, item_lookaheads in lr1_closure(kernel_item).items():
+            right_symbols = grammar[item.rule_index].right_symbols
+            if item.dot_position < len(right_symbols):
+                lookahead_items.append((kernel_item, right_symbols[item.dot_position],
+                                        Item(item.rule_index, item.dot_position + 1), frozenset(item_lookaheads)))
+    return frozenset(used_starters), lookahead_items
+
+
+def _propagate_lalr_lookaheads(grammar, states, lookahead_items):
+    """
+        LALR(1) lookaheads of completed items from the lookahead items of each state (see _lalr_kernel)
+    """
+    lookaheads = defaultdict(set)
+    propagates = defaultdict(list)
+    for state, state_lookahead_items in zip(states, lookahead_items):
+        for kernel_item, symbol, item, item_lookaheads in state_lookahead_items:
+            target = (min(state.follow_dict[symbol]), item)
+            for lookahead in item_lookaheads:
+                if lookahead == '#':
+                    propagates[(state.index, kernel_item)].append(target)
                 else:
-                    result.append(next)
-        return result
+                    lookaheads[target].add(lookahead)
+
+    lookaheads[(0, Item(0, 0))].add('$')
+    keys_to_process = list(lookaheads.keys())
+    while keys_to_process:
+        key = keys_to_process.pop()
+        for target in propagates[key]:
+            if not lookaheads[key] <= lookaheads[target]:
+                lookaheads[target] |= lookaheads[key]
+                keys_to_process.append(target)
+
+    result = {}
+    for (state_index, item), item_lookaheads in lookaheads.items():
+        if item.dot_position == len(grammar[item.rule_index].right_symbols):
+            result[(state_index, item.rule_index)] = item_lookaheads
+    return result
 
-    followers = dict((s, set(get_followers(s))) for s in grammar.nonterminals)
-    return followers
+
+def generate_lookaheads(grammar, lookahead='slr', states=None, useful_rules=None, builder=None):
+    """
+        (FOLLOW sets of nonterminals, LALR(1) lookaheads of completed items or None) for the action table.
+        LALR(1) lookaheads of the states of a builder are computed by it, reusing what the last call computed.
+    """
+    assert isinstance(grammar, Grammar)
+    assert lookahead in LOOKAHEAD_MODES, 'Unknown lookahead mode %s' % lookahead
+
+    rules = None if useful_rules is None else [grammar[rule_index] for rule_index in sorted(useful_rules)]
+    starters = generate_starters(grammar, rules)
+    followers = generate_followers(grammar, starters, rules)
+    lalr_lookaheads = None
+    if lookahead == 'lalr':
+        if builder is not None:
+            lalr_lookaheads = builder.lalr_lookaheads(starters)
+        else:
+            lalr_lookaheads = generate_lalr_lookaheads(grammar, states, starters, useful_rules)
+    return followers, lalr_lookaheads
+
+
+def generate_actions(grammar, state, lookaheads):
+    """
+        Actions of a state by symbol, lookaheads as generate_lookaheads() gives them
+    """
+    followers, lalr_lookaheads = lookaheads
+    actions = defaultdict(list)
+
+    # Reduces
+    for item in state.itemset:
+        rule = grammar[item.rule_index]
+        if item.dot_position == len(rule.right_symbols):
+            if rule.left_symbol == '@':
+                actions['$'].append(Action('A', None, None))
+            elif lalr_lookaheads is not None:
+                for follower in sorted(lalr_lookaheads.get((state.index, item.rule_index), ())):
+                    actions[follower].append(Action('R', None, item.rule_index))
+            else:
+                for follower in followers[rule.left_symbol]:
+                    actions[follower].append(Action('R', None, item.rule_index))
+                actions['$'].append(Action('R', None, item.rule_index))
+
+    # Shifts & goto's
+    for lookahead_symbol, state_indexes in state.follow_dict.items():
+        for state_index in state_indexes:
+            if lookahead_symbol in followers:
+                actions[lookahead_symbol].append(Action('G', state_index, None))
+            else:
+                actions[lookahead_symbol].append(Action('S', state_index, None))
+    return actions
 
 
-def generate_action_goto_table(grammar):
+def generate_action_goto_table(grammar, lookahead='slr', states=None, useful_rules=None, lookaheads=None):
     assert isinstance(grammar, Grammar)
+    assert lookahead in LOOKAHEAD_MODES, 'Unknown lookahead mode %s' % lookahead
 
-    states = generate_state_graph(grammar)
-    followers = generate_followers(grammar)
+    states = states or StateGraphBuilder(grammar, useful_rules).build()
+    lookaheads = lookaheads or generate_lookaheads(grammar, lookahead, states, useful_rules)
+    return [generate_actions(grammar, state, lookaheads) for state in states]
 
-    result = []
-    for state in states:
-        actions = defaultdict(list)
 
-        # Reduces
-        for item in state.itemset:
-            rule = grammar[item.rule_index]
-            if item.dot_position == len(rule.right_symbols):
-                if rule.left_symbol == '@':
-                    actions['$'].append(Action('A', None, None))
-                else:
-                    for follower in followers[rule.left_symbol]:
-                        actions[follower].append(Action('R', None, item.rule_index))
-                    actions['$'].append(Action('R', None, item.rule_index))
-
-        # Shifts & goto's
-        for lookahead, state_indexes in state.follow_dict.items():
-            for state_index in state_indexes:
-                child_state = states[state_index]
-                if lookahead in followers:
-                    actions[lookahead].append(Action('G', child_state.index, None))
-                else:
-                    actions[lookahead].append(Action('S', child_state.index, None))
+def table_stats(action_goto_table):
+    """
+        Counts of table entries by action type and of conflicting (state, terminal) cells
+    """
+    counts = defaultdict(int)
+    conflicts = 0
+    for row in action_goto_table:
+        for symbol, actions in row.items():
+            for action in actions:
+                counts[action.type] += 1
+            if sum(1 for action in actions if action.type != 'G') > 1:
+                conflicts += 1
+    return TableStats(len(action_goto_table), counts['S'], counts['G'], counts['R'], counts['A'], conflicts)
+
+
+def lookahead_report(grammar):
+    """
+        Table statistics for every lookahead mode, to see what LALR(1) saves over the default tables
+    """
+    return OrderedDict((mode, table_stats(generate_action_goto_table(grammar, mode))) for mode in LOOKAHEAD_MODES)
 
-        result.append(actions)
-    return result
+
+def minimization_report(grammar, lookahead='slr'):
+    """
+        Sizes of the compiled table before and after minimization (see Parser's optimize option)
+    """
+    from glr.table import CompiledTable
+
+    useful_rules = find_useful_rules(grammar)
+    plain = CompiledTable(grammar, generate_action_goto_table(grammar, lookahead))
+    minimized = CompiledTable(
+        grammar, generate_action_goto_table(grammar, lookahead, useful_rules=useful_rules), default_reductions=True)
+    return OrderedDict([('plain', plain.stats()), ('minimized', minimized.stats())])
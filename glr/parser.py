@@ -1,83 +1,601 @@
+import math
+from collections import defaultdict, deque
+from itertools import islice
+
+from glr.budget import ParseResult
+
 from glr.grammar import Grammar
-from glr.lr import generate_action_goto_table
-from glr.stack import StackItem
+from glr.lr import generate_action_goto_table, generate_actions, generate_lookaheads, StateGraphBuilder, \
+    find_useful_rules
+from glr.forest import SymbolNode, ParseForest, Span
+from glr.policies import POLICIES
+from glr.stack import GraphStructuredStack, SyntaxTree
+from glr.table import CompiledTable
 from glr.tokenizer import Token
-from glr.utils import format_stack_item, format_syntax_tree, format_rule
+from glr.utils import format_gss_node, format_syntax_tree, format_rule
+
+
+class ParseStats(object):
+    """
+    Counters collected by Parser.parse when passed as stats, accumulated over all parsed sentences
+    """
+
+    def __init__(self):
+        self.sentences = 0
+        # Count of active stack heads after reductions and beam pruning, one value per token
+        self.widths = []
+        # Rule index -> count of reductions that passed validation
+        self.reductions = defaultdict(int)
 
 
 class Parser(object):
-    def __init__(self, grammar, log_level=0):
+    """
+    With optimize the table is minimized: rules that can never take part in a parse get no states,
+    states with identical actions share rows and single-reduce states reduce on any lookahead.
+    Parse results are the same.
+
+    With beam_size or beam_margin the stack is pruned after reductions on each token. Stack nodes are scored by
+    their best path, a path by the sum of log weights of rules in its best derivations, and only beam_size best
+    heads and heads within beam_margin of the best one are shifted. Start nodes are never pruned.
+    """
+
+    def __init__(self, grammar, log_level=0, action_goto_table=None, lookahead='slr', table=None, optimize=False,
+                 beam_size=None, beam_margin=None):
         assert isinstance(grammar, Grammar)
         self.grammar = grammar
-        self.action_goto_table = generate_action_goto_table(self.grammar)
+        self.lookahead = lookahead
+        self.optimize = optimize
+        self.useful_rules = find_useful_rules(grammar) if optimize else None
+        self.state_graph_builder = None
+        # FOLLOW sets and LALR(1) lookaheads the table was generated with, see generate_lookaheads
+        self.lookaheads = None
+        states = None
+        if action_goto_table is None:
+            self.state_graph_builder = StateGraphBuilder(self.grammar, self.useful_rules)
+            states = self.state_graph_builder.build()
+            self.lookaheads = generate_lookaheads(self.grammar, lookahead, states, self.useful_rules,
+                                                  self.state_graph_builder)
+            action_goto_table = generate_action_goto_table(self.grammar, lookahead, states, self.useful_rules,
+                                                           self.lookaheads)
+        self.action_goto_table = action_goto_table
+        self.table = table or CompiledTable(self.grammar, self.action_goto_table, default_reductions=optimize,
+                                            states=states)
+        self.start_symbol_ids = self._start_symbol_ids()
         self.log_level = log_level
+        self.beam_size = beam_size
+        self.beam_margin = beam_margin
+
+    def add_rules(self, rules):
+        """
+            Extend grammar and recompile only states affected by new rules
+        """
+        grammar = self.grammar.add_rules(rules)
+        self._recompile(grammar, dict((i, i) for i in range(len(self.grammar.rules))))
+
+    def remove_rules(self, rule_indexes):
+        """
+            Remove rules by index and recompile only states affected by them
+        """
+        rule_indexes = set(rule_indexes)
+        grammar = self.grammar.remove_rules(rule_indexes)
+        rule_mapping = {}
+        new_index = 0
+        for rule in self.grammar.rules:
+            if rule.index in rule_indexes:
+                rule_mapping[rule.index] = None
+            else:
+                rule_mapping[rule.index] = new_index
+                new_index += 1
+        self._recompile(grammar, rule_mapping)
+
+    def _recompile(self, grammar, rule_mapping):
+        useful_rules = find_useful_rules(grammar) if self.optimize else None
+        if self.state_graph_builder is None or self.lookaheads is None:
+            # Tables came precompiled, nothing to reuse
+            self.state_graph_builder = StateGraphBuilder(grammar, useful_rules)
+            states = self.state_graph_builder.build()
+            self.lookaheads = generate_lookaheads(grammar, self.lookahead, states, useful_rules,
+                                                  self.state_graph_builder)
+            self.action_goto_table = generate_action_goto_table(grammar, self.lookahead, states, useful_rules,
+                                                                self.lookaheads)
+            self.table = CompiledTable(grammar, self.action_goto_table, default_reductions=self.optimize,
+                                       states=states)
+        else:
+            changed_states = self.state_graph_builder.update(grammar, rule_mapping, useful_rules)
+            states = self.state_graph_builder.build()
+            lookaheads = generate_lookaheads(grammar, self.lookahead, states, useful_rules, self.state_graph_builder)
+            changed_states |= self._changed_reduces(grammar, states, rule_mapping, lookaheads)
+
+            renumbered = any(new_index not in (None, index) for index, new_index in rule_mapping.items())
+            action_goto_table = self.action_goto_table[:len(states)]
+            for state in states:
+                if state.index in changed_states or state.index >= len(action_goto_table):
+                    changed_states.add(state.index)
+                    actions = generate_actions(grammar, state, lookaheads)
+                    if state.index < len(action_goto_table):
+                        action_goto_table[state.index] = actions
+                    else:
+                        action_goto_table.append(actions)
+                elif renumbered:
+                    action_goto_table[state.index] = self._renumber_actions(
+                        action_goto_table[state.index], rule_mapping)
+            self.action_goto_table = action_goto_table
+            self.lookaheads = lookaheads
+            self.table.update(grammar, action_goto_table, changed_states, rule_mapping, states)
+        self.grammar = grammar
+        self.useful_rules = useful_rules
+        self.start_symbol_ids = self._start_symbol_ids()
+
+    def _changed_reduces(self, grammar, states, rule_mapping, lookaheads):
+        """
+            Indexes of states whose reduces change with the lookaheads although their item sets stay the same
+        """
+        (old_followers, old_lalr_lookaheads), (followers, lalr_lookaheads) = self.lookaheads, lookaheads
+        changed_states = set()
+        if lalr_lookaheads is not None:
+            old_keys = {}
+            for (state_index, rule_index), rule_lookaheads in old_lalr_lookaheads.items():
+                new_index = rule_mapping.get(rule_index)
+                if new_index is not None:
+                    old_keys[(state_index, new_index)] = rule_lookaheads
+            for key in set(old_keys) | set(lalr_lookaheads):
+                if old_keys.get(key) != lalr_lookaheads.get(key):
+                    changed_states.add(key[0])
+        else:
+            changed_symbols = set(symbol for symbol in set(old_followers) | set(followers)
+                                  if old_followers.get(symbol) != followers.get(symbol))
+            if changed_symbols:
+                for state in states:
+                    for item in state.itemset:
+                        rule = grammar[item.rule_index]
+                        if item.dot_position == len(rule.right_symbols) and rule.left_symbol in changed_symbols:
+                            changed_states.add(state.index)
+                            break
+        return set(state_index for state_index in changed_states if state_index < len(states))
+
+    @staticmethod
+    def _renumber_actions(actions, rule_mapping):
+        if not any(action.type == 'R' for symbol_actions in actions.values() for action in symbol_actions):
+            return actions
+        renumbered = defaultdict(list)
+        for symbol, symbol_actions in actions.items():
+            renumbered[symbol] = [action._replace(rule_index=rule_mapping[action.rule_index])
+                                  if action.type == 'R' else action for action in symbol_actions]
+        return renumbered
+
+    def _start_symbol_ids(self):
+        """
+            Terminals the root symbol can start with (FIRST set), i.e. shifted in the start state
+        """
+        return frozenset(symbol_id for symbol_id in range(self.table.symbols_count)
+                         if self.table.get_shift(0, symbol_id) >= 0)
 
     def log(self, level, pattern, *args):
         if level <= self.log_level:
             print(pattern % args)
 
-    def get_by_action_type(self, nodes, token, action_type):
-        for node in nodes:
-            node_actions = self.action_goto_table[node.state][token.symbol]
-            for action in node_actions:
-                if action.type == action_type:
-                    yield node, action
-
     # http://citeseerx.ist.psu.edu/viewdoc/download;jsessionid=DBFD4413CFAD29BC537FD98959E6B779?doi=10.1.1.39.1262&rep=rep1&type=pdf
-    def parse(self, reduce_by_tokens_params, full_math=False, reduce_validator=None):
-        accepted_nodes = []
-
-        current = [StackItem.start_new()] if full_math else []
-
-        for token_index, token in enumerate(reduce_by_tokens_params):
-            self.log(1, '\n\nTOKEN: %s', token)
-
-            reduce_by_tokens = [token]
-
-            if not full_math:
-                if token.symbol not in self.grammar.terminals:
-                    self.log(1, '- Not in grammar, interpret as end of stream')
-                    reduce_by_tokens = []
-
-                # If not full match on each token we assume rule may start or end
-                current.append(StackItem.start_new())
-                if token.symbol != '$':
-                    reduce_by_tokens.append(Token('$'))
-
-            for reduce_by_token in reduce_by_tokens:
-                process_reduce_nodes = current[:]
-                while process_reduce_nodes:
-                    new_reduce_nodes = []
-                    for node, action in self.get_by_action_type(process_reduce_nodes, reduce_by_token, 'R'):
-                        rule = self.grammar[action.rule_index]
-                        self.log(1, '- REDUCE: (%s) by (%s)', node, format_rule(rule))
-                        reduced_nodes = node.reduce(self.action_goto_table, rule, reduce_validator)
-                        new_reduce_nodes.extend(reduced_nodes)
-                        for n in reduced_nodes:
-                            self.log(1, '    %s', format_stack_item(n, '     '))
-                    process_reduce_nodes = new_reduce_nodes
-                    current.extend(new_reduce_nodes)
-
-                for node, action in self.get_by_action_type(current, reduce_by_token, 'A'):
-                    self.log(1, '- ACCEPT: (%s)', node)
-                    accepted_nodes.append(node)
-
-            shifted_nodes = []
-            for node, action in self.get_by_action_type(current, token, 'S'):
-                shifted_node = node.shift(token, action.state)
-                self.log(1, '- SHIFT: (%s) to (%s)  =>  %s', node, action.state, shifted_node)
-                shifted_nodes.append(shifted_node)
-
-            current = shifted_nodes
-
-            current = list(StackItem.merge(current))
-
-            self.log(1, '\n- STACK:')
-            for node in current:
-                self.log(1, '    %s', format_stack_item(node, '     '))
-
-        self.log(1, '\n--------------------\nACCEPTED:')
-        for node in accepted_nodes:
-            self.log(1, '%s', format_syntax_tree(node.syntax_tree))
-
-        return [node.syntax_tree for node in accepted_nodes]
+    def parse(self, reduce_by_tokens_params, full_math=False, reduce_validator=None, stats=None, slot_validator=None,
+              budget=None, policy='all', max_results=None):
+        """
+            Syntax trees of all distinct derivations as ParseResult, see parse_forest(). With max_results
+            tokens are consumed only until that many trees are accepted.
+        """
+        if max_results is not None:
+            session = ParseSession(self, full_math, reduce_validator, stats, slot_validator=slot_validator,
+                                   budget=budget, policy=policy)
+            syntax_trees = list(islice(self._session_trees(session, reduce_by_tokens_params), max_results))
+        else:
+            session = ParseSession(self, full_math, reduce_validator, stats, release=False,
+                                   slot_validator=slot_validator, budget=budget, policy=policy)
+            syntax_trees = list(session.syntax_trees(list(session.run(reduce_by_tokens_params))))
+        syntax_trees = ParseResult(syntax_trees, session.exceeded)
+
+        if self.log_level >= 1:
+            self.log(1, '\n--------------------\nACCEPTED:')
+            for syntax_tree in syntax_trees:
+                self.log(1, '%s', format_syntax_tree(syntax_tree))
+
+        return syntax_trees
+
+    def parse_forest(self, reduce_by_tokens_params, full_math=False, reduce_validator=None, stats=None,
+                     slot_validator=None, budget=None, policy='all'):
+        """
+            Parse on a merged graph-structured stack (one node per state and token) into a ParseForest with
+            one symbol node per (symbol, span), so time and memory stay polynomial however ambiguous the input is.
+            Each item of the input is a token or a list of alternative tokens of a lattice position, they are all
+            shifted at once. Validator gets SyntaxTree with symbol nodes as children. Optional SlotValidator drops
+            stack edges before the rules they are part of are reduced. With a ParseBudget the forest keeps the name of
+            the budget that was exceeded. Policy selects accepted spans, see glr.policies.POLICIES.
+        """
+        session = ParseSession(self, full_math, reduce_validator, stats, release=False, slot_validator=slot_validator,
+                               budget=budget, policy=policy)
+        roots = list(session.run(reduce_by_tokens_params))
+        return ParseForest(roots, session.exceeded)
+
+    def parse_stream(self, reduce_by_tokens_params, full_math=False, reduce_validator=None, stats=None,
+                     slot_validator=None, budget=None, policy='all'):
+        """
+            Generator of syntax trees yielded as soon as they are accepted (or selected by the policy),
+            tokens are consumed lazily and stack levels no parse can reach any more are released.
+            Stops when a budget truncates.
+        """
+        session = ParseSession(self, full_math, reduce_validator, stats, slot_validator=slot_validator, budget=budget,
+                               policy=policy)
+        for syntax_tree in self._session_trees(session, reduce_by_tokens_params):
+            yield syntax_tree
+
+    def _session_trees(self, session, reduce_by_tokens_params):
+        for root in session.run(reduce_by_tokens_params):
+            for syntax_tree in session.syntax_trees([root]):
+                yield syntax_tree
+
+    def parse_spans(self, reduce_by_tokens_params, full_math=False, reduce_validator=None, stats=None,
+                    slot_validator=None, budget=None, policy='all'):
+        """
+            Accepted spans as ParseResult of Span records. Symbol nodes keep rules of their derivations only
+            and stack levels are released, so neither trees nor the forest are built. Trees of a span
+            are built by expand(), a trees budget counts spans.
+        """
+        session = ParseSession(self, full_math, reduce_validator, stats, slot_validator=slot_validator, budget=budget,
+                               policy=policy, spans=True)
+        # (start, end) characters of each token
+        positions = []
+
+        def scanned():
+            for token in reduce_by_tokens_params:
+                first = token if isinstance(token, Token) else token[0]
+                positions.append((first.start, first.end))
+                yield token
+
+        roots = list(session.run(scanned()))
+        spans = [Span(root.symbol, root.start, root.end, tuple(rule_index for rule_index, children in root.packed),
+                      positions[root.start][0], positions[root.end - 1][1]) for root in roots]
+        if session.exceeded == 'trees':
+            spans = spans[:budget.limits['trees']]
+        return ParseResult(spans, session.exceeded)
+
+    def recognize(self, reduce_by_tokens_params, full_math=False, reduce_validator=None, stats=None,
+                  slot_validator=None, budget=None):
+        """
+            Whether any span is accepted, tokens are consumed up to the first accepted one
+        """
+        session = ParseSession(self, full_math, reduce_validator, stats, slot_validator=slot_validator, budget=budget,
+                               spans=True)
+        return next(session.run(reduce_by_tokens_params), None) is not None
+
+    def expand(self, reduce_by_tokens_params, span, reduce_validator=None, stats=None, slot_validator=None):
+        """
+            Syntax trees of a span from parse_spans() with the same tokens, its tokens are parsed again
+            as a full match
+        """
+        tokens = list(reduce_by_tokens_params)[span.start:span.end] + [Token('$')]
+        return [syntax_tree for syntax_tree in self.parse(tokens, True, reduce_validator, stats, slot_validator)
+                if syntax_tree.symbol == span.symbol]
+
+    def _prune(self, gss, rule_scores, beam_size, beam_margin):
+        """
+            Score top nodes and drop the ones out of the beam
+        """
+        scores = gss.scores
+        ranked = []
+        for state, node in gss.top.items():
+            edges = gss.edges(node)
+            if not edges:
+                continue
+            scores[node] = max(
+                scores[gss.edge_prevs[edge]] + self._label_score(gss.labels[edge], rule_scores)
+                for edge in edges)
+            ranked.append((-scores[node], node, state))
+
+        ranked.sort()
+        pruned = ranked[beam_size:] if beam_size is not None else []
+        if beam_margin is not None and ranked:
+            best = -ranked[0][0]
+            pruned.extend(item for item in ranked[:beam_size] if -item[0] < best - beam_margin)
+        for score, node, state in pruned:
+            self.log(1, '- PRUNE: (%s) with score %g', state, -score)
+            del gss.top[state]
+
+    def _label_score(self, symbol_node, rule_scores):
+        """
+            Score of the best derivation of the symbol node, memoized on nodes. Children are scored first
+            with an explicit stack, nodes in progress score -inf so cyclic derivations add nothing.
+        """
+        if symbol_node.is_leaf():
+            return 0.0
+        if symbol_node.score is None:
+            symbol_node.score = float('-inf')
+            stack = [symbol_node]
+            while stack:
+                node = stack[-1]
+                child = next((child for rule_index, children in node.packed for child in children
+                              if child.score is None and not child.is_leaf()), None)
+                if child is not None:
+                    child.score = float('-inf')
+                    stack.append(child)
+                    continue
+                stack.pop()
+                node.score = max(rule_scores[rule_index] +
+                                 sum(0.0 if child.is_leaf() else child.score for child in children)
+                                 for rule_index, children in node.packed)
+        return symbol_node.score
+
+    def _reduce(self, gss, reduce_by_symbol, symbol_nodes, done, reduce_validator, stats, slot_validator=None,
+                limit=None, pack=True):
+        """
+            Reduce the top level of the stack to a fixpoint by RNGLR worklist of (node, rule, edge or -1 for
+            all edges). A reduction landing on an existing node adds an edge to it, and only paths through
+            that edge are reduced again. Returns the count of reductions that passed validation, stops
+            as soon as it is over the limit. Without pack symbol nodes get rules without children.
+        """
+        count = 0
+        table = self.table
+        top = gss.top
+        level = gss.level
+        levels = gss.levels
+        states = gss.states
+        worklist = deque((node, rule_index, -1)
+                         for state, node in top.items()
+                         for rule_index in table.get_reduces(state, reduce_by_symbol))
+        while worklist:
+            node, rule_index, first_edge = worklist.popleft()
+            edges = [first_edge] if first_edge >= 0 else gss.edges(node)
+            edges = [edge for edge in edges if (edge, rule_index) not in done]
+            if not edges:
+                continue
+            done.update((edge, rule_index) for edge in edges)
+
+            rule = self.grammar[rule_index]
+            if self.log_level >= 1:
+                self.log(1, '- REDUCE: (%s) by (%s)', states[node], format_rule(rule))
+            left_id = table.rule_left_ids[rule_index]
+            for target, labels in gss.paths(edges, table.rule_lengths[rule_index]):
+                if limit is not None and count > limit:
+                    return count
+                goto_state = table.get_goto(states[target], left_id)
+                if goto_state < 0:
+                    continue
+                if reduce_validator is not None and \
+                        not reduce_validator(SyntaxTree(rule.left_symbol, None, rule_index, labels)):
+                    continue
+                count += 1
+                if stats is not None:
+                    stats.reductions[rule_index] += 1
+
+                key = (rule.left_symbol, levels[target])
+                symbol_node = symbol_nodes.get(key)
+                if symbol_node is None:
+                    symbol_node = symbol_nodes[key] = SymbolNode(rule.left_symbol, levels[target], level)
+                symbol_node.add_packed(rule_index, labels if pack else ())
+                if slot_validator is not None and not slot_validator(gss, goto_state, target, symbol_node):
+                    continue
+
+                head = top.get(goto_state)
+                if head is None:
+                    head = gss.add_node(goto_state)
+                    gss.add_edge(head, target, symbol_node)
+                    worklist.extend((head, r, -1) for r in table.get_reduces(goto_state, reduce_by_symbol))
+                else:
+                    edge = gss.add_edge(head, target, symbol_node)
+                    if edge >= 0:
+                        worklist.extend((head, r, edge) for r in table.get_reduces(goto_state, reduce_by_symbol))
+                self.log(1, '    %s <- %s', goto_state, symbol_node)
+        return count
+
+
+class SlotValidator(object):
+    """
+    Early checks of a stack edge: the symbol node it is labeled with fills the last filled slot of every kernel
+    item of the state the edge leads to, and the edge is kept if at least one of the items accepts it.
+    slot_checks(rule_index, position) gives (check(child) or None, [(distance, check(child, partner)), ...])
+    where partner is the symbol node distance slots to the left, found on the stack below the edge.
+    Checks must only reject what the reduce validator would reject, then parse results do not change.
+    """
+
+    def __init__(self, parser, slot_checks):
+        assert parser.table.kernels is not None, 'Kernel items are needed, the table was compiled without states'
+        self.states = []
+        for items in parser.table.kernels:
+            checks = [slot_checks(rule_index, dot - 1) for rule_index, dot in items]
+            # A state with an unchecked item accepts everything
+            if not checks or any(single is None and not pairs for single, pairs in checks):
+                checks = None
+            self.states.append(checks)
+
+    def __call__(self, gss, state, prev, label):
+        checks = self.states[state]
+        if checks is None:
+            return True
+        for single, pairs in checks:
+            if single is not None and not single(label):
+                continue
+            if all(any(check(label, labels[0]) for target, labels in gss.paths(gss.edges(prev), distance))
+                   for distance, check in pairs):
+                return True
+        return False
+
+
+class ParseSession(object):
+    """
+    Incremental parse: feed() takes tokens one by one and returns root symbol nodes accepted on each,
+    same as roots of Parser.parse_forest. With release, stack nodes below the lowest level still reachable
+    from the top are dropped, so memory is bounded by the longest pending parse rather than by the input.
+    A ParseBudget is checked after reductions on each token: once it truncates, stopped is set and
+    further tokens are ignored, exceeded is the name of the budget that was hit.
+    Result policy may hold roots back until they are final, close() returns the ones pending at the end.
+    With spans symbol nodes keep rules of their derivations without children, unless scores of derivations
+    are needed by beam pruning or the policy.
+    """
+
+    def __init__(self, parser, full_math=False, reduce_validator=None, stats=None, release=True, slot_validator=None,
+                 budget=None, policy='all', spans=False):
+        assert isinstance(parser, Parser)
+        assert policy in POLICIES, 'Unknown result policy %s' % policy
+        self.parser = parser
+        self.full_math = full_math
+        self.reduce_validator = reduce_validator
+        self.slot_validator = slot_validator
+        self.stats = stats
+        self.release = release
+        self.level = 0
+
+        self.gss = GraphStructuredStack()
+        if full_math:
+            self.gss.add_node(0)
+
+        self.beam_size = parser.beam_size
+        self.beam_margin = parser.beam_margin
+        self.rule_scores = None
+        if self.beam_size is not None or self.beam_margin is not None:
+            self.rule_scores = self._rule_scores()
+
+        self.policy = POLICIES[policy](parser)
+        self.spans = spans
+        self.pack = not spans or self.rule_scores is not None or policy == 'highest-weight' or \
+            (budget is not None and 'beam' in budget.actions.values())
+        self.tracker = budget.start() if budget is not None else None
+        self.reductions = 0
+        # Stack nodes dropped by release, so the nodes budget counts all nodes ever added
+        self.released = 0
+        self.trees = 0
+        # Trees enumerated by syntax_trees()
+        self.yielded = 0
+        self.stopped = False
+
+        if stats is not None:
+            stats.sentences += 1
+
+    @property
+    def exceeded(self):
+        return self.tracker.exceeded if self.tracker is not None else None
+
+    def close(self):
+        return self.policy.finish()
+
+    def run(self, reduce_by_tokens_params):
+        """
+            Generator of roots accepted on the tokens, which are consumed lazily until a budget truncates,
+            then of the roots pending at the end
+        """
+        for token in reduce_by_tokens_params:
+            for root in self.feed(token):
+                yield root
+            if self.stopped:
+                break
+        for root in self.close():
+            yield root
+
+    def syntax_trees(self, roots):
+        """
+            Syntax trees of the roots, built lazily. The deadline and trees budgets are checked before each tree:
+            once one truncates, stopped is set and enumeration ends.
+        """
+        tracker = self.tracker
+        if tracker is not None and tracker.budget.limits['trees'] is None and tracker.budget.limits['deadline'] is None:
+            tracker = None
+        for syntax_tree in ParseForest(roots).trees():
+            if tracker is not None and tracker.check(trees=self.yielded + 1, beam_supported=False) is not None:
+                self.parser.log(1, '- BUDGET: %s exceeded, trees truncated', tracker.exceeded)
+                self.stopped = True
+                return
+            self.yielded += 1
+            yield syntax_tree
+
+    def _rule_scores(self):
+        return [math.log(rule.weight) if rule.weight > 0 else float('-inf') for rule in self.parser.grammar.rules]
+
+    def feed(self, token):
+        """
+            Token or list of alternative tokens of a lattice position, all of them are shifted on the same level
+        """
+        if self.stopped:
+            return []
+        parser = self.parser
+        table = parser.table
+        gss = self.gss
+        level = self.level
+        roots = []
+        parser.log(1, '\n\nTOKEN: %s', token)
+
+        alternatives = [token] if isinstance(token, Token) else token
+        symbol_ids = [table.symbol_id(alternative.symbol) for alternative in alternatives]
+        reduce_by_symbols = []
+        for alternative, symbol_id in zip(alternatives, symbol_ids):
+            if symbol_id >= 0 and symbol_id not in reduce_by_symbols and \
+                    (self.full_math or alternative.symbol in parser.grammar.terminals):
+                reduce_by_symbols.append(symbol_id)
+
+        if not self.full_math:
+            if not reduce_by_symbols:
+                parser.log(1, '- Not in grammar, interpret as end of stream')
+
+            # If not full match we assume rule may end on each token and start on each token it can start with
+            if not parser.start_symbol_ids.isdisjoint(symbol_ids) and 0 not in gss.top:
+                gss.add_node(0)
+            if all(alternative.symbol != '$' for alternative in alternatives):
+                reduce_by_symbols.append(table.end_id)
+
+        # (symbol, start) -> symbol node ending at this level
+        symbol_nodes = {}
+        # (edge, rule index) of reductions done at this level
+        done = set()
+        tracker = self.tracker
+        for reduce_by_symbol in reduce_by_symbols:
+            limit = tracker.remaining('reductions', self.reductions) if tracker is not None else None
+            self.reductions += parser._reduce(gss, reduce_by_symbol, symbol_nodes, done, self.reduce_validator,
+                                              self.stats, self.slot_validator, limit, self.pack)
+
+            if reduce_by_symbol == table.end_id:
+                for state, node in gss.top.items():
+                    if table.accepts[state]:
+                        parser.log(1, '- ACCEPT: (%s)', state)
+                        roots.extend(gss.labels[edge] for edge in gss.edges(node) if gss.labels[edge] not in roots)
+        roots = self.policy.accept(gss, roots)
+
+        if tracker is not None:
+            if tracker.budget.limits['trees'] is not None:
+                self.trees += len(roots) if self.spans else ParseForest(roots).count_trees()
+            action = tracker.check(len(gss.states) + self.released, self.reductions, self.trees)
+            if action == 'truncate':
+                parser.log(1, '- BUDGET: %s exceeded, truncated', tracker.exceeded)
+                self.stopped = True
+                return roots + self.policy.finish()
+            if action == 'beam':
+                parser.log(1, '- BUDGET: %s exceeded, beam of %s', tracker.exceeded, tracker.budget.beam_size)
+                self.beam_size = min(self.beam_size or tracker.budget.beam_size, tracker.budget.beam_size)
+                self.rule_scores = self.rule_scores or self._rule_scores()
+
+        if self.rule_scores is not None:
+            parser._prune(gss, self.rule_scores, self.beam_size, self.beam_margin)
+
+        if self.stats is not None:
+            self.stats.widths.append(len(gss.top))
+
+        current = gss.push_level()
+        for alternative, symbol_id in zip(alternatives, symbol_ids):
+            if symbol_id < 0:
+                continue
+            terminal = SymbolNode(alternative.symbol, level, level + 1, alternative)
+            for state, node in current.items():
+                shift_state = table.get_shift(state, symbol_id)
+                if shift_state >= 0:
+                    if self.slot_validator is not None and not self.slot_validator(gss, shift_state, node, terminal):
+                        parser.log(1, '- DROP: (%s) to (%s)', state, shift_state)
+                        continue
+                    head = gss.top.get(shift_state)
+                    if head is None:
+                        head = gss.add_node(shift_state)
+                    gss.add_edge(head, node, terminal)
+                    parser.log(1, '- SHIFT: (%s) to (%s)', state, shift_state)
+        self.level += 1
+
+        if self.release:
+            self.released += gss.release()
+
+        if parser.log_level >= 1:
+            parser.log(1, '\n- STACK:')
+            for node in gss.top.values():
+                parser.log(1, '    %s', format_gss_node(gss, node, '     '))
+
+        return roots
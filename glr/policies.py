@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+import math
+
+from glr.forest import SymbolNode, ParseForest
+
+
+class ResultPolicy(object):
+    """
+    Selection of accepted spans applied while parsing. accept() gets root symbol nodes accepted on a token
+    after its reductions, drops top stack nodes which can no longer give a selected root and returns roots
+    that are final. finish() returns roots still pending at the end of input.
+    The base policy keeps all roots.
+    """
+
+    def __init__(self, parser):
+        self.parser = parser
+
+    def accept(self, gss, roots):
+        return roots
+
+    def finish(self):
+        return []
+
+    def _drop(self, gss, keep):
+        for state, node in list(gss.top.items()):
+            if not keep(node):
+                self.parser.log(1, '- POLICY DROP: (%s)', state)
+                del gss.top[state]
+
+
+class LongestLeftmost(ResultPolicy):
+    """
+    Leftmost span, the longest one of those starting there, then the same after its end.
+    Parses started inside the best span found so far overlap any span that wins, so they are dropped.
+    The span is final once no parse started at or before its start is alive.
+    """
+
+    def __init__(self, parser):
+        super(LongestLeftmost, self).__init__(parser)
+        self.end = 0
+        self.pending = []
+
+    def accept(self, gss, roots):
+        self.pending.extend(roots)
+        return self._select(gss)
+
+    def finish(self):
+        return self._select(None)
+
+    def _select(self, gss):
+        result = []
+        while True:
+            self.pending = [root for root in self.pending if root.start >= self.end]
+            if not self.pending:
+                return result
+            candidate = min(self.pending, key=lambda root: (root.start, -root.end))
+            if gss is not None:
+                bottoms, ceilings = gss.bottoms, gss.ceilings
+                self._drop(gss, lambda node: bottoms[node] <= candidate.start or ceilings[node] >= candidate.end)
+                if any(bottoms[node] <= candidate.start for node in gss.top.values()):
+                    return result
+            result.append(candidate)
+            self.end = candidate.end
+
+
+class NonOverlapping(ResultPolicy):
+    """
+    Greedy non-overlapping spans: a span is taken as soon as it is accepted (the longest one of those
+    ending on the same token), then only parses started after its end go on.
+    """
+
+    def __init__(self, parser):
+        super(NonOverlapping, self).__init__(parser)
+        self.end = 0
+
+    def accept(self, gss, roots):
+        roots = [root for root in roots if root.start >= self.end]
+        if not roots:
+            return []
+        root = min(roots, key=lambda root: root.start)
+        self.end = root.end
+        ceilings = gss.ceilings
+        self._drop(gss, lambda node: ceilings[node] >= root.end)
+        return [root]
+
+
+class HighestWeight(ResultPolicy):
+    """
+    Non-overlapping spans taken greedily by the score of their best derivation (sum of log rule weights),
+    longer and then leftmost ones first on ties, each with its best derivation only. Overlapping spans are
+    pending until no alive parse can overlap them.
+    """
+
+    def __init__(self, parser):
+        super(HighestWeight, self).__init__(parser)
+        self.rule_scores = [math.log(rule.weight) if rule.weight > 0 else float('-inf')
+                            for rule in parser.grammar.rules]
+        self.pending = []
+
+    def accept(self, gss, roots):
+        self.pending.extend(roots)
+        if not self.pending:
+            return []
+        end = max(root.end for root in self.pending)
+        if any(gss.bottoms[node] < end for node in gss.top.values()):
+            return []
+        return self.finish()
+
+    def finish(self):
+        scores = self._scores(self.pending)
+        selected = []
+        for root in sorted(self.pending, key=lambda root: (-scores[root], root.start - root.end, root.start)):
+            if all(root.end <= other.start or other.end <= root.start for other in selected):
+                selected.append(root)
+        self.pending = []
+        return [self._best(root, scores) for root in sorted(selected, key=lambda root: root.start)]
+
+    def _scores(self, roots):
+        """
+            Score of the best derivation of each node below the roots. Nodes are scored children first
+            in the order of a depth-first walk with an explicit stack, so without cycles one pass is enough.
+            Cyclic derivations are relaxed to a fixpoint.
+        """
+        order = []
+        # Node -> True while it is on the path of the walk, False when its children are done
+        on_path = {}
+        cyclic = False
+        for root in roots:
+            if root.is_leaf() or root in on_path:
+                continue
+            on_path[root] = True
+            stack = [(root, iter([child for rule_index, children in root.packed for child in children]))]
+            while stack:
+                node, children = stack[-1]
+                for child in children:
+                    if child.is_leaf():
+                        continue
+                    if child not in on_path:
+                        on_path[child] = True
+                        stack.append((child, iter([grandchild for rule_index, grandchildren in child.packed
+                                                   for grandchild in grandchildren])))
+                        break
+                    cyclic = cyclic or on_path[child]
+                else:
+                    stack.pop()
+                    on_path[node] = False
+                    order.append(node)
+
+        scores = dict((node, float('-inf')) for node in order)
+        for _ in range(len(order) if cyclic else 1):
+            changed = False
+            for node in order:
+                score = max(self.rule_scores[rule_index] + sum(scores.get(child, 0.0) for child in children)
+                            for rule_index, children in node.packed)
+                if score > scores[node]:
+                    scores[node] = score
+                    changed = True
+            if not changed:
+                break
+        return scores
+
+    def _best(self, root, scores):
+        """
+            Copy of the root with the best derivation only, cyclic derivations are skipped. Nodes are copied
+            with an explicit stack of (node, best derivation, copied children), active holds the nodes on it.
+        """
+        if root.is_leaf():
+            return root
+        active = set()
+
+        def enter(node):
+            best = None
+            for rule_index, children in node.packed:
+                if any(child in active or child is node for child in children):
+                    continue
+                score = self.rule_scores[rule_index] + sum(scores.get(child, 0.0) for child in children)
+                if best is None or score > best[0]:
+                    best = (score, rule_index, children)
+            active.add(node)
+            return node, best, []
+
+        stack = [enter(root)]
+        while True:
+            node, best, copies = stack[-1]
+            if best is not None and len(copies) < len(best[2]):
+                child = best[2][len(copies)]
+                if child.is_leaf():
+                    copies.append(child)
+                else:
+                    stack.append(enter(child))
+                continue
+            stack.pop()
+            active.discard(node)
+            copy = SymbolNode(node.symbol, node.start, node.end)
+            if best is not None:
+                copy.add_packed(best[1], tuple(copies))
+            if not stack:
+                return copy
+            stack[-1][2].append(copy)
+
+
+POLICIES = {
+    'all': ResultPolicy,
+    'longest-leftmost': LongestLeftmost,
+    'non-overlapping': NonOverlapping,
+    'highest-weight': HighestWeight,
+}
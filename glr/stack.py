@@ -1,5 +1,6 @@
+from array import array
+from bisect import bisect_left
 from collections import namedtuple
-from itertools import groupby
 
 
 class SyntaxTree(namedtuple('SyntaxTree', ['symbol', 'token', 'rule_index', 'children'])):
@@ -9,55 +10,134 @@ class SyntaxTree(namedtuple('SyntaxTree', ['symbol', 'token', 'rule_index', 'chi
         return not self.children
 
 
-class StackItem(namedtuple('StackItem', ['syntax_tree', 'state', 'prev'])):
-    __slots__ = ()
+class GraphStructuredStack(object):
+    """
+    Merged graph-structured stack stored as arrays. Node n has states[n], levels[n] (token index),
+    scores[n] (used by beam pruning), bottoms[n] (lowest level reachable from it) and ceilings[n] (highest
+    level of a node without edges reachable from it, so parses through n started between the two),
+    its edges form a linked list from first_edges[n]. Edge e goes to node edge_prevs[e], is labeled with forest symbol
+    node labels[e] and is followed by edge_nexts[e] (-1 ends lists).
+    Nodes of the top level are indexed by state in top, so there is at most one node per state and level.
+    There is one edge per (node, prev, label), labels of two edges between the same nodes differ only when
+    alternative tokens of a lattice position have the same symbol.
+    Nodes and edges are allocated level by level, so the ones below any level are prefixes of the arrays.
+    """
 
-    def pop(self, depth):
-        if depth == 0:
-            return [[self]]
-        if not self.prev:
-            return []
+    def __init__(self):
+        self.states = array('i')
+        self.levels = array('i')
+        self.scores = array('d')
+        self.bottoms = array('i')
+        self.ceilings = array('i')
+        self.first_edges = array('i')
+        self.edge_prevs = array('i')
+        self.edge_nexts = array('i')
+        self.labels = []
+        self.level = 0
+        self.top = {}
+        # (node, previous node) -> edge for edges of top nodes
+        self.top_edges = {}
+        # First edge of each level from base_level on
+        self.base_level = 0
+        self.level_edges = [0]
 
-        result = []
-        for prev in self.prev:
-            for path in prev.pop(depth - 1):
-                result.append(path + [self])
-        return result
+    def push_level(self):
+        """
+            Start next level, returns state -> node index of the previous top
+        """
+        previous = self.top
+        self.level += 1
+        self.top = {}
+        self.top_edges = {}
+        self.level_edges.append(len(self.edge_prevs))
+        return previous
+
+    def add_node(self, state):
+        node = len(self.states)
+        self.states.append(state)
+        self.levels.append(self.level)
+        self.scores.append(0.0)
+        self.bottoms.append(self.level)
+        self.ceilings.append(self.level)
+        self.first_edges.append(-1)
+        self.top[state] = node
+        return node
 
-    def shift(self, token, state):
-        syntax_tree = SyntaxTree(token.symbol, token, None, ())
-        return StackItem(syntax_tree, state, (self,))
+    def add_edge(self, node, prev, label):
+        """
+            Returns the new edge or -1 if node already has an edge to prev with the label
+        """
+        if (node, prev, label) in self.top_edges:
+            return -1
+        if self.first_edges[node] < 0 or self.ceilings[prev] > self.ceilings[node]:
+            self.ceilings[node] = self.ceilings[prev]
+        edge = len(self.edge_prevs)
+        self.edge_prevs.append(prev)
+        self.edge_nexts.append(self.first_edges[node])
+        self.labels.append(label)
+        self.first_edges[node] = edge
+        self.top_edges[node, prev, label] = edge
+        if self.bottoms[prev] < self.bottoms[node]:
+            self.bottoms[node] = self.bottoms[prev]
+        return edge
 
-    def reduce(self, action_goto_table, rule, reduce_validator=None):
+    def release(self):
+        """
+            Drop nodes below the lowest level reachable from the top and edges of them, ids of the rest are
+            shifted down. Runs only when at least half of the nodes go, so the cost is amortized.
+            Returns count of dropped nodes.
+        """
+        low = min(self.bottoms[node] for node in self.top.values()) if self.top else self.level
+        nodes = bisect_left(self.levels, low)
+        if not nodes or nodes * 2 < len(self.states):
+            return 0
+        edges = self.level_edges[low - self.base_level]
+
+        self.states = self.states[nodes:]
+        self.levels = self.levels[nodes:]
+        self.scores = self.scores[nodes:]
+        self.bottoms = self.bottoms[nodes:]
+        self.ceilings = self.ceilings[nodes:]
+        self.first_edges = array('i', (edge - edges if edge >= 0 else -1 for edge in self.first_edges[nodes:]))
+        self.edge_prevs = array('i', (prev - nodes for prev in self.edge_prevs[edges:]))
+        self.edge_nexts = array('i', (edge - edges if edge >= 0 else -1 for edge in self.edge_nexts[edges:]))
+        del self.labels[:edges]
+        self.top = dict((state, node - nodes) for state, node in self.top.items())
+        self.top_edges = dict(((node - nodes, prev - nodes, label), edge - edges)
+                              for (node, prev, label), edge in self.top_edges.items())
+        self.level_edges = [edge - edges for edge in self.level_edges[low - self.base_level:]]
+        self.base_level = low
+        return nodes
+
+    def edges(self, node):
+        """
+            Edges of node in order they were added
+        """
         result = []
-        depth = len(rule.right_symbols)
-        for path in self.pop(depth):
-            goto_actions = action_goto_table[path[0].state][rule.left_symbol]
-            # TODO: probably assert that only 1 goto action and it is 'G'
-            for goto_action in goto_actions:
-                if goto_action.type == 'G':
-                    syntax_tree = SyntaxTree(rule.left_symbol, None, rule.index, tuple(stack_item.syntax_tree for stack_item in path[1:]))
-                    if reduce_validator is None or reduce_validator(syntax_tree):
-                        new_head = StackItem(syntax_tree, goto_action.state, (path[0],))
-                        result.append(new_head)
+        edge = self.first_edges[node]
+        while edge >= 0:
+            result.append(edge)
+            edge = self.edge_nexts[edge]
+        result.reverse()
         return result
 
-    @classmethod
-    def merge(cls, stack_items):
-        for key, group in groupby(sorted(stack_items), lambda si: (si.syntax_tree, si.state)):
-            group = [g for g in group]
-            if len(group) > 1:
-                all_prevs = tuple(p for stack_item in group for p in stack_item.prev)
-                yield StackItem(group[0].syntax_tree, group[0].state, all_prevs)
+    def paths(self, edges, depth):
+        """
+            (node depth edges down, labels along the path left to right) for paths starting with the edges.
+            Walks depth first filling one label buffer, so paths share the work on their common part.
+        """
+        edge_prevs, edge_nexts, first_edges = self.edge_prevs, self.edge_nexts, self.first_edges
+        labels = [None] * depth
+        stack = [(edge, depth - 1) for edge in reversed(edges)]
+        while stack:
+            edge, i = stack.pop()
+            labels[i] = self.labels[edge]
+            prev = edge_prevs[edge]
+            if i == 0:
+                yield prev, tuple(labels)
             else:
-                yield group[0]
-
-    @classmethod
-    def start_new(cls):
-        return StackItem(None, 0, None)
-
-    def __repr__(self):
-        if self.prev:
-            return '%s.%s' % (self.syntax_tree.symbol, self.state)
-        else:
-            return '0'
+                # Pushed newest first, so popped in order edges were added
+                edge = first_edges[prev]
+                while edge >= 0:
+                    stack.append((edge, i - 1))
+                    edge = edge_nexts[edge]
@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+from array import array
+from collections import Counter, namedtuple
+
+from glr.grammar import Grammar
+
+EMPTY = ()
+
+
+CompiledTableStats = namedtuple('CompiledTableStats', ['states', 'rows', 'entries', 'slots', 'default_reductions'])
+
+
+class CompiledTable(object):
+    """
+    Action/goto table with symbols interned to small ints and one flat buffer per action type.
+    States with identical actions share one row, state s uses row r = state_rows[s].
+    Rows are packed into the buffers by row displacement: cell of row r and symbol id y is slot
+    i = base[r] + y, and it belongs to the row only if check[i] == r. Then
+        shifts[i]  - target state of a shift or -1
+        gotos[i]   - target state of a goto or -1
+        reduces[i] - tuple of rule indexes (shared empty tuple when there is nothing to reduce)
+    and accepts[s] is 1 if state accepts on end of stream.
+    With default_reductions, a state whose only action on terminals is a reduce by one rule reduces
+    by it on any lookahead: default_reduces[r] holds the rule and the row keeps only its gotos.
+    Given LR states, kernels[s] holds (rule index, dot position) of kernel items of state s.
+    """
+
+    def __init__(self, grammar, action_goto_table, default_reductions=False, states=None):
+        assert isinstance(grammar, Grammar)
+
+        self.symbols = tuple(sorted(grammar.symbols))
+        self.symbol_ids = dict((symbol, i) for i, symbol in enumerate(self.symbols))
+        self.symbols_count = len(self.symbols)
+        self.states_count = len(action_goto_table)
+        self.end_id = self.symbol_ids['$']
+        self.default_reductions = default_reductions
+        self.state_rows = array('i', [0]) * self.states_count
+        self.accepts = array('b', [0]) * self.states_count
+
+        # symbol id -> (shift, goto, reduce rules) for every distinct row
+        rows = []
+        row_ids = {}
+        default_rules = []
+        for state, row in enumerate(action_goto_table):
+            self.accepts[state], default_rule, cells = self._cells(state, row)
+            key = (default_rule, tuple(sorted(cells.items())))
+            if key not in row_ids:
+                row_ids[key] = len(rows)
+                rows.append(cells)
+                default_rules.append(default_rule)
+            self.state_rows[state] = row_ids[key]
+
+        self.base = self._pack([sorted(cells) for cells in rows])
+
+        slots_count = (max(self.base) if self.base else 0) + self.symbols_count
+        self.check = array('i', [-1]) * slots_count
+        self.shifts = array('i', [-1]) * slots_count
+        self.gotos = array('i', [-1]) * slots_count
+        reduce_rules = [EMPTY] * slots_count
+        for row_index, cells in enumerate(rows):
+            for symbol_id, (shift, goto, rules) in cells.items():
+                slot = self.base[row_index] + symbol_id
+                self.check[slot] = row_index
+                self.shifts[slot] = shift
+                self.gotos[slot] = goto
+                reduce_rules[slot] = rules
+
+        self.default_reduce_rules = array('i', default_rules)
+        self._init_reduces(reduce_rules)
+        # Row contents -> row and back, and a bit mask of taken slots, kept for update()
+        self._row_ids = row_ids
+        self._row_keys = sorted(row_ids, key=row_ids.get)
+        self._occupied = None
+
+        self.rule_left_ids = array('i', (self.symbol_ids[rule.left_symbol] for rule in grammar.rules))
+        self.rule_lengths = array('i', (len(rule.right_symbols) for rule in grammar.rules))
+        self.kernels = None
+        if states is not None:
+            self.kernels = tuple(self._kernel(state) for state in states)
+
+    def update(self, grammar, action_goto_table, changed_states, rule_mapping=None, states=None):
+        """
+            Follow a change of the grammar in place, without packing the table again. Rows of changed_states
+            (all states that are new or whose actions changed) are built again from action_goto_table, other
+            states keep their rows, only rule indexes are mapped by rule_mapping (old index -> new one or None)
+            if rules were renumbered. A changed row is shared with an identical one or takes the first free slots
+            that fit, rows no state uses any more are freed. New symbols get new ids, ids of removed ones
+            are not reused.
+        """
+        assert isinstance(grammar, Grammar)
+
+        symbols = list(self.symbols)
+        for symbol in sorted(grammar.symbols - set(self.symbol_ids)):
+            self.symbol_ids[symbol] = len(symbols)
+            symbols.append(symbol)
+        for symbol in set(self.symbol_ids) - grammar.symbols:
+            symbols[self.symbol_ids.pop(symbol)] = None
+        self.symbols = tuple(symbols)
+        self.symbols_count = len(symbols)
+
+        if self._row_keys is None:
+            self._index_rows()
+        renumbered = rule_mapping is not None and any(new_index not in (None, index)
+                                                      for index, new_index in rule_mapping.items())
+        if renumbered:
+            self._renumber_rules(rule_mapping)
+
+        states_count = len(action_goto_table)
+        changed_states = sorted(changed_states)
+        users = Counter(self.state_rows[:min(states_count, self.states_count)])
+        for state in changed_states:
+            if state < self.states_count:
+                users[self.state_rows[state]] -= 1
+        added = states_count - self.states_count
+        if added > 0:
+            self.state_rows.extend(array('i', [0]) * added)
+            self.accepts.extend(array('b', [0]) * added)
+        del self.state_rows[states_count:]
+        del self.accepts[states_count:]
+        self.states_count = states_count
+
+        # Rows that are not in the table yet -> their states
+        new_rows = {}
+        for state in changed_states:
+            self.accepts[state], default_rule, cells = self._cells(state, action_goto_table[state])
+            key = (default_rule, tuple(sorted(cells.items())))
+            row = self._row_ids.get(key)
+            if row is None:
+                new_rows.setdefault(key, []).append(state)
+            else:
+                users[row] += 1
+                self.state_rows[state] = row
+
+        if self._occupied is None:
+            self._occupied = int(''.join('1' if row >= 0 else '0' for row in reversed(self.check)) or '0', 2)
+        free_rows = []
+        freed_offsets = []
+        for row, key in enumerate(self._row_keys):
+            if users[row] <= 0:
+                if key is not None:
+                    freed_offsets.append(self.base[row])
+                    self._set_row(row, key, -1)
+                free_rows.append(row)
+        free_rows.reverse()
+
+        for key, row_states in sorted(new_rows.items(), key=lambda item: -len(item[0][1])):
+            if free_rows:
+                row = free_rows.pop()
+            else:
+                row = len(self._row_keys)
+                self._row_keys.append(None)
+                self.base.append(0)
+                self.default_reduce_rules.append(-1)
+                self.default_reduces.append(EMPTY)
+            self._set_row(row, key, row, freed_offsets)
+            for state in row_states:
+                self.state_rows[state] = row
+        self._grow(max(self.base) + self.symbols_count if self.base else self.symbols_count)
+
+        if renumbered or len(self.rule_left_ids) != len(grammar.rules):
+            self.rule_left_ids = array('i', (self.symbol_ids[rule.left_symbol] for rule in grammar.rules))
+            self.rule_lengths = array('i', (len(rule.right_symbols) for rule in grammar.rules))
+        if self.kernels is not None and states is not None:
+            kernels = list(self.kernels[:states_count]) + [None] * (states_count - len(self.kernels))
+            for state in changed_states:
+                kernels[state] = self._kernel(states[state])
+            self.kernels = tuple(kernels)
+
+    def _index_rows(self):
+        # Contents of the used rows, after unpickling
+        used_rows = set(self.state_rows)
+        cells = dict((row, []) for row in used_rows)
+        for slot, row in enumerate(self.check):
+            if row in cells:
+                cells[row].append((slot - self.base[row], (self.shifts[slot], self.gotos[slot], self.reduces[slot])))
+        self._row_keys = [(self.default_reduce_rules[row], tuple(cells[row])) if row in used_rows else None
+                          for row in range(len(self.base))]
+        self._row_ids = dict((key, row) for row, key in enumerate(self._row_keys) if key is not None)
+        self._occupied = None
+
+    def _renumber_rules(self, rule_mapping):
+        def remap(rule_index):
+            new_index = rule_mapping.get(rule_index)
+            return -1 if new_index is None else new_index
+
+        renumbered = dict((rules, tuple(remap(rule_index) for rule_index in rules)) for rules in set(self.reduces))
+        self.default_reduce_rules = array('i', (remap(rule_index) if rule_index >= 0 else -1
+                                                for rule_index in self.default_reduce_rules))
+        self._init_reduces([renumbered[rules] for rules in self.reduces])
+        self._row_keys = [None if key is None else (
+            remap(key[0]) if key[0] >= 0 else -1,
+            tuple((symbol_id, (shift, goto, renumbered[rules])) for symbol_id, (shift, goto, rules) in key[1]))
+            for key in self._row_keys]
+        # Rows with removed rules may become equal, they are used only by changed states
+        self._row_ids = {}
+        for row, key in enumerate(self._row_keys):
+            if key is not None:
+                self._row_ids.setdefault(key, row)
+        if self.kernels is not None:
+            self.kernels = tuple(tuple((remap(rule_index), dot) for rule_index, dot in items) for items in self.kernels)
+
+    def _set_row(self, row, key, check, offsets=()):
+        """
+            Put cells of a row in its slots (check is the row) or free the row and its slots (check is -1).
+            The row is put at the first of offsets where it fits, or at the first such offset in the buffers.
+        """
+        default_rule, cells = key
+        bits = bytearray(b'0') * (cells[-1][0] + 1 if cells else 0)
+        for symbol_id, cell in cells:
+            bits[-1 - symbol_id] = ord('1')
+        pattern = int(bits, 2) if bits else 0
+        if check < 0:
+            if self._row_ids.get(key) == row:
+                del self._row_ids[key]
+            self._row_keys[row] = None
+            self._occupied &= ~(pattern << self.base[row])
+            default_rule = -1
+        else:
+            self._row_ids[key] = row
+            self._row_keys[row] = key
+            if cells:
+                self.base[row] = self._place(pattern, [symbol_id for symbol_id, cell in cells], offsets)
+                self._grow(self.base[row] + cells[-1][0] + 1)
+                self._occupied |= pattern << self.base[row]
+        for symbol_id, (shift, goto, rules) in cells:
+            slot = self.base[row] + symbol_id
+            self.check[slot] = check
+            self.shifts[slot] = shift if check >= 0 else -1
+            self.gotos[slot] = goto if check >= 0 else -1
+            self.reduces[slot] = rules if check >= 0 else EMPTY
+        if check < 0:
+            self.base[row] = 0
+        self.default_reduce_rules[row] = default_rule
+        self.default_reduces[row] = EMPTY if default_rule < 0 else (default_rule,)
+
+    @staticmethod
+    def _kernel(state):
+        return tuple((item.rule_index, item.dot_position) for item in state.itemset if item.dot_position > 0)
+
+    def _grow(self, slots_count):
+        if slots_count > len(self.check):
+            added = slots_count - len(self.check)
+            self.check.extend(array('i', [-1]) * added)
+            self.shifts.extend(array('i', [-1]) * added)
+            self.gotos.extend(array('i', [-1]) * added)
+            self.reduces.extend([EMPTY] * added)
+
+    def _place(self, pattern, columns, offsets):
+        """
+            Offset of a row where all its columns fall on free slots, pattern has bit y set for every column y.
+            Offsets are tried first: a changed row usually fits where the row it replaces was.
+            Otherwise it is the lowest offset, found with bit masks of slots taken by the row at every offset.
+            A run of consecutive columns takes a few masks: taken[k] has bit i set if any of slots i ... i + 2**k - 1
+            is taken.
+        """
+        occupied = self._occupied
+        for offset in offsets:
+            if not occupied & (pattern << offset):
+                return offset
+        taken = [occupied]
+        blocked = 0
+        start = 0
+        for end in range(1, len(columns) + 1):
+            if end < len(columns) and columns[end] == columns[end - 1] + 1:
+                continue
+            column, length = columns[start], end - start
+            while length:
+                level = length.bit_length() - 1
+                while len(taken) <= level:
+                    taken.append(taken[-1] | (taken[-1] >> (1 << (len(taken) - 1))))
+                blocked |= taken[level] >> column
+                column += 1 << level
+                length -= 1 << level
+            start = end
+        # Lowest zero bit of blocked
+        return (~blocked & (blocked + 1)).bit_length() - 1
+
+    def _cells(self, state, row):
+        """
+            (accepts, default reduce rule or -1, symbol id -> (shift, goto, reduce rules)) of a row of actions
+        """
+        accepts = 0
+        cells = {}
+        for symbol, actions in row.items():
+            shift, goto, rules = -1, -1, []
+            for action in actions:
+                if action.type == 'S':
+                    assert shift == -1, 'Several shifts in state %s by %s' % (state, symbol)
+                    shift = action.state
+                elif action.type == 'G':
+                    assert goto == -1, 'Several gotos in state %s by %s' % (state, symbol)
+                    goto = action.state
+                elif action.type == 'A':
+                    accepts = 1
+                elif action.type == 'R':
+                    rules.append(action.rule_index)
+            if shift >= 0 or goto >= 0 or rules:
+                cells[self.symbol_ids[symbol]] = (shift, goto, tuple(rules))
+
+        default_rule = -1
+        if self.default_reductions and not accepts:
+            reduces = set(rules for shift, goto, rules in cells.values() if goto == -1)
+            if len(reduces) == 1 and all(shift == -1 for shift, goto, rules in cells.values()):
+                rules = reduces.pop()
+                if len(rules) == 1:
+                    default_rule = rules[0]
+                    cells = dict((symbol_id, (-1, goto, EMPTY))
+                                 for symbol_id, (shift, goto, rules) in cells.items() if goto >= 0)
+        return accepts, default_rule, cells
+
+    @staticmethod
+    def _pack(rows):
+        """
+        First-fit row displacement, densest rows first.
+        Candidate offsets align the first column of a row with a free slot, occupied slots are skipped
+        with path-compressed "next free slot" links. A row never fits before the previous row with
+        the same columns, so the search for it starts right after that row.
+        """
+        base = array('i', [0]) * len(rows)
+        occupied = bytearray()
+        next_free = []
+        last_offsets = {}
+
+        def find_free(slot):
+            root = slot
+            while root < len(next_free) and next_free[root] != root:
+                root = next_free[root]
+            while slot < len(next_free) and next_free[slot] != slot:
+                next_free[slot], slot = root, next_free[slot]
+            return root
+
+        for row_index in sorted(range(len(rows)), key=lambda r: -len(rows[r])):
+            columns = rows[row_index]
+            if not columns:
+                continue
+            pattern = tuple(columns)
+            slot = find_free(max(columns[0], last_offsets.get(pattern, -1) + columns[0] + 1))
+            while True:
+                offset = slot - columns[0]
+                if len(occupied) < offset + columns[-1] + 1:
+                    size = offset + columns[-1] + 1
+                    next_free.extend(range(len(occupied), size))
+                    occupied.extend(bytes(size - len(occupied)))
+                if not any(occupied[offset + column] for column in columns):
+                    break
+                slot = find_free(slot + 1)
+            for column in columns:
+                occupied[offset + column] = 1
+                next_free[offset + column] = offset + column + 1
+            base[row_index] = offset
+            last_offsets[pattern] = offset
+        return base
+
+    def _init_reduces(self, reduce_rules):
+        # Per-slot tuples of rule indexes, identical tuples are shared
+        interned = {EMPTY: EMPTY}
+        self.reduces = [interned.setdefault(rules, rules) for rules in reduce_rules]
+        self.default_reduces = [EMPTY if rule_index < 0 else interned.setdefault((rule_index,), (rule_index,))
+                                for rule_index in self.default_reduce_rules]
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        for name in ('reduces', 'default_reduces', '_row_ids', '_row_keys', '_occupied'):
+            state.pop(name, None)
+        # Flat storage of reduces, the per-slot tuples are rebuilt from it after unpickling
+        state['reduce_offsets'] = array('i', [0]) * (len(self.reduces) + 1)
+        state['reduce_rules'] = array('i')
+        for slot, rules in enumerate(self.reduces):
+            state['reduce_rules'].extend(rules)
+            state['reduce_offsets'][slot + 1] = len(state['reduce_rules'])
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        offsets = state.pop('reduce_offsets')
+        rules = state.pop('reduce_rules')
+        self.__dict__.update(state)
+        self._row_keys = None
+        self._init_reduces([tuple(rules[offsets[slot]:offsets[slot + 1]]) for slot in range(len(offsets) - 1)])
+
+    def symbol_id(self, symbol):
+        return self.symbol_ids.get(symbol, -1)
+
+    def get_shift(self, state, symbol_id):
+        row = self.state_rows[state]
+        slot = self.base[row] + symbol_id
+        return self.shifts[slot] if self.check[slot] == row else -1
+
+    def get_goto(self, state, symbol_id):
+        row = self.state_rows[state]
+        slot = self.base[row] + symbol_id
+        return self.gotos[slot] if self.check[slot] == row else -1
+
+    def get_reduces(self, state, symbol_id):
+        row = self.state_rows[state]
+        default = self.default_reduces[row]
+        if default:
+            return default
+        slot = self.base[row] + symbol_id
+        return self.reduces[slot] if self.check[slot] == row else EMPTY
+
+    def stats(self):
+        rows = set(self.state_rows)
+        return CompiledTableStats(
+            self.states_count,
+            len(rows),
+            sum(1 for row in self.check if row >= 0),
+            len(self.check),
+            sum(1 for row in rows if self.default_reduce_rules[row] >= 0))
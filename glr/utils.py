@@ -145,19 +145,20 @@ def format_states(states, grammar):
     return format_table(table)
 
 
-def format_stack_item(stack_item, second_line_prefix=''):
-    def get_pathes(stack_item):
-        if stack_item.prev:
-            for prev in stack_item.prev:
-                for p in get_pathes(prev):
-                    yield p + [stack_item]
+def format_gss_node(gss, node, second_line_prefix=''):
+    def get_pathes(node):
+        edges = gss.edges(node)
+        if edges:
+            for edge in edges:
+                for p in get_pathes(gss.edge_prevs[edge]):
+                    yield p + ['%s.%s' % (gss.labels[edge].symbol, gss.states[node])]
         else:
-            yield [stack_item]
+            yield [repr(gss.states[node])]
 
-    if stack_item.prev:
+    if gss.first_edges[node] >= 0:
         pathes = []
-        for path in get_pathes(stack_item):
-            pathes.append(' > '.join(repr(i) for i in path))
+        for path in get_pathes(node):
+            pathes.append(' > '.join(path))
         length = max(len(p) for p in pathes)
 
         results = []
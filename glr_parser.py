@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 __all__ = ["GLRParser"]
 
+import asyncio
+
 from glrengine.scanner import GLRScanner
 from glrengine.automaton import GLRAutomaton
 from glrengine.splitter import GLRSplitter
-from glrengine.normalizer import morph_parser
+from glr.batch import parse_many
+from glr.budget import ParseResult
+from glr.cache import CompiledGrammarCache, grammar_key
 
 
 class GLRParser(object):
@@ -39,15 +43,14 @@ class GLRParser(object):
         Word = lat
     """
 
-    def __init__(self, grammar, root="S", dictionaries=None, parser=None, debug=False):
+    def __init__(self, grammar, root="S", dictionaries=None, parser=None, debug=False, cache_dir=None,
+                 optimize=False):
+        # Arguments to build the same parser in worker processes, see parse_many()
+        self.init_args = dict(grammar=grammar, root=root, dictionaries=dictionaries, parser=parser, debug=debug,
+                              cache_dir=cache_dir, optimize=optimize)
+        # Dictionaries are not compiled into the grammar: the normalizer marks words whose lemma is
+        # in a dictionary with the dictionary name, so each dictionary is a single terminal
         grammar_rules = u"%s\n%s" % (grammar, self.DEFAULT_GRAMMAR)
-        if dictionaries:
-            # превращает {k: [a, b, c]} -> "k = 'a' | 'b' | 'c'"
-            for dict_name, dict_words in dictionaries.items():
-                morphed = []
-                for word in dict_words:
-                    morphed.append(morph_parser.normal(word))
-                grammar_rules += u"\n%s = '%s'" % (dict_name, "' | '".join(morphed))
 
         if debug:
             print(grammar_rules)
@@ -59,19 +62,90 @@ class GLRParser(object):
 
         self.splitter = GLRSplitter()
         self.scanner = GLRScanner(**parser_rules)
+
+        def compile_grammar():
+            return GLRAutomaton(root, grammar_rules, self.scanner, optimize=optimize).compiled_state()
+
+        self.cache_key = grammar_key('glrengine', grammar_rules, None, root, sorted(self.scanner.tokens.items()),
+                                     optimize)
         self.glr = GLRAutomaton(
             start_sym=root,
             grammar=grammar_rules,
             scanner=self.scanner,
-            debug=debug
+            dictionaries=dictionaries,
+            debug=debug,
+            compiled=CompiledGrammarCache(cache_dir).get_or_compile(self.cache_key, compile_grammar)
         )
 
-    def parse(self, text):
-        result = []
+    def parse(self, text, budget=None, max_results=None):
+        """
+            Matches of all sentences as ParseResult, the budget applies to each sentence and exceeded is
+            the first budget that was hit. With max_results sentences are parsed only until that many
+            matches are found.
+        """
+        result = ParseResult()
         for sentence in self.splitter(text):
-            result += self.glr(sentence)
+            if max_results is not None and len(result) >= max_results:
+                break
+            sentence_result = self.glr(sentence, budget,
+                                       max_results - len(result) if max_results is not None else None)
+            result += sentence_result
+            result.exceeded = result.exceeded or sentence_result.exceeded
         return result
 
+    async def _sentence_results(self, text, budget, max_results, executor):
+        loop = asyncio.get_running_loop()
+        found = 0
+        for sentence in self.splitter(text):
+            if max_results is not None and found >= max_results:
+                return
+            remaining = max_results - found if max_results is not None else None
+            if executor is not None:
+                sentence_result = await loop.run_in_executor(executor, self.glr, sentence, budget, remaining)
+            else:
+                await asyncio.sleep(0)
+                sentence_result = self.glr(sentence, budget, remaining)
+            found += len(sentence_result)
+            yield sentence_result
+
+    async def aparse(self, text, budget=None, max_results=None, executor=None):
+        """
+            parse() for asyncio. Sentences are parsed one by one in the executor, or in the event loop thread
+            if it is None, and control goes back to the loop between them, so a cancelled task stops at
+            the next sentence. The automaton keeps state of the current sentence, so one parser must not
+            be used by several executor threads at once.
+        """
+        result = ParseResult()
+        async for sentence_result in self._sentence_results(text, budget, max_results, executor):
+            result += sentence_result
+            result.exceeded = result.exceeded or sentence_result.exceeded
+        return result
+
+    async def aparse_stream(self, text, budget=None, executor=None):
+        """
+            Async iterator of matches, sentence by sentence, see aparse()
+        """
+        async for sentence_result in self._sentence_results(text, budget, None, executor):
+            for match in sentence_result:
+                yield match
+
+    def parse_many(self, texts, workers=None, chunksize=1, ordered=True, budget=None, max_results=None):
+        """
+            Generator of parse() results of the texts parsed by a pool of worker processes, in order of texts
+            or as (index, result) pairs in order of completion if not ordered, see glr.batch.parse_many()
+        """
+        return parse_many(self, texts, workers, chunksize, ordered, dict(budget=budget, max_results=max_results))
+
+    def matches(self, text, budget=None):
+        return bool(self.parse(text, budget, max_results=1))
+
+    def first_match(self, text, budget=None):
+        """
+            First matched substring or None
+        """
+        result = self.parse(text, budget, max_results=1)
+        return result[0] if result else None
+
 
 # TODO:
 # нормализация слов в кавычках
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
+from glr.budget import ParseResult
 from glrengine.normalizer import morph_parser
-from glrengine.labels import LABELS_CHECK
+from glrengine.labels import compile_labels
 from glrengine.parser import Parser
 from itertools import chain
 from glrengine.stack import Stack
@@ -8,178 +9,278 @@ from glrengine.scanner import token_line_col
 
 INITIAL_TOKEN = ('$', '$', 0)
 
+# Outcomes of an attempt step
+ALIVE, FAILED, END = range(3)
+
+
+class TokenWindow(object):
+    """
+        Tokens of a sentence from a match start on, label checks index them by rule position
+    """
+
+    def __init__(self, tokens, start):
+        self.tokens = tokens
+        self.start = start
+        self.length = len(tokens) - start
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError(i)
+        return self.tokens[self.start + i]
+
+
+class Attempt(object):
+    """
+        Match attempt started at a token: its own stack, the text offset of the match and its result
+    """
+
+    def __init__(self, automaton, text, tokens, start):
+        self.stack = Stack(automaton)
+        self.stack.shift(None, None, 0)
+        self.stack.count_active = 1
+        self.text = text
+        self.tokens = TokenWindow(tokens, start)
+        self.start = start
+        # The first attempt matches from the text start, like a sentence with leading spaces
+        self.offset = tokens[start][2] if start > 0 else 0
+        self.prev_tok = INITIAL_TOKEN
+        self.reductions = 0
+        self.result = None
+
 
 class GLRAutomaton(Parser):
     """
         A GLR parser.
     """
 
-    def __init__(self, start_sym, grammar, scanner, dictionaries=None, debug=False):
-        Parser.__init__(self, start_sym, grammar, scanner.tokens.keys())
+    def __init__(self, start_sym, grammar, scanner, dictionaries=None, debug=False, compiled=None, optimize=False):
+        Parser.__init__(self, start_sym, grammar, scanner.tokens.keys(), compiled, optimize)
         self.scanner = scanner
         self.dictionaries = dictionaries or {}
+        # Only dictionaries the grammar refers to become token names, others have no column in ACTION
+        self.dictionary_lookup = morph_parser.compile_dictionaries(
+            dict((name, words) for name, words in self.dictionaries.items() if name in self.kw_set))
+        # Labels are compiled on construction, closures are not part of the cached tables
+        self.label_checks = dict((rule, compile_labels(labels)) for rule, labels in self.R.labels.items())
+        self.expecting = {}
         self.results = []
         self.debug_mode = debug
 
-    def __call__(self, text):
-        return self.recognize(text, chain(self.scanner(text), [('$', '$', len(text))]))
+    def __call__(self, text, budget=None, max_results=None):
+        return self.recognize(text, chain(self.scanner(text), [('$', '$', len(text))]), budget, max_results)
 
-    def recognize(self, text, token_stream):
+    def recognize(self, text, token_stream, budget=None, max_results=None):
+        """
+            Matched substrings as ParseResult. Tokens are read in one pass: a match attempt with its own stack
+            is started at each token that state 0 has actions for, and each attempt goes on until its stack
+            dies or a label check fails. Results come in order of match starts, the first attempt reaching
+            the end of the text is the last one. A ParseBudget counts stack nodes, reductions and results over
+            all attempts and is checked on each token, its beam action truncates as there is no beam here.
+            With max_results parsing stops as soon as that many substrings are matched.
+        """
         self.results = []
-        tokens = morph_parser(token_stream)
-        while True:
-            stack = Stack(self)
-            stack.shift(None, None, 0)
-            stack.count_active = 1
-            prev_tok = INITIAL_TOKEN
-            labels_ok = True
-
-            for token_num, token in enumerate(tokens):
-                self.debug("\n\n\nNEW ITERATION. Token:", token[1])
-                self.debug(token)
-                if len(stack.active) == 0:
-                    if not self.error_detected(text, tokens, prev_tok, stack.previously_active):
-                        text, tokens = self.without_first_word(text, tokens)
-                        break
-                    else:
-                        continue
-                prev_tok = token
-
-                # свертка
-                for i, node in stack.enumerate_active():  # S.active may grow
-                    state = node.data
-
-                    # raw-слова в кавычках
-                    raw_token = "'%s'" % token[1]
-                    if raw_token in self.ACTION[state]:
-                        for r, rule in filter(lambda x: x[0] == 'R', self.ACTION[state][raw_token]):
-                            self.debug("- Reduce")
-                            self.debug("-- Actions", self.ACTION[state][raw_token])
-                            self.debug("-- Raw token", node, rule)
-                            labels_ok = self.check_labels(tokens, self.R.labels[rule])
-                            if not labels_ok:
-                                break
-                            stack.reduce(node, rule)
-
-                    # обычные состояния
-                    if labels_ok:
-                        for r, rule in filter(lambda x: x[0] == 'R', chain(*(self.ACTION[state][t] for t in token[0]))):
-                            self.debug("- Reduce")
-                            self.debug("-- Actions", self.ACTION[state])
-                            self.debug("-- Normal", node, rule)
-                            labels_ok = self.check_labels(tokens, self.R.labels[rule])
-                            if not labels_ok:
-                                break
-                            stack.reduce(node, rule)
-
-                    # имитация конца предложения
-                    if labels_ok:
-                        for r, rule in filter(lambda x: x[0] == 'R', self.ACTION[state]["$"]):
-                            self.debug("- Reduce")
-                            self.debug("-- Actions", self.ACTION[state])
-                            self.debug("-- EOS", node, rule)
-                            labels_ok = self.check_labels(tokens, self.R.labels[rule])
-                            if not labels_ok:
-                                break
-                            stack.reduce(node, rule)
-
-                    self.debug("- STACK")
-                    if self.debug_mode:
-                        stack.dump()
-
-                # последняя свертка не удовлетворила лейблам
-                if not labels_ok:
-                    self.debug("- Labels not OK")
-                    text, tokens = self.without_first_word(text, tokens)
+        tracker = budget.start() if budget is not None else None
+        tokens = morph_parser(token_stream, self.dictionary_lookup)
+        attempts = []
+        pending = {}
+        ended_nodes = ended_reductions = 0
+
+        for token_num, token in enumerate(tokens):
+            if tracker is not None and tracker.check(ended_nodes + sum(a.stack.count_nodes for a in attempts),
+                                                     ended_reductions + sum(a.reductions for a in attempts),
+                                                     len(self.results) + len(pending), beam_supported=False):
+                return self.truncated(tracker)
+            self.debug("\n\n\nNEW ITERATION. Token:", token[1])
+            self.debug(token)
+            if self.can_start(token):
+                attempts.append(Attempt(self, text, tokens, token_num))
+
+            alive = []
+            ended = False
+            for attempt in attempts:
+                status = self.step(attempt, token)
+                if status == ALIVE:
+                    alive.append(attempt)
+                    continue
+                ended_nodes += attempt.stack.count_nodes
+                ended_reductions += attempt.reductions
+                if attempt.result is not None:
+                    pending[attempt.start] = attempt.result
+                if status == END:
+                    # Attempts started later would only have run after this one failed
+                    self.results.extend(pending[start] for start in sorted(pending) if start <= attempt.start)
+                    ended = True
                     break
+            if ended:
+                break
+            attempts = alive
+
+            # Results are final once no attempt started before them is alive
+            first_alive = attempts[0].start if attempts else len(tokens)
+            for start in sorted(start for start in pending if start < first_alive):
+                self.results.append(pending.pop(start))
+            if max_results is not None and len(self.results) >= max_results:
+                break
+
+        if max_results is not None:
+            del self.results[max_results:]
+        # Results that became final on the last token count in the budget too
+        if tracker is not None and tracker.check(ended_nodes + sum(a.stack.count_nodes for a in attempts),
+                                                 ended_reductions + sum(a.reductions for a in attempts),
+                                                 len(self.results), beam_supported=False):
+            return self.truncated(tracker)
+        return ParseResult(self.results)
+
+    def truncated(self, tracker):
+        """
+            Results so far as ParseResult of the exceeded budget, at most max_trees of them
+        """
+        max_trees = tracker.budget.limits['trees']
+        return ParseResult(self.results[:max_trees] if tracker.exceeded == 'trees' else self.results,
+                           tracker.exceeded)
+
+    def can_start(self, token):
+        """
+            False if an attempt started at the token would die on it without a result
+        """
+        row = self.ACTION[0]
+        return token[0] == {'$'} or "'%s'" % token[1] in row or any(row[t] for t in token[0]) or \
+            any(action[0] == 'R' for action in row['$'])
 
-                # конец?
-                if token[0] == {'$'}:
-                    acc = stack.accepts()
-                    if acc:
-                        self.results.append(text)
-                        self.debug("- Found new result:", self.results)
-                    else:
-                        self.error_detected(text, tokens, token, stack.active)
-                    return self.results
-
-                # перенос
-                stack.count_active = len(stack.active)
-                # for node in (stack.active[i] for i in range(len(stack.active))):
-                for node in (list(stack.active)[i] for i in range(len(stack.active))):
-                    # из стека могут удаляться состояния, так что верхний длинный for правда оказался нужен
-                    state = node.data
-
-                    # raw-слова в кавычках
-                    raw_token = "'%s'" % token[1]
-                    if raw_token in self.ACTION[state]:
-                        for r, state in filter(lambda x: x[0] == 'S',  self.ACTION[state][raw_token]):
-                            self.debug("- Shift")
-                            self.debug("-- Raw", node, token)
-                            stack.shift(node, (token,), state)
-
-                    # обычные состояния
-                    for r, state in filter(lambda x: x[0] == 'S',  chain(*(self.ACTION[state][t] for t in token[0]))):
-                        self.debug("- Shift")
-                        self.debug("-- Normal", node, token)
-                        stack.shift(node, (token,), state)
-
-                    self.debug("- Stack:")
-                    if self.debug_mode:
-                        stack.dump()
-
-                # слияние состояний
-                stack.merge()
-
-        return self.results
-
-    def error_detected(self, text, tokens, cur_tok, last_states):
-        line, column = token_line_col(text, cur_tok)
-
-        lines = text.splitlines()
-        if lines:
-            if len(lines) > (line - 1):
-                self.debug(lines[line - 1])
-                self.debug('%s^' % (''.join(c == '\t' and '\t' or ' ' for c in lines[line - 1][:column - 1])))
+    def step(self, attempt, token):
+        """
+            Reduces and shifts the token on the attempt stack, returns ALIVE, FAILED or END
+        """
+        stack = attempt.stack
+        tokens = attempt.tokens
+        if len(stack.active) == 0:
+            attempt.result = self.error_detected(attempt.text, attempt.offset, attempt.prev_tok,
+                                                 stack.previously_active)
+            return FAILED
+        attempt.prev_tok = token
+        labels_ok = True
+
+        # свертка
+        for i, node in stack.enumerate_active():  # S.active may grow
+            state = node.data
+
+            # raw-слова в кавычках
+            raw_token = "'%s'" % token[1]
+            if raw_token in self.ACTION[state]:
+                for r, rule in filter(lambda x: x[0] == 'R', self.ACTION[state][raw_token]):
+                    self.debug("- Reduce")
+                    self.debug("-- Actions", self.ACTION[state][raw_token])
+                    self.debug("-- Raw token", node, rule)
+                    labels_ok = self.check_labels(tokens, rule)
+                    if not labels_ok:
+                        break
+                    attempt.reductions += 1
+                    stack.reduce(node, rule)
+
+            # обычные состояния
+            if labels_ok:
+                for r, rule in filter(lambda x: x[0] == 'R', chain(*(self.ACTION[state][t] for t in token[0]))):
+                    self.debug("- Reduce")
+                    self.debug("-- Actions", self.ACTION[state])
+                    self.debug("-- Normal", node, rule)
+                    labels_ok = self.check_labels(tokens, rule)
+                    if not labels_ok:
+                        break
+                    attempt.reductions += 1
+                    stack.reduce(node, rule)
+
+            # имитация конца предложения
+            if labels_ok:
+                for r, rule in filter(lambda x: x[0] == 'R', self.ACTION[state]["$"]):
+                    self.debug("- Reduce")
+                    self.debug("-- Actions", self.ACTION[state])
+                    self.debug("-- EOS", node, rule)
+                    labels_ok = self.check_labels(tokens, rule)
+                    if not labels_ok:
+                        break
+                    attempt.reductions += 1
+                    stack.reduce(node, rule)
+
+            self.debug("- STACK")
+            if self.debug_mode:
+                stack.dump()
+
+        # последняя свертка не удовлетворила лейблам
+        if not labels_ok:
+            self.debug("- Labels not OK")
+            return FAILED
+
+        # конец?
+        if token[0] == {'$'}:
+            if stack.accepts():
+                attempt.result = attempt.text[attempt.offset:]
+                self.debug("- Found new result:", attempt.result)
             else:
-                self.debug("at end of text")
-
-        toks = set(kw for st in last_states for kw in self.kw_set if len(self.ACTION[st.data][kw]) > 0 and kw not in self.R and kw != '$')
-        arr = []
-        for st in last_states:
-            for kw in self.kw_set:
-                if len(self.ACTION[st.data][kw]) > 0 and kw not in self.R and kw != '$':
-                    arr.append(kw)
-        toks1 = set(arr)
-
-        if not toks:
-            self.debug("Text", text)
-            self.debug("-- Part", text[:cur_tok[2]])
-            self.results.append(text[:cur_tok[2]])
-            self.debug("- Found new result:", self.results)
-
-        return False
-
-    def check_labels(self, tokens, labels):
-        self.debug("- Checking labels...", labels)
-        for i in range(len(labels)):
-            if labels[i]:
-                for label_key, label_values in labels[i].items():
-                    for label_value in label_values:
-                        self.debug("-- Check label:", label_key, label_value)
-                        ok = LABELS_CHECK[label_key](label_value, tokens, i)
-                        self.debug("--- ", ok)
-                        if not ok:
-                            return False
-        return True
-
-    def without_first_word(self, text, tokens):
-        i = 1
-        if len(tokens) == 1:
-            return '', []
-        new_text = text[tokens[i][2]:]
-        new_tokens = [(token[0], token[1], token[2] - tokens[i][2], token[3], token[4]) for token in tokens[i:]]
-        return new_text, new_tokens
+                attempt.result = self.error_detected(attempt.text, attempt.offset, token, stack.active)
+            return END
+
+        # перенос
+        stack.count_active = len(stack.active)
+        for node in list(stack.active):
+            # из стека могут удаляться состояния, так что верхний длинный for правда оказался нужен
+            state = node.data
+
+            # raw-слова в кавычках
+            raw_token = "'%s'" % token[1]
+            if raw_token in self.ACTION[state]:
+                for r, state in filter(lambda x: x[0] == 'S',  self.ACTION[state][raw_token]):
+                    self.debug("- Shift")
+                    self.debug("-- Raw", node, token)
+                    stack.shift(node, (token,), state)
+
+            # обычные состояния
+            for r, state in filter(lambda x: x[0] == 'S',  chain(*(self.ACTION[state][t] for t in token[0]))):
+                self.debug("- Shift")
+                self.debug("-- Normal", node, token)
+                stack.shift(node, (token,), state)
+
+            self.debug("- Stack:")
+            if self.debug_mode:
+                stack.dump()
+
+        # слияние состояний
+        stack.merge()
+        return ALIVE
+
+    def error_detected(self, text, offset, cur_tok, last_states):
+        """
+            Text from offset to the token if no state expects more terminals, None otherwise
+        """
+        if self.debug_mode:
+            line, column = token_line_col(text, cur_tok)
+            lines = text.splitlines()
+            if lines:
+                if len(lines) > (line - 1):
+                    self.debug(lines[line - 1])
+                    self.debug('%s^' % (''.join(c == '\t' and '\t' or ' ' for c in lines[line - 1][:column - 1])))
+                else:
+                    self.debug("at end of text")
+
+        if any(self.expects_terminals(st.data) for st in last_states):
+            return None
+        self.debug("-- Part", text[offset:cur_tok[2]])
+        return text[offset:cur_tok[2]]
+
+    def expects_terminals(self, state):
+        expects = self.expecting.get(state)
+        if expects is None:
+            expects = self.expecting[state] = any(len(self.ACTION[state][kw]) > 0 and kw not in self.R and kw != '$'
+                                                  for kw in self.kw_set)
+        return expects
+
+    def check_labels(self, tokens, rule):
+        self.debug("- Checking labels...", self.R.labels[rule])
+        return self.label_checks[rule](tokens)
 
     def validate_ast(self, ast):
         return ast
@@ -28,7 +28,11 @@ class GLRNormalizer(object):
     def __init__(self):
         self.morph = pymorphy2.MorphAnalyzer()
 
-    def __call__(self, tokens):
+    def __call__(self, tokens, dictionaries=None):
+        """
+            dictionaries is a lemma lookup from compile_dictionaries(): names of dictionaries containing
+            the token's lemma are added to its token names, so grammar sees one terminal per dictionary
+        """
         results = []
         for token in tokens:
             tokname, tokvalue, tokpos = token
@@ -57,10 +61,22 @@ class GLRNormalizer(object):
                         multitag._str = ",".join(multitag.grammemes) # not required, but useful for debugging
             else:
                 tokname = {tokname}
+            if dictionaries and tokvalue in dictionaries:
+                tokname = tokname | dictionaries[tokvalue]
             # print tokname, tokvalue, tokpos, multitag, orig_tokvalue
             results.append((tokname, tokvalue, tokpos, multitag, orig_tokvalue))
         return results
 
+    def compile_dictionaries(self, dictionaries):
+        """
+            {name: [word, ...]} -> {lemma: frozenset of names}
+        """
+        lookup = {}
+        for name, words in dictionaries.items():
+            for word in words:
+                lookup.setdefault(self.normal(word), set()).add(name)
+        return dict((lemma, frozenset(names)) for lemma, names in lookup.items())
+
     def normal(self, word):
         morphed = self.morph.parse(word)
         if morphed:
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from itertools import chain
 from glrengine.scanner import make_scanner
 from glrengine.lr import *
@@ -85,6 +85,7 @@ class RuleSet(dict):
         self.names_count = 0
         self.rules_count = 0
         self.clear()
+        self.labels = {}
         epsilons = set()
         for rulename, elems, commit, labels in rules:
             if len(elems) > 0:
@@ -132,6 +133,44 @@ class RuleSet(dict):
             i += 1
             #
 
+    def useful_rules(self):
+        """
+            Indexes of rules that derive strings of terminals and are reachable from the start rule.
+        """
+        productive = set()
+        changed = True
+        while changed:
+            changed = False
+            for i in range(self.rules_count):
+                if self[i] is None or self[i][0] in productive:
+                    continue
+                rulename, elems, commit = self[i]
+                if all(e in productive or e not in self for e in elems):
+                    productive.add(rulename)
+                    changed = True
+
+        useful = set()
+        reached = set([self[0][0]])
+        names = [self[0][0]]
+        while names:
+            for i in self[names.pop()]:
+                rulename, elems, commit = self[i]
+                if not all(e in productive or e not in self for e in elems):
+                    continue
+                useful.add(i)
+                for e in elems:
+                    if e in self and e not in reached:
+                        reached.add(e)
+                        names.append(e)
+        return useful
+
+    def prune(self):
+        """
+            Drop rules that can never take part in a parse, remaining rules are renumbered keeping their order.
+        """
+        useful = self.useful_rules()
+        self.fill([self[i] + (self.labels[i],) for i in range(self.rules_count) if i in useful])
+
     @staticmethod
     def union_elements(E, eps):
         print("union before: ", E, eps)
@@ -168,13 +207,36 @@ class RuleSet(dict):
         return must_cleanup
 
 
+class ActionRow(dict):
+    """
+        Sparse row of the ACTION table: tokens without actions are not stored.
+    """
+
+    def __missing__(self, key):
+        return ()
+
+
+TableStats = namedtuple('TableStats', ['rules', 'states', 'rows', 'entries'])
+
+
 class Parser(object):
-    def __init__(self, start_sym, grammar, scanner_kw=None):
+    # Attributes produced by compilation, see compiled_state()
+    COMPILED_ATTRIBUTES = ('kw_set', 'R', 'I', 'next_list', 'initial_items', 'LR0', 'LR0_idx',
+                           'initial_state', 'GOTO', 'ACTION')
+
+    def __init__(self, start_sym, grammar, scanner_kw=None, compiled=None, optimize=False):
+        if compiled is not None:
+            # Tables were already built (e.g. loaded from glr.cache), skip re-derivation
+            self.__dict__.update(compiled)
+            return
+
         if scanner_kw is None:
             scanner_kw = []
         self.kw_set = set(scanner_kw)
         self.kw_set.add('$')
         self.R = RuleSet(make_rules(start_sym, grammar, self.kw_set))
+        if optimize:
+            self.R.prune()
         self.I = set((r, i) for r in range(self.R.rules_count)
                      for i in range(len(self.R[r][1]) + 1))
         self.precompute_next_items()
@@ -185,6 +247,14 @@ class Parser(object):
             self.LR0_idx[s] = i
         self.initial_state = self.index(self.initial_items)
         self.compute_ACTION()
+        if optimize:
+            self.compact_ACTION()
+
+    def compiled_state(self):
+        """
+            Everything needed to restore this parser without recompiling the grammar.
+        """
+        return dict((name, getattr(self, name)) for name in self.COMPILED_ATTRIBUTES)
 
     def __str__(self):
         return '\n'.join(self.R[r][0] + ' = ' + ' '.join(self.R[r][1])
@@ -192,15 +262,24 @@ class Parser(object):
 
     def conflicts(self):
         "Returns the list of conflicts in the ACTION table."
-        return filter(lambda i, t: len(self.ACTION[i][t]) > 1,
-                      ((i, t) for i, row in enumerate(self.ACTION)
-                       for t in row.iterkeys()))
+        return [(i, t) for i, row in enumerate(self.ACTION) for t in sorted(row) if len(row[t]) > 1]
 
     def count_conflicts(self):
         "Returns the count of conflicts in the ACTION table."
-        return functools.reduce(lambda a, b: a + (len(b) > 1 and 1 or 0),
-                      (a for row in self.ACTION for a in row.itervalues()),
-                      0)
+        return sum(1 for row in self.ACTION for a in row.values() if len(a) > 1)
+
+    def conflict_rules(self):
+        """
+            Conflicts with their type and rules: (state, token, 'S/R' or 'R/R', reduced rules, shift states).
+        """
+        result = []
+        for i, t in self.conflicts():
+            actions = self.ACTION[i][t]
+            reduced = tuple(a[1] for a in actions if a[0] == 'R')
+            shifted = tuple(a[1] for a in actions if a[0] == 'S')
+            if reduced and (shifted or len(reduced) > 1):
+                result.append((i, t, shifted and 'S/R' or 'R/R', reduced, shifted))
+        return result
 
     def resolve_SR_conflicts(self, favor='S'):
         for s, k in self.conflicts():
@@ -338,6 +417,24 @@ class Parser(object):
             # commit
             self.ACTION.append(action)
 
+    def compact_ACTION(self):
+        """
+            Make ACTION rows sparse and share identical rows between states.
+        """
+        rows = {}
+        for s, action in enumerate(self.ACTION):
+            row = ActionRow((kw, actions) for kw, actions in action.items() if actions)
+            key = tuple(sorted((kw, tuple(actions)) for kw, actions in row.items()))
+            self.ACTION[s] = rows.setdefault(key, row)
+
+    def table_stats(self):
+        """
+            Sizes of the compiled grammar: rules, LR(0) states, distinct ACTION rows and non-empty cells.
+        """
+        rows = dict((id(row), row) for row in self.ACTION)
+        entries = sum(1 for row in rows.values() for actions in row.values() if actions)
+        return TableStats(self.R.rules_count, len(self.LR0), len(rows), entries)
+
     def action_to_str(self):
         """
             Stringify the ACTION/GOTO table for pretty-print.
@@ -20,6 +20,7 @@ class Stack(object):
         self.A = A
         self.count_active = 0
         self.previously_active = []
+        self.count_nodes = 0
 
     def enumerate_active(self):
         i = 0
@@ -31,6 +32,7 @@ class Stack(object):
         sit = StackItem(set([source]), token)
         sis = StackItem(set([sit]), state)
         self.active.append(sis)
+        self.count_nodes += 2
 
     def rec_path(self, node, n):
         # print "rec_path(%s, %s)" % (str(node), str(n))
@@ -144,7 +144,6 @@ def test4():
 
 # TODO: validate symbols matching in tokenizer and grammar
 # TODO: calculate overall probability of syntax tree from rule weight
-# TODO: support multiple tokens per position (to resolve morph ambiguity and dictionary ambiguity)
 # TODO: support token lattice (resolve combined and split tokens ambiguity)
 
 print('test 1')
@@ -0,0 +1,62 @@
+# coding=utf-8
+u"""
+Coroutines give the same trees as parse, in slices of tokens between which the event loop runs
+>>> text = '''
+... S = NP VP
+... S = S PP
+... NP = n
+... NP = NP PP
+... PP = prep NP
+... VP = v NP
+... '''
+>>> grammar = GrammarParser().set_log_level(0).parse(text)
+>>> parser = Parser(grammar)
+>>> tokens = [Token(s, s + str(i)) for i, s in enumerate('n v n prep n . n v n prep n'.split())] + [Token('$')]
+>>> asyncio.run(aparse(parser, tokens, yield_every=2)) == parser.parse(tokens)
+True
+>>> async def stream():
+...     return [syntax_tree async for syntax_tree in aparse_stream(parser, tokens, yield_every=2)]
+>>> asyncio.run(stream()) == list(parser.parse_stream(tokens))
+True
+
+Cancelled task stops at the next slice
+>>> def endless():
+...     while True:
+...         for symbol in 'n v n prep n .'.split():
+...             yield Token(symbol, symbol)
+>>> async def cancelled():
+...     task = asyncio.ensure_future(aparse(parser, endless()))
+...     await asyncio.sleep(0.01)
+...     task.cancel()
+...     try:
+...         await task
+...     except asyncio.CancelledError:
+...         return True
+>>> asyncio.run(cancelled())
+True
+
+Trees of an exponential forest are enumerated in slices as well, in the event loop thread or in an executor
+>>> ambiguous = [Token(s, s + str(i)) for i, s in enumerate(('n v n' + ' prep n' * 13).split())] + [Token('$')]
+>>> async def cancelled_trees(executor=None):
+...     started = time.perf_counter()
+...     task = asyncio.ensure_future(aparse(parser, ambiguous, full_math=True, executor=executor))
+...     await asyncio.sleep(0.2)
+...     task.cancel()
+...     await asyncio.gather(task, return_exceptions=True)
+...     if executor is not None:
+...         await asyncio.get_running_loop().run_in_executor(executor, int)
+...     return task.cancelled(), time.perf_counter() - started < 5
+>>> asyncio.run(cancelled_trees())
+(True, True)
+>>> with ThreadPoolExecutor(1) as executor:
+...     asyncio.run(cancelled_trees(executor))
+(True, True)
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from glr.aio import aparse, aparse_stream
+from glr.grammar_parser import GrammarParser
+from glr.parser import Parser
+from glr.tokenizer import Token
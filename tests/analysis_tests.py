@@ -0,0 +1,60 @@
+# coding=utf-8
+u"""
+Conflicts by state and rule, PP attachment makes S = S PP compete with NP = NP PP
+>>> text = '''
+... S = NP VP
+... S = S PP
+... NP = n
+... NP = det n
+... NP = NP PP
+... PP = prep NP
+... VP = v NP
+... '''
+>>> grammar = GrammarParser().set_log_level(0).parse(text)
+>>> analyzer = GrammarAnalyzer(Parser(grammar))
+>>> for conflict in analyzer.conflicts():
+...     print(conflict)
+Conflict(state=11, symbol='prep', type='S/R', reduce_rules=(6,), shift_rules=(5,))
+Conflict(state=12, symbol='prep', type='S/R', reduce_rules=(7,), shift_rules=(5,))
+>>> analyzer.ambiguous_pairs()
+OrderedDict([((2, 5), {'prep'})])
+
+GSS width and ranked rule costs on a corpus
+>>> tokens = lambda symbols: [Token(s, s) for s in symbols.split()] + [Token('$')]
+>>> corpus = [tokens('n v det n prep n'), tokens('n v n prep n prep n')]
+>>> print(analyzer.report(corpus, full_math=True))
+Conflicts: 2
+┌───────┬────────┬──────┬────────┬───────┐
+│ State │ Symbol │ Type │ Reduce │ Shift │
+├───────┼────────┼──────┼────────┼───────┤
+│ 11    │ prep   │ S/R  │ #6     │ #5    │
+│ 12    │ prep   │ S/R  │ #7     │ #5    │
+└───────┴────────┴──────┴────────┴───────┘
+Ambiguous rule pairs: 1
+  #2: S = S PP  <>  #5: NP = NP PP  on prep
+GSS width: mean 2.73, max 7 over 15 tokens in 2 sentences
+Rule costs:
+┌──────┬──────────────────┬────────────┬───────────┬───────────┐
+│ Rank │ Rule             │ Reductions │ Conflicts │ Ambiguous │
+├──────┼──────────────────┼────────────┼───────────┼───────────┤
+│ 1    │ #6: PP = prep NP │ 9          │ 1         │ 0         │
+│ 2    │ #3: NP = n       │ 6          │ 0         │ 0         │
+│ 3    │ #5: NP = NP PP   │ 5          │ 2         │ 1         │
+│ 4    │ #7: VP = v NP    │ 5          │ 1         │ 0         │
+│ 5    │ #1: S = NP VP    │ 5          │ 0         │ 0         │
+│ 6    │ #2: S = S PP     │ 4          │ 0         │ 1         │
+│ 7    │ #4: NP = det n   │ 1          │ 0         │ 0         │
+└──────┴──────────────────┴────────────┴───────────┴───────────┘
+
+glrengine lists its conflicts too
+>>> engine_parser = EngineParser('S', 'S = NP VP | S PP\\nNP = noun | NP PP\\nPP = prep NP\\nVP = verb NP')
+>>> engine_parser.count_conflicts()
+2
+>>> [(token, kind) for state, token, kind, reduced, shifted in engine_parser.conflict_rules()]
+[('prep', 'S/R'), ('prep', 'S/R')]
+"""
+from glr.analysis import GrammarAnalyzer
+from glr.grammar_parser import GrammarParser
+from glr.parser import Parser
+from glr.tokenizer import Token
+from glrengine.parser import Parser as EngineParser
@@ -0,0 +1,33 @@
+# coding=utf-8
+u"""
+Worker processes give the same results as parse, in order of texts
+>>> dictionaries = {u"CLOTHES": [u"куртка", u"пальто", u"шубы"]}
+>>> texts = [u"синяя пальто", u"красная куртка", u"куртка красная", u"шубы"] * 3
+>>> parser = GLRParser(u"S = adj CLOTHES", dictionaries=dictionaries)
+>>> list(parser.parse_many(texts, workers=2, chunksize=2)) == [parser.parse(text) for text in texts]
+True
+>>> grammar_parser = GrammarParser().set_log_level(0)
+>>> automation = Automation(u"S = adj<agr-gnc=1> CLOTHES\\nS = CLOTHES adj<agr-gnc=-1>", dictionaries)
+>>> list(automation.parse_many(texts, workers=2)) == [automation.parse(text) for text in texts]
+True
+
+Unordered results are (index, result) pairs in order of completion
+>>> pairs = list(parser.parse_many(texts, workers=2, ordered=False))
+>>> sorted(index for index, result in pairs) == list(range(len(texts)))
+True
+>>> all(result == parser.parse(texts[index]) for index, result in pairs)
+True
+
+One worker parses in this process with the parser itself, it needs neither init_args nor compiled tables
+>>> class Upper(object):
+...     def parse(self, text, max_results=None):
+...         return text.upper()
+>>> list(parse_many(Upper(), [u"a", u"b"], workers=1, parse_args=dict(max_results=1)))
+['A', 'B']
+>>> list(parse_many(Upper(), [u"a", u"b"], workers=1, ordered=False))
+[(0, 'A'), (1, 'B')]
+"""
+from glr.automation import Automation
+from glr.batch import parse_many
+from glr.grammar_parser import GrammarParser
+from glr_parser import GLRParser
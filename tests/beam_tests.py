@@ -0,0 +1,55 @@
+# coding=utf-8
+u"""
+Beam keeps stack heads with the best rule weights
+>>> text = '''
+... S = X c
+... S = Y c
+... X = a b (3)
+... Y = a b
+... '''
+>>> grammar = GrammarParser().set_log_level(0).parse(text)
+>>> tokens = lambda symbols: [Token(s, s + str(i)) for i, s in enumerate(symbols.split())] + [Token('$')]
+>>> first_symbols = lambda parser: [tree.children[0].symbol for tree in parser.parse(tokens('a b c'), full_math=True)]
+>>> first_symbols(Parser(grammar))
+['X', 'Y']
+>>> first_symbols(Parser(grammar, beam_size=1))
+['X']
+
+Heads within the margin survive, log(3) is about 1.1
+>>> first_symbols(Parser(grammar, beam_margin=1.0))
+['X']
+>>> first_symbols(Parser(grammar, beam_margin=1.5))
+['X', 'Y']
+
+Beam bounds stack width per token, start nodes are kept on top of it
+>>> text = '''
+... S = NP VP
+... S = S PP
+... NP = n
+... NP = NP PP
+... NP = NP NP
+... PP = prep NP
+... VP = v NP
+... VP = VP NP
+... '''
+>>> grammar = GrammarParser().set_log_level(0).parse(text)
+>>> symbols = 'n v n n prep n n prep n v n prep n n'
+>>> for parser in (Parser(grammar), Parser(grammar, beam_size=2)):
+...     stats = ParseStats()
+...     forest = parser.parse_forest(tokens(symbols), stats=stats)
+...     print(max(stats.widths), forest.count_trees())
+11 219
+3 2
+
+Scores are computed without recursion, also when a budget turns the beam on deep in a left-recursive chain
+>>> chain = GrammarParser().set_log_level(0).parse('S = S a | a')
+>>> chain_tokens = [Token('a', 'a%d' % i) for i in range(2000)] + [Token('$')]
+>>> forest = Parser(chain).parse_forest(chain_tokens, full_math=True,
+...                                     budget=ParseBudget(max_reductions=1900, action='beam', beam_size=2))
+>>> forest.roots, forest.exceeded
+([S[0:2000]], 'reductions')
+"""
+from glr.budget import ParseBudget
+from glr.grammar_parser import GrammarParser
+from glr.parser import Parser, ParseStats
+from glr.tokenizer import Token
@@ -0,0 +1,66 @@
+# coding=utf-8
+u"""
+Parse budgets bound one call, the result tells which budget was hit
+>>> text = '''
+... S = NP VP
+... S = S PP
+... NP = n
+... NP = NP PP
+... PP = prep NP
+... VP = v NP
+... '''
+>>> grammar = GrammarParser().set_log_level(0).parse(text)
+>>> parser = Parser(grammar)
+>>> tokens = lambda symbols: [Token(s, s + str(i)) for i, s in enumerate(symbols.split())] + [Token('$')]
+>>> sentence = tokens('n v n' + ' prep n' * 8)
+>>> result = parser.parse(sentence, full_math=True)
+>>> len(result), result.exceeded
+(4862, None)
+
+Truncate keeps what was accepted so far, at most max_trees trees
+>>> result = parser.parse(sentence, full_math=True, budget=ParseBudget(max_trees=3))
+>>> len(result), result.exceeded
+(3, 'trees')
+>>> result = parser.parse(sentence, full_math=True, budget=ParseBudget(max_reductions=100))
+>>> len(result), result.exceeded
+(0, 'reductions')
+>>> forest = parser.parse_forest(sentence, full_math=True, budget=ParseBudget(deadline=0.0))
+>>> forest.roots, forest.exceeded
+([], 'deadline')
+
+Trees of an exponential forest are enumerated within the deadline too
+>>> started = time.perf_counter()
+>>> result = parser.parse(tokens('n v n' + ' prep n' * 13), full_math=True, budget=ParseBudget(deadline=0.2))
+>>> result.exceeded, len(result) < 2674440, time.perf_counter() - started < 5
+('deadline', True, True)
+
+Beam goes on with pruned stack and a fresh allowance
+>>> stats = ParseStats()
+>>> result = parser.parse(sentence, full_math=True, stats=stats, budget=ParseBudget(max_nodes=40, action='beam',
+...                                                                                 beam_size=2))
+>>> len(result), result.exceeded, max(stats.widths[-5:])
+(2094, 'nodes', 2)
+
+Actions are chosen per budget
+>>> budget = ParseBudget(max_nodes=10, max_trees=1, actions={'nodes': 'raise'})
+>>> parser.parse(sentence, full_math=True, budget=budget)
+Traceback (most recent call last):
+...
+glr.budget.BudgetExceeded: Parse budget exceeded: nodes
+
+Streams stop at the limit
+>>> len(list(parser.parse_stream(tokens('n v n prep n prep n'), budget=ParseBudget(max_trees=2))))
+2
+
+Stack levels released by streams still count in the nodes budget
+>>> pairs = Parser(GrammarParser().set_log_level(0).parse('S = a b'))
+>>> result = pairs.parse(tokens(' a b' * 150), max_results=100, budget=ParseBudget(max_nodes=100))
+>>> len(result), result.exceeded
+(25, 'nodes')
+"""
+import time
+
+from glr.budget import ParseBudget
+from glr.grammar_parser import GrammarParser
+from glr.parser import Parser, ParseStats
+from glr.tokenizer import Token
@@ -0,0 +1,55 @@
+# coding=utf-8
+u"""
+Compiled grammars are stored in the in-process registry and, optionally, on disk
+>>> import tempfile
+>>> text = '''
+... S = NP VP
+... NP = n | det n
+... VP = v NP
+... '''
+>>> key = grammar_key('glr', text, None, 'S')
+>>> key == grammar_key('glr', text, {}, 'S')
+True
+>>> key == grammar_key('glr', text, {'D': ['a']}, 'S')
+False
+
+>>> def compile_grammar():
+...     grammar = GrammarParser().set_log_level(0).parse(text, 'S')
+...     return grammar, Parser(grammar).action_goto_table
+>>> cache_dir = tempfile.mkdtemp()
+>>> grammar, action_goto_table = CompiledGrammarCache(cache_dir).get_or_compile(key, compile_grammar)
+>>> CompiledGrammarCache().load(key)[1] is action_goto_table
+True
+
+Artifact is loaded from disk without recompilation once the registry is empty
+>>> clear_registry()
+>>> loaded_grammar, loaded_table = CompiledGrammarCache(cache_dir).get_or_compile(key, None)
+>>> loaded_grammar.rules == grammar.rules
+True
+>>> print( format_action_goto_table(loaded_table) == format_action_goto_table(action_goto_table) )
+True
+>>> CompiledGrammarCache().load(grammar_key('glr', text, None, 'NP')) is None
+True
+
+A truncated or corrupt artifact is recompiled and overwritten
+>>> path = CompiledGrammarCache(cache_dir).path(key)
+>>> with open(path, 'rb') as f:
+...     artifact = f.read()
+>>> for corrupt in [b'', artifact[:len(artifact) // 2], artifact[:8] + b'not a pickle']:
+...     clear_registry()
+...     with open(path, 'wb') as f:
+...         _ = f.write(corrupt)
+...     print(CompiledGrammarCache(cache_dir).load(key))
+None
+None
+None
+>>> clear_registry()
+>>> _ = CompiledGrammarCache(cache_dir).get_or_compile(key, compile_grammar)
+>>> clear_registry()
+>>> CompiledGrammarCache(cache_dir).get_or_compile(key, None)[0].rules == grammar.rules
+True
+"""
+from glr.cache import CompiledGrammarCache, grammar_key, clear_registry
+from glr.grammar_parser import GrammarParser
+from glr.parser import Parser
+from glr.utils import format_action_goto_table
@@ -0,0 +1,72 @@
+# coding=utf-8
+u"""
+Compiled table can be turned into a specialized parser module
+>>> text = '''
+... S = NP VP
+... S = S PP
+... NP = n
+... NP = det n
+... NP = NP PP
+... PP = prep NP
+... VP = v NP
+... '''
+>>> grammar = GrammarParser().set_log_level(0).parse(text)
+>>> parser = Parser(grammar)
+>>> source = generate_parser_source(grammar, parser.table)
+>>> print(source[source.index('def reduce_5'):source.index('def reduce_6')].strip())
+def reduce_5(gss, edges):
+    edge_prevs, labels, states = gss.edge_prevs, gss.labels, gss.states
+    for e2 in edges:
+        c1 = edge_prevs[e2]
+        for e1 in gss.edges(c1):
+            base = edge_prevs[e1]
+            goto_state = GOTO_2.get(states[base], -1)
+            if goto_state >= 0:
+                yield base, goto_state, (labels[e1], labels[e2])
+
+Generated module gives the same trees, also for minimized tables
+>>> directory = tempfile.mkdtemp()
+>>> tokens = lambda symbols: [Token(s, s + str(i)) for i, s in enumerate(symbols.split())] + [Token('$')]
+>>> for optimize in (False, True):
+...     parser = Parser(grammar, optimize=optimize)
+...     path = os.path.join(directory, 'np_parser_%d.py' % optimize)
+...     write_parser_module(path, grammar, parser.table)
+...     module = load_parser_module(path)
+...     for symbols in ('n v det n prep n', 'n v n prep n prep n', 'x n v n y n v n prep n'):
+...         for full_math in (True, False):
+...             print(optimize, full_math, module.parse(tokens(symbols), full_math) == parser.parse(tokens(symbols), full_math))
+False True True
+False False True
+False True True
+False False True
+False True True
+False False True
+True True True
+True False True
+True True True
+True False True
+True True True
+True False True
+
+Generated parse() has no budgets, so the result is never truncated
+>>> result = module.parse(tokens('n v n'))
+>>> type(result).__name__, len(result), result.exceeded
+('ParseResult', 1, None)
+
+Generated module is not a replacement for the parser of an automation
+>>> automation = Automation(u'S = adj noun')
+>>> automation.parser = module
+Traceback (most recent call last):
+...
+TypeError: Automation.parser must be a glr.parser.Parser, call parse() of a generated parser module on lexer.scan(text) instead
+>>> shutil.rmtree(directory)
+"""
+import os
+import shutil
+import tempfile
+
+from glr.automation import Automation
+from glr.codegen import generate_parser_source, write_parser_module, load_parser_module
+from glr.grammar_parser import GrammarParser
+from glr.parser import Parser
+from glr.tokenizer import Token
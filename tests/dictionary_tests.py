@@ -0,0 +1,16 @@
+# coding=utf-8
+u"""
+Dictionaries are resolved by lemma in the normalizer, grammar sees one terminal per dictionary
+>>> dictionaries = {u"CLOTHES": [u"куртка", u"пальто", u"шубы"]}
+>>> parser = GLRParser(u"S = adj CLOTHES", dictionaries=dictionaries)
+>>> sorted(parser.glr.dictionary_lookup.items())
+[('куртка', frozenset({'CLOTHES'})), ('пальто', frozenset({'CLOTHES'})), ('шуба', frozenset({'CLOTHES'}))]
+>>> parser.parse(u"на вешалке висят пять курток и красная шуба")
+['красная шуба']
+
+Table size does not depend on dictionary size
+>>> large = {u"CLOTHES": [u"слово%d" % i for i in range(1000)] + [u"шуба"]}
+>>> GLRParser(u"S = adj CLOTHES", dictionaries=large).glr.kw_set == parser.glr.kw_set
+True
+"""
+from glr_parser import GLRParser
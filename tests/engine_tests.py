@@ -0,0 +1,31 @@
+# coding=utf-8
+u"""
+Match attempts start at each token and run side by side, results are the ones of restarting the parse
+one word later after each match or failure. A result found while an earlier attempt is alive waits for it.
+>>> parser = GLRParser(u"S = adj noun verb noun | noun verb")
+>>> parser.parse(u"большая собака ест кость и")
+['большая собака ест кость ', 'собака ест ']
+>>> parser.parse(u"большая собака ест кость и", max_results=1)
+['большая собака ест кость ']
+
+The attempt reaching the end of the text is the last one, results of attempts started after it are dropped
+>>> parser.parse(u"большая собака ест кость")
+['большая собака ест кость']
+
+A failed label check ends its own attempt only
+>>> agreement = GLRParser(u"S = adj<agr-gnc=1> noun\\nS = noun verb")
+>>> agreement.parse(u"красивый кошка спит"), agreement.parse(u"красивая кошка спит")
+(['кошка спит'], ['красивая кошка ', 'кошка спит'])
+
+Budgets count results and stacks of all attempts
+>>> for budget in [ParseBudget(max_trees=1), ParseBudget(max_nodes=10), ParseBudget(max_reductions=0),
+...                ParseBudget(deadline=0.0)]:
+...     result = parser.parse(u"большая собака ест кость и", budget)
+...     print(result, result.exceeded)
+['большая собака ест кость '] trees
+[] nodes
+[] reductions
+[] deadline
+"""
+from glr.budget import ParseBudget
+from glr_parser import GLRParser
@@ -0,0 +1,68 @@
+# coding=utf-8
+u"""
+Parse forest shares one node per symbol and span, so it stays small when trees multiply
+>>> text = '''
+... S = NP VP
+... S = S PP
+... NP = n
+... NP = det n
+... NP = NP PP
+... PP = prep NP
+... VP = v NP
+... '''
+>>> grammar = GrammarParser().set_log_level(0).parse(text)
+>>> parser = Parser(grammar)
+>>> tokens = lambda symbols: [Token(s, s + str(i)) for i, s in enumerate(symbols.split())] + [Token('$')]
+>>> forest = parser.parse_forest(tokens('n v det n prep det n prep det n'), full_math=True)
+>>> forest.roots
+[S[0:10]]
+>>> forest.count_trees(), len(forest.nodes())
+(5, 26)
+
+Trees are enumerated lazily and are the same as trees of parse()
+>>> trees = forest.trees()
+>>> print(format_syntax_tree(next(trees)))  # doctest: +NORMALIZE_WHITESPACE
+  S
+  ├──S
+  │  ├──S
+  │  │  ├──NP
+  │  │  │  ╰──n
+  │  │  ╰──VP
+  │  │     ├──v
+  │  │     ╰──NP
+  │  │        ├──det
+  │  │        ╰──n
+  │  ╰──PP
+  │     ├──prep
+  │     ╰──NP
+  │        ├──det
+  │        ╰──n
+  ╰──PP
+     ├──prep
+     ╰──NP
+        ├──det
+        ╰──n
+>>> sorted(forest) == sorted(parser.parse(tokens('n v det n prep det n prep det n'), full_math=True))
+True
+
+Catalan number of trees on a polynomial forest
+>>> forest = parser.parse_forest(tokens('n v n' + ' prep n' * 12), full_math=True)
+>>> forest.count_trees(), len(forest.nodes())
+(742900, 223)
+
+Without full match every accepted span is a root, each derivation is kept once
+>>> forest = parser.parse_forest(tokens('n v n prep n prep n prep n'))
+>>> forest.count_trees(), len(parser.parse(tokens('n v n prep n prep n prep n')))
+(22, 22)
+
+Forests are walked with explicit stacks, so a left-recursive chain is not bounded by the recursion limit
+>>> chain = GrammarParser().set_log_level(0).parse('S = S a | a')
+>>> chain_tokens = [Token('a', 'a%d' % i) for i in range(2000)] + [Token('$')]
+>>> forest = Parser(chain).parse_forest(chain_tokens, full_math=True)
+>>> forest.count_trees(), len(list(forest.trees())), len(Parser(chain).parse(chain_tokens, full_math=True))
+(1, 1, 1)
+"""
+from glr.grammar_parser import GrammarParser
+from glr.parser import Parser
+from glr.tokenizer import Token
+from glr.utils import format_syntax_tree
@@ -0,0 +1,90 @@
+# coding=utf-8
+u"""
+Rules can be added to and removed from a compiled parser, states not touched by the change are reused
+and keep their numbers, so states are compared with a full rebuild by their kernels
+>>> text = '''
+... S = NP VP
+... NP = n
+... NP = det n
+... VP = v NP
+... '''
+>>> grammar_parser = GrammarParser().set_log_level(0)
+>>> parser = Parser(grammar_parser.parse(text))
+>>> def actions_by_kernel(parser):
+...     table = parser.table
+...     def kernel(state):
+...         return table.kernels[state] if state >= 0 else None
+...     return dict((table.kernels[state], (table.accepts[state], sorted(
+...         (symbol, kernel(table.get_shift(state, symbol_id)), kernel(table.get_goto(state, symbol_id)),
+...          sorted(table.get_reduces(state, symbol_id))) for symbol, symbol_id in table.symbol_ids.items())))
+...         for state in range(table.states_count))
+>>> def full_rebuild_matches(parser):
+...     rebuilt = Parser(parser.grammar, lookahead=parser.lookahead, optimize=parser.optimize)
+...     return actions_by_kernel(parser) == actions_by_kernel(rebuilt)
+
+>>> parser.add_rules(grammar_parser.parse('''
+... S = S PP
+... NP = NP PP
+... PP = prep NP
+... ''').rules[1:])
+>>> print( format_grammar(parser.grammar) )
+#0: @  = S
+#1: S  = NP VP
+#2: NP = n
+#3: NP = det n
+#4: VP = v NP
+#5: S  = S PP
+#6: NP = NP PP
+#7: PP = prep NP
+>>> full_rebuild_matches(parser)
+True
+>>> tokens = [Token(s, s) for s in 'n v det n prep n'.split()] + [Token('$')]
+>>> len(parser.parse(tokens, full_math=True))
+2
+
+>>> parser.remove_rules([5])
+>>> print( format_grammar(parser.grammar) )
+#0: @  = S
+#1: S  = NP VP
+#2: NP = n
+#3: NP = det n
+#4: VP = v NP
+#5: NP = NP PP
+#6: PP = prep NP
+>>> full_rebuild_matches(parser)
+True
+>>> len(parser.parse(tokens, full_math=True))
+1
+
+Kept states keep their numbers. Here the state after "n" gets a new kernel in place of the old one,
+and the state after "n n" is appended
+>>> kernels = parser.table.kernels
+>>> parser.add_rules(grammar_parser.parse('NP = n n').rules[1:])
+>>> [(state, kernel, parser.table.kernels[state]) for state, kernel in enumerate(kernels)
+...  if parser.table.kernels[state] != kernel]
+[(3, ((2, 1),), ((2, 1), (7, 1)))]
+>>> parser.table.kernels[len(kernels):]
+(((7, 2),),)
+>>> full_rebuild_matches(parser)
+True
+
+LALR(1) tables are recompiled too
+>>> parser = Parser(grammar_parser.parse(text), lookahead='lalr')
+>>> parser.add_rules(grammar_parser.parse('VP = v').rules[1:])
+>>> full_rebuild_matches(parser)
+True
+>>> parser.remove_rules([1])
+>>> full_rebuild_matches(parser)
+True
+
+A table stored without the parser's states is rebuilt from scratch on the first change
+>>> parser = Parser(grammar_parser.parse(text), optimize=True)
+>>> parser = Parser(parser.grammar, action_goto_table=parser.action_goto_table, table=parser.table, optimize=True)
+>>> parser.add_rules(grammar_parser.parse('VP = v').rules[1:])
+>>> full_rebuild_matches(parser)
+True
+"""
+from glr.grammar_parser import GrammarParser
+from glr.parser import Parser
+from glr.tokenizer import Token
+from glr.utils import format_grammar
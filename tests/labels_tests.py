@@ -0,0 +1,42 @@
+# coding=utf-8
+u"""
+Labels of a rule compile into one validator of the tokens of its symbols
+>>> Tag = namedtuple('Tag', ['case', 'gender', 'number'])
+>>> tokens = [Token('adj', u'красный', 0, 7, u'Красная', Tag('nomn', 'femn', 'sing')),
+...           Token('noun', u'шапка', 8, 13, u'шапка', Tag('nomn', 'femn', 'sing')),
+...           Token('noun', u'шапки', 14, 19, u'шапки', Tag('gent', 'femn', 'sing'))]
+>>> validate = compile_labels([{'reg-h-first': [None], 'agr-gnc': ['1']}, {'gram': ['nomn'], 'regex': [u'^ш']}])
+>>> validate(tokens[:2]), validate([tokens[0], tokens[2]])
+(True, False)
+
+A symbol with labels fails on a nonterminal, which has no token
+>>> validate([tokens[0], None])
+False
+
+Results are those of LABELS_CHECK
+>>> all(compile_label(key, value, 0)(tokens) == LABELS_CHECK[key](value, tokens, 0)
+...     for key, value in [('gram', 'femn'), ('gram', 'plur'), ('gram-not', 'plur'), ('reg-l-all', None),
+...                        ('reg-h-all', None), ('regex', u'^К'), ('agr-c', '2'), ('agr-gn', '2'), ('agr-gnc', '1')])
+True
+
+Checks run cheapest first, malformed labels keep their order and fail as before
+>>> compile_labels([{'regex': [u'^к']}, {'gram': ['plur']}])(tokens[:2])
+False
+>>> compile_labels([{'unknown': ['x']}, {'gram': ['plur']}])(tokens[:2])
+Traceback (most recent call last):
+...
+KeyError: 'unknown'
+
+glrengine checks its (names, value, offset, tag, text) tuples with the same validators
+>>> engine_tokens = [(set([token.symbol]), token.value, token.start, token.params, token.input_term)
+...                  for token in tokens]
+>>> engine_validate = compile_engine_labels([{'reg-h-first': [None], 'agr-gnc': ['1']},
+...                                          {'gram': ['nomn'], 'regex': [u'^ш']}])
+>>> engine_validate(engine_tokens[:2]), engine_validate([engine_tokens[0], engine_tokens[2]])
+(True, False)
+"""
+from collections import namedtuple
+
+from glr.labels import LABELS_CHECK, compile_label, compile_labels
+from glr.tokenizer import Token
+from glrengine.labels import compile_labels as compile_engine_labels
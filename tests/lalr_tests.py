@@ -0,0 +1,74 @@
+# coding=utf-8
+u"""
+Classic grammar which is not SLR(1): default tables keep a shift/reduce conflict on "eq" in state 2
+>>> text = '''
+... S = L eq R | R
+... L = star R | id
+... R = L
+... '''
+>>> grammar = GrammarParser().set_log_level(0).parse(text)
+>>> print( format_action_goto_table(generate_action_goto_table(grammar)) )
+┌───┬──────┬────┬────────┬────┬───┬───┬───┐
+│   │ star │ id │ eq     │ $  │ S │ L │ R │
+├───┼──────┼────┼────────┼────┼───┼───┼───┤
+│ 0 │ S4   │ S5 │        │    │ 1 │ 2 │ 3 │
+│ 1 │      │    │        │ A  │   │   │   │
+│ 2 │      │    │ R5, S6 │ R5 │   │   │   │
+│ 3 │      │    │        │ R2 │   │   │   │
+│ 4 │ S4   │ S5 │        │    │   │ 8 │ 7 │
+│ 5 │      │    │ R4     │ R4 │   │   │   │
+│ 6 │ S4   │ S5 │        │    │   │ 8 │ 9 │
+│ 7 │      │    │ R3     │ R3 │   │   │   │
+│ 8 │      │    │ R5     │ R5 │   │   │   │
+│ 9 │      │    │        │ R1 │   │   │   │
+└───┴──────┴────┴────────┴────┴───┴───┴───┘
+
+LALR(1) lookaheads remove it
+>>> print( format_action_goto_table(generate_action_goto_table(grammar, 'lalr')) )
+┌───┬──────┬────┬────┬────┬───┬───┬───┐
+│   │ star │ id │ eq │ $  │ S │ L │ R │
+├───┼──────┼────┼────┼────┼───┼───┼───┤
+│ 0 │ S4   │ S5 │    │    │ 1 │ 2 │ 3 │
+│ 1 │      │    │    │ A  │   │   │   │
+│ 2 │      │    │ S6 │ R5 │   │   │   │
+│ 3 │      │    │    │ R2 │   │   │   │
+│ 4 │ S4   │ S5 │    │    │   │ 8 │ 7 │
+│ 5 │      │    │ R4 │ R4 │   │   │   │
+│ 6 │ S4   │ S5 │    │    │   │ 8 │ 9 │
+│ 7 │      │    │ R3 │ R3 │   │   │   │
+│ 8 │      │    │ R5 │ R5 │   │   │   │
+│ 9 │      │    │    │ R1 │   │   │   │
+└───┴──────┴────┴────┴────┴───┴───┴───┘
+>>> for mode, stats in lookahead_report(grammar).items():
+...     print(mode, stats)
+slr TableStats(states=10, shifts=7, gotos=7, reduces=10, accepts=1, conflicts=1)
+lalr TableStats(states=10, shifts=7, gotos=7, reduces=9, accepts=1, conflicts=0)
+
+Unconditional reduces on "$" are dropped where a rule can not end the root symbol
+>>> text = '''
+... S = A x | B y
+... A = a
+... B = a
+... '''
+>>> grammar = GrammarParser().parse(text)
+>>> for mode, stats in lookahead_report(grammar).items():
+...     print(mode, stats)
+slr TableStats(states=7, shifts=3, gotos=3, reduces=6, accepts=1, conflicts=1)
+lalr TableStats(states=7, shifts=3, gotos=3, reduces=4, accepts=1, conflicts=0)
+
+FIRST and FOLLOW sets
+>>> sorted(generate_starters(grammar)['S'])
+['a']
+>>> sorted((k, sorted(v)) for k, v in generate_followers(grammar).items())
+[('@', []), ('A', ['x']), ('B', ['y']), ('S', [])]
+
+Both modes produce the same trees
+>>> parse = lambda parser, symbols: parser.parse([Token(s, s) for s in symbols.split()] + [Token('$')], full_math=True)
+>>> parse(Parser(grammar), 'a y') == parse(Parser(grammar, lookahead='lalr'), 'a y')
+True
+"""
+from glr.grammar_parser import GrammarParser
+from glr.lr import generate_action_goto_table, generate_starters, generate_followers, lookahead_report
+from glr.parser import Parser
+from glr.tokenizer import Token
+from glr.utils import format_action_goto_table
@@ -0,0 +1,36 @@
+# coding=utf-8
+u"""
+Lattice position is a list of alternative tokens, all of them are shifted in one pass
+>>> text = '''
+... S = NP VP
+... NP = n
+... NP = adj n
+... VP = v
+... VP = v NP
+... '''
+>>> grammar = GrammarParser().set_log_level(0).parse(text)
+>>> parser = Parser(grammar)
+>>> lattice = [Token('adj', 'steel'), [Token('n', 'steel'), Token('v', 'became')],
+...            [Token('n', 'stronger'), Token('v', 'became')], Token('$')]
+>>> for syntax_tree in parser.parse(lattice, full_math=True):
+...     print(' '.join(child.token.value for child in leaves(syntax_tree)))
+steel steel became
+
+Alternatives with the same symbol are kept apart, validator sees each of them
+>>> steel = [Token('n', 'steel', params='gent'), Token('n', 'steel', params='nomn')]
+>>> lattice = [steel, Token('v', 'became'), Token('$')]
+>>> validator = lambda tree: tree.rule_index != 2 or tree.children[0].token.params == 'nomn'
+>>> [leaves(syntax_tree)[0].token.params for syntax_tree in parser.parse(lattice, True, validator)]
+['nomn']
+>>> len(parser.parse(lattice, True))
+2
+"""
+from glr.grammar_parser import GrammarParser
+from glr.parser import Parser
+from glr.tokenizer import Token
+
+
+def leaves(syntax_tree):
+    if syntax_tree.is_leaf():
+        return [syntax_tree]
+    return [leaf for child in syntax_tree.children for leaf in leaves(child)]
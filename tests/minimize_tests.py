@@ -0,0 +1,56 @@
+# coding=utf-8
+u"""
+Rules unreachable from the root or unable to derive terminals are pruned
+>>> text = '''
+... S = NP VP
+... S = S PP
+... NP = n
+... NP = det n
+... NP = NP PP
+... PP = prep NP
+... VP = v NP
+... VP = v Loop
+... Loop = Loop n
+... Orphan = n
+... '''
+>>> grammar = GrammarParser().set_log_level(0).parse(text)
+>>> [format_rule(grammar[index]) for index in range(len(grammar.rules)) if index not in find_useful_rules(grammar)]
+['#8: VP = v Loop', '#9: Loop = Loop n', '#10: Orphan = n']
+
+Minimized table has fewer states and entries, single-reduce states reduce on any lookahead
+>>> for name, stats in minimization_report(grammar).items():
+...     print(name, stats)
+plain CompiledTableStats(states=15, rows=15, entries=44, slots=49, default_reductions=0)
+minimized CompiledTableStats(states=13, rows=13, entries=24, slots=36, default_reductions=5)
+
+Trees are the same
+>>> parse = lambda parser, symbols: parser.parse([Token(s, s) for s in symbols.split()] + [Token('$')], full_math=True)
+>>> symbols = 'n v det n prep n prep n'
+>>> parse(Parser(grammar), symbols) == parse(Parser(grammar, optimize=True), symbols)
+True
+>>> parse(Parser(grammar, lookahead='lalr'), symbols) == parse(Parser(grammar, lookahead='lalr', optimize=True), symbols)
+True
+
+glrengine prunes its rule set and shares sparse ACTION rows
+>>> text = '''
+... S = adj noun | S conj S | adj Loop
+... Loop = Loop noun
+... Word = word
+... Word = noun
+... '''
+>>> plain, optimized = EngineParser('S', text), EngineParser('S', text, optimize=True)
+>>> plain.table_stats()
+TableStats(rules=7, states=8, rows=8, entries=18)
+>>> optimized.table_stats()
+TableStats(rules=3, states=6, rows=6, entries=11)
+>>> optimized.ACTION[0]['verb']
+()
+>>> sorted(optimized.R.labels) == list(range(optimized.R.rules_count))
+True
+"""
+from glr.grammar_parser import GrammarParser
+from glr.lr import find_useful_rules, minimization_report
+from glr.parser import Parser
+from glr.tokenizer import Token
+from glr.utils import format_rule
+from glrengine.parser import Parser as EngineParser
@@ -0,0 +1,37 @@
+# coding=utf-8
+u"""
+Result policies select accepted spans while parsing
+>>> text = '''
+... S = a b
+... S = b c
+... S = a b c (0.5)
+... S = c
+... '''
+>>> grammar = GrammarParser().set_log_level(0).parse(text)
+>>> parser = Parser(grammar)
+>>> tokens = lambda symbols: [Token(s, s + str(i)) for i, s in enumerate(symbols.split())] + [Token('$')]
+>>> sentence = tokens('a b c x c')
+>>> parser.parse_forest(sentence).roots
+[S[0:2], S[0:3], S[1:3], S[2:3], S[4:5]]
+>>> parser.parse_forest(sentence, policy='longest-leftmost').roots
+[S[0:3], S[4:5]]
+>>> parser.parse_forest(sentence, policy='non-overlapping').roots
+[S[0:2], S[2:3], S[4:5]]
+
+Highest weight prefers weight 1 spans to the longer one with weight 0.5
+>>> parser.parse_forest(sentence, policy='highest-weight').roots
+[S[0:2], S[2:3], S[4:5]]
+
+Best derivations of deep forests are scored and copied without recursion
+>>> chain = Parser(GrammarParser().set_log_level(0).parse('S = a S | a'))
+>>> roots = chain.parse_forest(tokens(' '.join(['a'] * 3000)), full_math=True, policy='highest-weight').roots
+>>> roots, list(roots[0].packed)
+([S[0:3000]], [(1, (a[0:1], S[1:3000]))])
+
+Streams yield selected spans only
+>>> [len(tree.children) for tree in parser.parse_stream(sentence, policy='longest-leftmost')]
+[3, 1]
+"""
+from glr.grammar_parser import GrammarParser
+from glr.parser import Parser
+from glr.tokenizer import Token
@@ -0,0 +1,87 @@
+# coding=utf-8
+u"""
+Slot validator drops stack edges as soon as the symbol in them fails checks of every rule it can be part of
+>>> text = '''
+... S = NP v
+... S = NP v NP
+... NP = adj n
+... NP = n
+... '''
+>>> grammar = GrammarParser().set_log_level(0).parse(text)
+>>> parser = Parser(grammar)
+>>> tokens = lambda values: [Token(value.split('_')[0], value) for value in values.split()] + [Token('$')]
+
+Adjective agrees with the noun on the last letter, the noun is the right one of the pair, so the pair is checked
+when it is shifted. Verbs must not end with x.
+>>> def slot_checks(rule_index, position):
+...     rule = grammar[rule_index]
+...     if rule.right_symbols[position] == 'v':
+...         return (lambda child: not child.token.value.endswith('x')), []
+...     if rule.right_symbols == ('adj', 'n') and position == 1:
+...         return None, [(1, lambda child, partner: child.token.value[-1] == partner.token.value[-1])]
+...     return None, []
+>>> slot_validator = SlotValidator(parser, slot_checks)
+
+Validator of reduced rules with the same checks
+>>> def validate(syntax_tree):
+...     values = [child.token.value if child.token else '' for child in syntax_tree.children]
+...     rule = grammar[syntax_tree.rule_index]
+...     if rule.right_symbols == ('adj', 'n') and values[0][-1] != values[1][-1]:
+...         return False
+...     return not any(symbol == 'v' and value.endswith('x') for symbol, value in zip(rule.right_symbols, values))
+
+Same trees on fewer stack heads
+>>> for symbols in ['adj_a n_a v_b', 'adj_a n_b v_b adj_c n_c', 'n_a v_x n_b v_b']:
+...     results = []
+...     for slots in (None, slot_validator):
+...         stats = ParseStats()
+...         trees = parser.parse(tokens(symbols), False, validate, stats, slots)
+...         results.append((len(trees), sum(stats.widths)))
+...     print(symbols, results)
+adj_a n_a v_b [(2, 8), (2, 8)]
+adj_a n_b v_b adj_c n_c [(2, 16), (2, 15)]
+n_a v_x n_b v_b [(1, 10), (1, 8)]
+
+Automation builds slot checks from labels, gram and reg-* labels are checked on the token of their own slot
+>>> automation = Automation(u'''
+... S = adj<gram=femn> noun<reg-h-first>
+... S = noun<gram=nomn> verb
+... ''')
+>>> single, pairs = automation.slot_checks(1, 0)
+>>> adjective = lambda word: SymbolNode('adj', 0, 1, next(iter(automation.lexer.scan(word))))
+>>> single(adjective(u'красивая')), single(adjective(u'красивый')), pairs
+(True, False, [])
+
+Shifts rejected at the slot leave fewer stack heads, trees are the same as with labels checked on reduction only
+>>> for text in [u'красивый Петя', u'красивая маша спит', u'красивая Маша идет']:
+...     results = []
+...     for slots in (None, automation.slot_validator):
+...         stats = ParseStats()
+...         trees = automation.parser.parse(automation.lexer.scan(text), False, automation.validate, stats, slots)
+...         results.append((trees, sum(stats.widths)))
+...     (trees, width), (slot_trees, slot_width) = results
+...     print(text, len(trees), trees == slot_trees, width, slot_width)
+красивый Петя 0 True 5 3
+красивая маша спит 1 True 7 6
+красивая Маша идет 2 True 8 8
+
+Agreement labels compare tags of two tokens, so the partner of one can not be a nonterminal
+>>> Automation(u'''
+... S = adj<agr-gnc=1> NP
+... NP = noun
+... ''')
+Traceback (most recent call last):
+...
+Exception: Agreement label agr-gnc=1 of adj refers to nonterminal NP in rule #1: S = adj<agr-gnc=1> NP
+
+Tables compiled without LR states have no kernel items to check
+>>> SlotValidator(Parser(grammar, action_goto_table=parser.action_goto_table), slot_checks)
+Traceback (most recent call last):
+...
+AssertionError: Kernel items are needed, the table was compiled without states
+"""
+from glr.automation import Automation
+from glr.forest import SymbolNode
+from glr.grammar_parser import GrammarParser
+from glr.parser import Parser, ParseStats, SlotValidator
+from glr.tokenizer import Token
@@ -0,0 +1,32 @@
+# coding=utf-8
+u"""
+Span mode returns accepted spans without building trees
+>>> text = '''
+... S = NP VP
+... S = S PP
+... NP = n
+... NP = NP PP
+... PP = prep NP
+... VP = v NP
+... '''
+>>> grammar = GrammarParser().set_log_level(0).parse(text)
+>>> parser = Parser(grammar)
+>>> words = 'n v n prep n . n v n'.split()
+>>> tokens = [Token(s, s + str(i), 3 * i, 3 * i + 2) for i, s in enumerate(words)] + [Token('$')]
+>>> spans = parser.parse_spans(tokens)
+>>> spans[0]
+Span(symbol='S', start=0, end=3, rule_indexes=(1,), char_start=0, char_end=8)
+>>> [(span.start, span.end, span.rule_indexes) for span in spans]
+[(0, 3, (1,)), (0, 5, (2, 1)), (6, 9, (1,))]
+>>> parser.recognize(tokens), parser.recognize(tokens[:2] + [Token('$')])
+(True, False)
+
+Trees are built only for spans asked for, the same as parse gives
+>>> [len(parser.expand(tokens, span)) for span in spans]
+[1, 2, 1]
+>>> sorted(parser.expand(tokens, spans[1])) == sorted(parser.parse(tokens)[1:3])
+True
+"""
+from glr.grammar_parser import GrammarParser
+from glr.parser import Parser
+from glr.tokenizer import Token
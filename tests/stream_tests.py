@@ -0,0 +1,65 @@
+# coding=utf-8
+u"""
+Session takes tokens one by one and returns roots accepted on each of them
+>>> text = '''
+... S = NP VP
+... S = S PP
+... NP = n
+... NP = det n
+... NP = NP PP
+... PP = prep NP
+... VP = v NP
+... '''
+>>> grammar = GrammarParser().set_log_level(0).parse(text)
+>>> parser = Parser(grammar)
+
+New parses are only started on tokens the root symbol can start with
+>>> sorted(parser.table.symbols[symbol_id] for symbol_id in parser.start_symbol_ids)
+['det', 'n']
+
+>>> session = ParseSession(parser)
+>>> for symbol in 'n v n prep n . n v det n'.split() + ['$']:
+...     print(symbol, session.feed(Token(symbol, symbol)))
+n []
+v []
+n []
+prep [S[0:3]]
+n []
+. [S[0:5]]
+n []
+v []
+det []
+n []
+$ [S[6:10]]
+
+Streaming gives the same trees as parse, while the stack keeps only levels a parse can still reach
+>>> def tokens(count):
+...     for i in range(count):
+...         for symbol in 'n v n prep n prep det n .'.split():
+...             yield Token(symbol, symbol + str(i))
+...     yield Token('$')
+>>> sorted(parser.parse_stream(tokens(20))) == sorted(parser.parse(list(tokens(20))))
+True
+>>> session = ParseSession(parser)
+>>> for token in tokens(1000):
+...     roots = session.feed(token)
+>>> session.level, len(session.gss.states) < 50
+(9001, True)
+
+With max_results tokens are consumed only until that many trees are accepted
+>>> def counted(tokens, consumed):
+...     for token in tokens:
+...         consumed.append(token)
+...         yield token
+>>> consumed = []
+>>> parser.parse(counted(tokens(1000), consumed), max_results=2) == parser.parse(list(tokens(1000)))[:2]
+True
+>>> len(consumed)
+6
+>>> consumed = []
+>>> parser.recognize(counted(tokens(1000), consumed)), len(consumed)
+(True, 4)
+"""
+from glr.grammar_parser import GrammarParser
+from glr.parser import Parser, ParseSession
+from glr.tokenizer import Token
@@ -0,0 +1,45 @@
+# coding=utf-8
+u"""
+Compiled table interns symbols and keeps one flat buffer per action type, rows are packed by displacement
+>>> text = '''
+... S = NP VP
+... S = S PP
+... NP = n
+... NP = det n
+... NP = NP PP
+... PP = prep NP
+... VP = v NP
+... '''
+>>> grammar = GrammarParser().set_log_level(0).parse(text)
+>>> parser = Parser(grammar)
+>>> table = parser.table
+>>> table.symbols
+('$', '@', 'NP', 'PP', 'S', 'VP', 'det', 'n', 'prep', 'v')
+>>> table.get_shift(0, table.symbol_id('n')), table.get_goto(0, table.symbol_id('NP'))
+(3, 2)
+>>> table.get_reduces(11, table.symbol_id('prep')), table.get_shift(11, table.symbol_id('prep'))
+((6,), 6)
+>>> [state for state in range(table.states_count) if table.accepts[state]]
+[1]
+>>> table.get_shift(1, table.symbol_id('n')), table.get_reduces(1, table.symbol_id('n'))
+(-1, ())
+>>> len(table.check) < table.states_count * table.symbols_count
+True
+
+Parsing does not add entries to the table, unknown symbols are just dead ends
+>>> entries = sum(len(row) for row in parser.action_goto_table)
+>>> tokens = [Token(s, s) for s in 'n v det n prep n unknown'.split()] + [Token('$')]
+>>> len(set(parser.parse(tokens))), len(parser.parse(tokens[:-2] + [Token('$')], full_math=True))
+(3, 2)
+>>> entries == sum(len(row) for row in parser.action_goto_table)
+True
+
+Table survives pickling
+>>> import pickle
+>>> restored = pickle.loads(pickle.dumps(table))
+>>> restored.reduces == table.reduces and restored.shifts == table.shifts
+True
+"""
+from glr.grammar_parser import GrammarParser
+from glr.parser import Parser
+from glr.tokenizer import Token